@@ -0,0 +1,27 @@
+"""routes keyset pagination index
+
+Revision ID: b41d7e93a2c5
+Revises: 9f2c0b1f6b5a
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "b41d7e93a2c5"
+down_revision = "9f2c0b1f6b5a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_routes_user_id_created_at_id",
+        "routes",
+        ["user_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_routes_user_id_created_at_id", table_name="routes")
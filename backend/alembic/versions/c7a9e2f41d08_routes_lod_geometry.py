@@ -0,0 +1,44 @@
+"""routes level-of-detail geometry columns
+
+Revision ID: c7a9e2f41d08
+Revises: b41d7e93a2c5
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from geoalchemy2 import Geometry
+
+revision = "c7a9e2f41d08"
+down_revision = "b41d7e93a2c5"
+branch_labels = None
+depends_on = None
+
+# (column, max zoom) -- keep in sync with app.geo.lod.LOD_BANDS.
+_BANDS = (("geometry_lod_z8", 8), ("geometry_lod_z11", 11), ("geometry_lod_z14", 14))
+
+
+def upgrade() -> None:
+    for column, _ in _BANDS:
+        op.add_column(
+            "routes",
+            sa.Column(
+                column,
+                Geometry(geometry_type="LINESTRING", srid=4326, spatial_index=False),
+                nullable=True,
+            ),
+        )
+    op.execute(
+        "UPDATE routes SET "
+        + ", ".join(
+            f"{column} = ST_Simplify(geometry, {360.0 / (256 * (1 << zoom))}, true)"
+            for column, zoom in _BANDS
+        )
+    )
+
+
+def downgrade() -> None:
+    for column, _ in reversed(_BANDS):
+        op.drop_column("routes", column)
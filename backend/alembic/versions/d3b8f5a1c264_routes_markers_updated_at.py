@@ -0,0 +1,38 @@
+"""routes.markers_updated_at for conditional GETs
+
+Revision ID: d3b8f5a1c264
+Revises: c7a9e2f41d08
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "d3b8f5a1c264"
+down_revision = "c7a9e2f41d08"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "routes",
+        sa.Column(
+            "markers_updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    # Existing rows: start from the newest marker (or the route itself).
+    op.execute(
+        "UPDATE routes SET markers_updated_at = GREATEST("
+        "routes.updated_at, "
+        "(SELECT max(m.created_at) FROM markers m WHERE m.route_id = routes.id))"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("routes", "markers_updated_at")
@@ -0,0 +1,54 @@
+"""space markers.order_index 1024 apart
+
+Revision ID: e5c1a7d94b3f
+Revises: d3b8f5a1c264
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "e5c1a7d94b3f"
+down_revision = "d3b8f5a1c264"
+branch_labels = None
+depends_on = None
+
+ORDER_GAP = 1024  # app.api.ordering.ORDER_GAP at the time of writing
+
+
+def _renumber(first: int, step: int) -> None:
+    # uq_markers_route_order_index is checked row by row, so park every key
+    # below the smallest existing key (and below 0) first, in reverse order;
+    # the final keys are all >= 0 and cannot collide. Keys written before the
+    # API validated them may be negative.
+    op.execute(
+        """
+        UPDATE markers SET order_index = parked.floor - parked.rn
+        FROM (
+            SELECT id,
+                   row_number() OVER (PARTITION BY route_id ORDER BY order_index) AS rn,
+                   CASE WHEN min(order_index) OVER () < 0 THEN min(order_index) OVER () ELSE 0 END AS floor
+            FROM markers
+        ) AS parked
+        WHERE markers.id = parked.id
+        """
+    )
+    op.execute(
+        f"""
+        UPDATE markers SET order_index = {first} + (ranked.rn - 1) * {step}
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY route_id ORDER BY order_index DESC) AS rn
+            FROM markers
+        ) AS ranked
+        WHERE markers.id = ranked.id
+        """
+    )
+
+
+def upgrade() -> None:
+    _renumber(ORDER_GAP, ORDER_GAP)
+
+
+def downgrade() -> None:
+    _renumber(0, 1)
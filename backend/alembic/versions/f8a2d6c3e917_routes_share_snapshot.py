@@ -0,0 +1,28 @@
+"""routes share snapshot columns
+
+Revision ID: f8a2d6c3e917
+Revises: e5c1a7d94b3f
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "f8a2d6c3e917"
+down_revision = "e5c1a7d94b3f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("routes", sa.Column("share_snapshot", sa.LargeBinary(), nullable=True))
+    op.add_column("routes", sa.Column("share_etag", sa.String(length=32), nullable=True))
+    op.add_column("routes", sa.Column("shared_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("routes", "shared_at")
+    op.drop_column("routes", "share_etag")
+    op.drop_column("routes", "share_snapshot")
@@ -8,9 +8,10 @@ from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.cache import CurrentUser
 from app.auth.deps import get_current_user
 from app.auth.models import RefreshToken, User
-from app.auth.passwords import hash_password, verify_password
+from app.auth.passwords import PasswordHasherBusy, needs_rehash, password_hasher
 from app.auth.tokens import (
     create_access_token,
     generate_refresh_token,
@@ -49,6 +50,18 @@ class SessionOut(BaseModel):
     user: UserOut
 
 
+async def _run_hasher(job):
+    # Hashing runs in a bounded pool; shed load instead of queueing forever.
+    try:
+        return await job
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="password_hasher_busy",
+            headers={"Retry-After": "1"},
+        )
+
+
 def _as_utc(dt: datetime) -> datetime:
     if dt.tzinfo is None:
         return dt.replace(tzinfo=timezone.utc)
@@ -81,7 +94,8 @@ async def register(
     db: AsyncSession = Depends(get_db)
 ) -> SessionOut:
     email = payload.email.strip().lower()
-    user = User(email=email, password_hash=hash_password(payload.password))
+    password_hash = await _run_hasher(password_hasher.hash(payload.password))
+    user = User(email=email, password_hash=password_hash)
     db.add(user)
     try:
         await db.commit()
@@ -105,7 +119,7 @@ async def login(
 ) -> SessionOut:
     email = payload.email.strip().lower()
     user = await db.scalar(select(User).where(User.email == email))
-    if user is None or not verify_password(payload.password, user.password_hash):
+    if user is None or not await _run_hasher(password_hasher.verify(payload.password, user.password_hash)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="invalid_credentials"
@@ -115,6 +129,13 @@ async def login(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="inactive_user"
         )
+    if needs_rehash(user.password_hash):
+        # Upgrade to the configured iteration count while we have the plaintext;
+        # committed together with the new refresh token.
+        try:
+            user.password_hash = await password_hasher.hash(payload.password)
+        except PasswordHasherBusy:
+            pass
     return await _issue_session(db=db, user=user)
 
 
@@ -192,6 +213,6 @@ async def refresh(
 @limiter.limit(RateLimits.DEFAULT)
 async def me(
     request: Request,
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ) -> UserOut:
     return UserOut(id=str(user.id), email=user.email)
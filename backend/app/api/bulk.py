@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.ordering import spaced_keys
+from app.api.serializers import refresh_lods
+from app.geo.geojson import ewkb_linestring, ewkb_point
+from app.geo.importers import ImportedRoute
+from app.geo.kernel import total_distance_km
+from app.models.marker import Marker
+from app.models.route import Route
+
+# Bulk route inserts, shared by POST /routes/import and the load test seeder.
+
+# Markers per multi-row INSERT, well under the 32k bind parameter limit.
+MARKER_ROWS = 2000
+
+
+async def insert_imported_routes(
+    db: AsyncSession, user_id: uuid.UUID, batch: list[ImportedRoute], is_public: bool
+) -> list[uuid.UUID]:
+    """Insert `batch` for `user_id` with one multi-row INSERT per table; return the new route ids.
+
+    Marker keys are spaced as for single inserts and the LOD bands are filled
+    in, so the rows match routes created through the API. The caller commits.
+    """
+    ids = [uuid.uuid4() for _ in batch]
+    await db.execute(
+        insert(Route).values(
+            [
+                {
+                    "id": route_id,
+                    "user_id": user_id,
+                    "title": route.title,
+                    "description": route.description,
+                    "geometry": ewkb_linestring(route.coordinates),
+                    "distance_km": total_distance_km(route.coordinates),
+                    "is_public": is_public,
+                }
+                for route_id, route in zip(ids, batch)
+            ]
+        )
+    )
+    markers = [
+        {
+            "id": uuid.uuid4(),
+            "route_id": route_id,
+            "geometry": ewkb_point(m.lon, m.lat),
+            "label": m.label,
+            "description": m.description,
+            "icon_type": m.icon_type,
+            "order_index": key,
+        }
+        for route_id, route in zip(ids, batch)
+        for m, key in zip(route.markers, spaced_keys(len(route.markers)))
+    ]
+    for start in range(0, len(markers), MARKER_ROWS):
+        await db.execute(insert(Marker).values(markers[start:start + MARKER_ROWS]))
+    await refresh_lods(db, *ids)
+    return ids
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional, Protocol
+
+from app.core.settings import settings
+
+# Rendered route responses, keyed by ETag + viewer scope. The ETag already
+# encodes the route version, so a stale entry can never be served (even from a
+# worker that missed an invalidation); tag invalidation just frees the space
+# early. Access checks run before the cache is consulted, and private entries
+# are scoped to their owner on top of that.
+
+
+class CachedResponse(NamedTuple):
+    media_type: str
+    body: bytes
+    headers: dict[str, str]  # representation headers beyond the validators
+
+
+def route_tag(route_id: object) -> str:
+    return f"route:{route_id}"
+
+
+def user_tag(user_id: object) -> str:
+    return f"user:{user_id}"
+
+
+class ResponseCache(Protocol):
+    hits: int
+    misses: int
+
+    async def get(self, key: str) -> Optional[CachedResponse]: ...
+
+    async def set(self, key: str, value: CachedResponse, tags: Iterable[str]) -> None: ...
+
+    async def invalidate(self, *tags: str) -> None: ...
+
+
+class MemoryResponseCache:
+    """Size-bounded LRU with a TTL and a tag -> keys index."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CachedResponse, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    async def set(self, key: str, value: CachedResponse, tags: Iterable[str]) -> None:
+        if len(value.body) > self.max_bytes or self.ttl_seconds <= 0:
+            return
+        self._drop(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, tags)
+        self._size += len(value.body)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while self._size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= len(entry[1].body)
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisResponseCache:
+    """Shared cache in Redis; tags are sets of keys expiring with their entries."""
+
+    def __init__(self, url: str, ttl_seconds: float, max_entry_bytes: int, prefix: str = "respcache:"):
+        import redis.asyncio as redis
+
+        self.ttl_seconds = int(ttl_seconds)
+        self.max_entry_bytes = max_entry_bytes
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        raw = await self._client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        meta, _, body = raw.partition(b"\n")
+        media_type, headers = json.loads(meta)
+        return CachedResponse(media_type, body, headers)
+
+    async def set(self, key: str, value: CachedResponse, tags: Iterable[str]) -> None:
+        if len(value.body) > self.max_entry_bytes or self.ttl_seconds <= 0:
+            return
+        full_key = self.prefix + key
+        async with self._client.pipeline(transaction=False) as pipe:
+            meta = json.dumps([value.media_type, value.headers]).encode()
+            pipe.set(full_key, meta + b"\n" + value.body, ex=self.ttl_seconds)
+            for tag in tags:
+                pipe.sadd(self.prefix + tag, full_key)
+                pipe.expire(self.prefix + tag, self.ttl_seconds)
+            await pipe.execute()
+
+    async def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            tag_key = self.prefix + tag
+            keys = await self._client.smembers(tag_key)
+            await self._client.delete(tag_key, *keys)
+
+
+def cache_stats(cache: ResponseCache) -> dict[str, float]:
+    lookups = cache.hits + cache.misses
+    stats = {
+        "hits": cache.hits,
+        "misses": cache.misses,
+        "hit_ratio": round(cache.hits / lookups, 4) if lookups else 0.0,
+    }
+    if isinstance(cache, MemoryResponseCache):
+        stats.update(entries=len(cache), bytes=cache.size_bytes, evictions=cache.evictions)
+    return stats
+
+
+def make_response_cache() -> ResponseCache:
+    if settings.response_cache_backend == "redis":
+        if not settings.response_cache_redis_url:
+            raise ValueError("response_cache_redis_url is required for the redis backend")
+        return RedisResponseCache(
+            settings.response_cache_redis_url,
+            settings.response_cache_ttl_seconds,
+            settings.response_cache_max_bytes,
+        )
+    return MemoryResponseCache(settings.response_cache_max_bytes, settings.response_cache_ttl_seconds)
+
+
+response_cache = make_response_cache()
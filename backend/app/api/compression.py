@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import time
+import zlib
+from collections.abc import Callable, Sequence
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.api.cache import CachedResponse, MemoryResponseCache, ResponseCache
+from app.api.negotiation import preferred_encoding
+from app.core import metrics
+from app.core.settings import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, see the `compression` extra
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional, see the `compression` extra
+    zstandard = None
+
+# Response compression. Route bodies are mostly coordinate text and shrink
+# 3-5x. Bodies sent in one piece are compressed in one go (and, when they carry
+# a strong ETag, kept compressed in `compressed_cache`, so response cache hits
+# don't pay for compression again). Streamed bodies (NDJSON, exports) are
+# compressed chunk by chunk, flushing after each so clients still see routes as
+# they are written. Responses that already have a Content-Encoding, such as
+# share snapshots, pass through untouched.
+#
+# A compressed body is a different representation, so its ETag gets a
+# "-<coding>" suffix (as share links already do). If-None-Match tags with the
+# suffix are matched against the handler's ETag with the suffix removed, and a
+# 304 echoes the tag back as the client sent it.
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def __call__(self, data: bytes, final: bool) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._c = brotli.Compressor(quality=quality)
+
+    def __call__(self, data: bytes, final: bool) -> bytes:
+        return self._c.process(data) + (self._c.finish() if final else self._c.flush())
+
+
+class _Zstd:
+    def __init__(self, level: int) -> None:
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def __call__(self, data: bytes, final: bool) -> bytes:
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._c.compress(data) + self._c.flush(mode)
+
+
+# Server preference order; codings whose package is missing aren't offered.
+ENCODERS: dict[str, Callable[[int], Callable[[bytes, bool], bytes]]] = {
+    **({"zstd": _Zstd} if zstandard is not None else {}),
+    **({"br": _Brotli} if brotli is not None else {}),
+    "gzip": _Gzip,
+}
+KNOWN_CODINGS = ("zstd", "br", "gzip")
+
+
+def _with_coding(etag: str, coding: str) -> str:
+    return f'{etag[:-1]}-{coding}"' if etag.endswith('"') else etag
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower() and vary.strip() != "*":
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+def _uncoded_tags(header: str) -> list[str]:
+    """If-None-Match tags with a coding suffix, without it."""
+    tags = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        for coding in KNOWN_CODINGS:
+            suffix = f'-{coding}"'
+            if tag.endswith(suffix):
+                tags.append(tag[: -len(suffix)] + '"')
+    return tags
+
+
+compressed_cache = MemoryResponseCache(settings.compression_cache_max_bytes, settings.response_cache_ttl_seconds)
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli/zstd response compression, as a plain ASGI middleware.
+
+    Only bodies of `media_types` (exact, or "type/*") and at least `min_size`
+    bytes are compressed; streamed bodies are compressed regardless of size
+    unless they declare a smaller Content-Length.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        *,
+        min_size: int = 1024,
+        media_types: Sequence[str] = ("application/json",),
+        levels: Optional[dict[str, int]] = None,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.app = app
+        self.min_size = min_size
+        media_types = [t.strip().lower() for t in media_types if t.strip()]
+        self.media_types = frozenset(t for t in media_types if not t.endswith("/*"))
+        self.media_prefixes = tuple(t[:-1] for t in media_types if t.endswith("/*"))
+        self.levels = {"gzip": 4, "br": 4, "zstd": 3, **(levels or {})}
+        self.codings = tuple(ENCODERS)
+        self.cache = cache
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        coding = None
+        if scope["method"] != "HEAD":
+            coding = preferred_encoding(request_headers.get("accept-encoding"), self.codings)
+        if_none_match = request_headers.get("if-none-match")
+        client_tags: frozenset[str] = frozenset()
+        if coding is not None and if_none_match:
+            uncoded = _uncoded_tags(if_none_match)
+            if uncoded:
+                client_tags = frozenset(t.strip().removeprefix("W/") for t in if_none_match.split(","))
+                raw = [(k, v) for k, v in scope["headers"] if k != b"if-none-match"]
+                raw.append((b"if-none-match", ", ".join([if_none_match, *uncoded]).encode("latin-1")))
+                scope = {**scope, "headers": raw}
+
+        responder = _Responder(self, send, coding, client_tags, scope)
+        await self.app(scope, receive, responder.send)
+
+    def compressible(self, media_type: str) -> bool:
+        return media_type in self.media_types or media_type.startswith(self.media_prefixes)
+
+
+class _Responder:
+    """Holds back the response start until the first body chunk shows its size."""
+
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        send: Callable,
+        coding: Optional[str],
+        client_tags: frozenset[str],
+        scope: dict,
+    ) -> None:
+        self.middleware = middleware
+        self._send = send
+        self.coding = coding
+        self.client_tags = client_tags
+        self.scope = scope
+        self.start: Optional[dict] = None
+        self.encoder: Optional[Callable[[bytes, bool], bytes]] = None
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            if message["status"] == 304 and self.client_tags:
+                self._not_modified(MutableHeaders(scope=message))
+            return
+        if message["type"] != "http.response.body":
+            await self._flush_start()
+            await self._send(message)
+            return
+        if self.start is not None:
+            await self._begin(message)
+        elif self.encoder is not None:
+            more_body = message.get("more_body", False)
+            body = self._encode(self.encoder, message.get("body", b""), not more_body)
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+        else:
+            await self._send(message)
+
+    async def _flush_start(self) -> None:
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self._send(start)
+
+    def _not_modified(self, headers: MutableHeaders) -> None:
+        etag = headers.get("etag")
+        if etag is None:
+            return
+        for coding in KNOWN_CODINGS:
+            if _with_coding(etag, coding).removeprefix("W/") in self.client_tags:
+                headers["ETag"] = _with_coding(etag, coding)
+                _add_vary(headers)
+                return
+
+    def _encode(self, encoder: Callable[[bytes, bool], bytes], data: bytes, final: bool) -> bytes:
+        start = time.thread_time()
+        out = encoder(data, final)
+        metrics.http_compression_seconds.inc((self.coding,), time.thread_time() - start)
+        metrics.http_compression_in.inc((self.coding,), len(data))
+        metrics.http_compression_out.inc((self.coding,), len(out))
+        return out
+
+    async def _begin(self, first: dict) -> None:
+        start = self.start
+        headers = MutableHeaders(scope=start)
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if (
+            start["status"] < 200
+            or start["status"] in (204, 206, 304)
+            or "content-encoding" in headers
+            or "no-transform" in headers.get("cache-control", "")
+            or not self.middleware.compressible(media_type)
+        ):
+            await self._flush_start()
+            await self._send(first)
+            return
+
+        _add_vary(headers)
+        body = first.get("body", b"")
+        more_body = first.get("more_body", False)
+        declared = headers.get("content-length")
+        size = len(body) if not more_body else int(declared) if declared else None
+        if self.coding is None or (size is not None and size < self.middleware.min_size):
+            await self._flush_start()
+            await self._send(first)
+            return
+
+        etag = headers.get("etag")
+        if more_body:
+            self.encoder = ENCODERS[self.coding](self.middleware.levels[self.coding])
+            body = self._encode(self.encoder, body, False)
+            metrics.http_compressed.inc((self.coding, "false"))
+        else:
+            body = await self._compress(body, etag, media_type)
+            if body is None:
+                await self._flush_start()
+                await self._send(first)
+                return
+            headers["Content-Length"] = str(len(body))
+
+        if more_body and "content-length" in headers:
+            del headers["Content-Length"]
+        headers["Content-Encoding"] = self.coding
+        if etag is not None:
+            headers["ETag"] = _with_coding(etag, self.coding)
+        await self._flush_start()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _compress(self, body: bytes, etag: Optional[str], media_type: str) -> Optional[bytes]:
+        """The whole body compressed, or None when that doesn't make it smaller."""
+        cache = self.middleware.cache
+        # A strong ETag promises byte-identical bodies, so it can key the result.
+        key = None
+        if cache is not None and etag is not None and not etag.startswith("W/"):
+            query = self.scope.get("query_string", b"").decode("latin-1")
+            key = f"{self.coding}:{self.scope['path']}?{query}:{etag}"
+            cached = await cache.get(key)
+            if cached is not None:
+                metrics.http_compressed.inc((self.coding, "true"))
+                metrics.http_compression_in.inc((self.coding,), len(body))
+                metrics.http_compression_out.inc((self.coding,), len(cached.body))
+                return cached.body
+
+        encoder = ENCODERS[self.coding](self.middleware.levels[self.coding])
+        compressed = self._encode(encoder, body, True)
+        if len(compressed) >= len(body):
+            return None
+        metrics.http_compressed.inc((self.coding, "false"))
+        if key is not None:
+            await cache.set(key, CachedResponse(media_type, compressed, {}), ())
+        return compressed
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import re
+import uuid
+import zipfile
+from typing import Any, AsyncIterator, Literal
+from xml.sax.saxutils import escape, quoteattr
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.serializers import MarkerOut, RouteOut, iter_marker_outs, iter_route_outs
+from app.auth.cache import CurrentUser
+from app.auth.deps import get_current_user
+from app.core.rate_limit import limiter, RateLimits
+from app.db import get_db
+from app.geo.geojson import feature
+from app.geo.importers import GPX_EXTENSIONS_NS
+from app.models.route import Route
+
+router = APIRouter(prefix="/routes")
+
+# Export writers consume routes as they come off a server-side cursor and emit
+# each one as soon as it is written, so memory doesn't grow with the account.
+# In GeoJSON and in single-route GPX files markers precede their route (as
+# Point features / waypoints), which is also how POST /routes/import pairs them
+# back up. GPX 1.1 puts every <wpt> before the first <trk>, so the multi-route
+# GPX document is written in two cursor passes: all markers as waypoints tagged
+# with their route id (<br:route>), then all routes as tracks (<br:id>).
+
+GPX_HEADER = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    b'<gpx version="1.1" creator="BikeRoutes" xmlns="http://www.topografix.com/GPX/1/1"'
+    b' xmlns:br="' + GPX_EXTENSIONS_NS.encode() + b'">\n'
+)
+GPX_FOOTER = b"</gpx>\n"
+
+EXPORT_MEDIA_TYPES = {
+    "gpx": "application/gpx+xml",
+    "geojson": "application/geo+json",
+    "zip": "application/zip",
+}
+
+
+def _text_element(tag: str, value: str | None) -> str:
+    return f"<{tag}>{escape(value)}</{tag}>" if value else ""
+
+
+def _extensions(tag: str, route_id: str | None) -> str:
+    return f"<extensions><br:{tag}>{escape(route_id)}</br:{tag}></extensions>" if route_id else ""
+
+
+def gpx_waypoint(marker: MarkerOut, route_id: str | None = None) -> str:
+    lon, lat = marker.geometry["coordinates"][:2]
+    return (
+        f"<wpt lat={quoteattr(str(lat))} lon={quoteattr(str(lon))}>"
+        f"{_text_element('name', marker.label)}{_text_element('desc', marker.description)}"
+        f"{_text_element('sym', marker.icon_type)}{_extensions('route', route_id)}</wpt>\n"
+    )
+
+
+def gpx_track(route: RouteOut, tagged: bool = False) -> str:
+    parts = [
+        f"<trk>{_text_element('name', route.title)}{_text_element('desc', route.description)}",
+        _extensions("id", route.id if tagged else None),
+        "<trkseg>",
+    ]
+    parts.extend(f'<trkpt lat="{lat}" lon="{lon}"/>' for lon, lat, *_ in route.geometry.get("coordinates", []))
+    parts.append("</trkseg></trk>\n")
+    return "".join(parts)
+
+
+def gpx_route(route: RouteOut) -> bytes:
+    """A route's markers as <wpt>s followed by the route as a <trk>."""
+    return ("".join(gpx_waypoint(m) for m in route.markers) + gpx_track(route)).encode("utf-8")
+
+
+def geojson_features(route: RouteOut) -> bytes:
+    """Comma-separated features: the route's markers, then the route."""
+    features = [
+        feature(
+            id=m.id,
+            geometry=m.geometry,
+            properties={
+                "route_id": route.id,
+                "label": m.label,
+                "description": m.description,
+                "icon_type": m.icon_type,
+                "order_index": m.order_index,
+            },
+        )
+        for m in route.markers
+    ]
+    features.append(
+        feature(
+            id=route.id,
+            geometry=route.geometry,
+            properties={
+                "title": route.title,
+                "description": route.description,
+                "distance_km": route.distance_km,
+                "is_public": route.is_public,
+                "created_at": route.created_at,
+                "updated_at": route.updated_at,
+            },
+        )
+    )
+    return ",".join(json.dumps(f, separators=(",", ":")) for f in features).encode("utf-8")
+
+
+def archive_name(route: RouteOut) -> str:
+    slug = re.sub(r"[^\w.-]+", "_", route.title).strip("._")[:60] or "route"
+    return f"{slug}-{route.id[:8]}.gpx"
+
+
+async def gpx_stream(
+    markers: AsyncIterator[tuple[Any, MarkerOut]], routes: AsyncIterator[RouteOut]
+) -> AsyncIterator[bytes]:
+    """One GPX document: every marker as a tagged <wpt>, then every route as a <trk>.
+
+    `markers` is read to the end before `routes` starts, so both can be
+    cursors on the same session.
+    """
+    yield GPX_HEADER
+    async for route_id, marker in markers:
+        yield gpx_waypoint(marker, str(route_id)).encode("utf-8")
+    async for route in routes:
+        yield gpx_track(route, tagged=True).encode("utf-8")
+    yield GPX_FOOTER
+
+
+async def geojson_stream(routes: AsyncIterator[RouteOut]) -> AsyncIterator[bytes]:
+    yield b'{"type":"FeatureCollection","features":['
+    separator = b""
+    async for route in routes:
+        yield separator + geojson_features(route)
+        separator = b","
+    yield b"]}\n"
+
+
+class _ZipSink:
+    """Write-only, unseekable file for ZipFile; drained after every member.
+
+    Without seek/tell ZipFile streams: sizes and CRCs go in data descriptors.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+async def zip_stream(routes: AsyncIterator[RouteOut]) -> AsyncIterator[bytes]:
+    """One GPX file per route."""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for route in routes:
+            with archive.open(archive_name(route), "w") as member:
+                member.write(GPX_HEADER)
+                member.write(gpx_route(route))
+                member.write(GPX_FOOTER)
+            yield sink.drain()
+    yield sink.drain()
+
+
+_WRITERS = {"geojson": geojson_stream, "zip": zip_stream}
+
+
+async def _export_stream(db: AsyncSession, user_id: uuid.UUID, fmt: str) -> AsyncIterator[bytes]:
+    # The stream outlives the handler, so it owns closing the session.
+    try:
+        order_by = [Route.created_at, Route.id]
+        routes = iter_route_outs(db, Route.user_id == user_id, order_by=order_by)
+        if fmt == "gpx":
+            chunks = gpx_stream(iter_marker_outs(db, Route.user_id == user_id, order_by=order_by), routes)
+        else:
+            chunks = _WRITERS[fmt](routes)
+        async for chunk in chunks:
+            if chunk:
+                yield chunk
+    finally:
+        await db.close()
+
+
+@router.get("/export")
+@limiter.limit(RateLimits.EXPORT)
+async def export_routes(
+    request: Request,
+    format: Literal["gpx", "geojson", "zip"] = Query("gpx"),
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Stream all of the user's routes with their markers, oldest first.
+
+    `zip` holds one GPX file per route.
+    """
+    return StreamingResponse(
+        _export_stream(db, user.id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="bikeroutes-export.{format}"'},
+    )
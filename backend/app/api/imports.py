@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import itertools
+import uuid
+import xml.etree.ElementTree as ET
+import zipfile
+import zlib
+from functools import partial
+from typing import IO, Callable, Iterator, Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.api.bulk import insert_imported_routes
+from app.api.cache import response_cache, user_tag
+from app.auth.cache import CurrentUser
+from app.auth.deps import get_current_user
+from app.core.rate_limit import limiter, RateLimits
+from app.core.settings import settings
+from app.db import get_db
+from app.geo.importers import ImportedRoute, LimitedReader, archive_members, is_archive, iter_routes
+from app.geo.kernel import bbox as array_bbox
+from app.geo.tiles import BBox, invalidate_tiles
+
+router = APIRouter(prefix="/routes")
+
+# Routes per multi-row INSERT; parsing runs ahead by at most one batch.
+IMPORT_BATCH_ROUTES = 50
+
+# Raised by the readers for malformed, truncated or oversized files.
+_FILE_ERRORS = (ValueError, ET.ParseError, zipfile.BadZipFile, zlib.error)
+# Raised by ZipFile.open for encrypted members and unsupported methods (deflate64).
+_OPEN_ERRORS = (RuntimeError, NotImplementedError)
+
+
+class ImportFileResult(BaseModel):
+    filename: str
+    route_ids: list[uuid.UUID] = Field(default_factory=list)
+    markers: int = 0
+    error: Optional[str] = None
+
+
+class ImportResult(BaseModel):
+    files: list[ImportFileResult]
+    routes_created: int
+
+
+def _take(routes: Iterator[ImportedRoute], count: int) -> list[ImportedRoute]:
+    return list(itertools.islice(routes, count))
+
+
+def _route_extent(route: ImportedRoute) -> BBox:
+    points = route.coordinates
+    if route.markers:
+        points = np.vstack([points, [(m.lon, m.lat) for m in route.markers]])
+    return array_bbox(points)
+
+
+async def _import_file(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    name: str,
+    open_file: Callable[[], IO[bytes]],
+    is_public: bool,
+    extents: list[BBox],
+) -> ImportFileResult:
+    """Import one file in its own transaction."""
+    result = ImportFileResult(filename=name)
+    file_extents: list[BBox] = []
+    try:
+        fileobj = LimitedReader(open_file(), settings.import_max_file_bytes)
+    except _OPEN_ERRORS as e:
+        return ImportFileResult(filename=name, error=str(e) or type(e).__name__)
+    try:
+        routes = iter_routes(name, fileobj, settings.import_max_points)
+        # Parsing is blocking; pull one batch at a time in a worker thread.
+        while batch := await run_in_threadpool(_take, routes, IMPORT_BATCH_ROUTES):
+            result.route_ids += await insert_imported_routes(db, user_id, batch, is_public)
+            result.markers += sum(len(route.markers) for route in batch)
+            if is_public:
+                file_extents += [_route_extent(route) for route in batch]
+        if not result.route_ids:
+            raise ValueError("No routes found")
+        await db.commit()
+    except _FILE_ERRORS as e:
+        await db.rollback()
+        return ImportFileResult(filename=name, error=str(e) or type(e).__name__)
+    extents += file_extents
+    return result
+
+
+@router.post("/import", response_model=ImportResult)
+@limiter.limit(RateLimits.IMPORT)
+async def import_routes(
+    request: Request,
+    files: list[UploadFile] = File(...),
+    is_public: bool = Form(False),
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Import routes from GPX, KML or GeoJSON files, or zip archives of them.
+
+    Each file is committed on its own: one that fails to parse is rolled back
+    and reported in its result without affecting the others.
+    """
+    if len(files) > settings.import_max_files:
+        raise HTTPException(status_code=422, detail=f"At most {settings.import_max_files} files per import")
+
+    results: list[ImportFileResult] = []
+    extents: list[BBox] = []
+    try:
+        for upload in files:
+            name = upload.filename or "upload"
+            if not is_archive(name):
+                results.append(await _import_file(db, user.id, name, lambda: upload.file, is_public, extents))
+                continue
+            try:
+                archive = await run_in_threadpool(zipfile.ZipFile, upload.file)
+            except zipfile.BadZipFile as e:
+                results.append(ImportFileResult(filename=name, error=str(e)))
+                continue
+            with archive:
+                found = False
+                for info in archive_members(archive):
+                    found = True
+                    if len(results) >= settings.import_max_files:
+                        results.append(
+                            ImportFileResult(filename=name, error=f"Stopped after {settings.import_max_files} files")
+                        )
+                        break
+                    results.append(
+                        await _import_file(
+                            db, user.id, f"{name}/{info.filename}", partial(archive.open, info), is_public, extents
+                        )
+                    )
+                if not found:
+                    results.append(ImportFileResult(filename=name, error="No route files in archive"))
+    finally:
+        # Files before a failure (say, a database error) stay committed.
+        if any(r.route_ids for r in results):
+            await response_cache.invalidate(user_tag(user.id))
+            invalidate_tiles(*extents)
+
+    return ImportResult(files=results, routes_created=sum(len(r.route_ids) for r in results))
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Response
+
+from app.api.cache import MemoryResponseCache, response_cache
+from app.api.compression import compressed_cache
+from app.auth.cache import user_cache
+from app.auth.passwords import password_hasher
+from app.core.metrics import PROMETHEUS_MEDIA_TYPE, Counter, Gauge, registry, snapshot
+from app.core.rate_limit import limiter
+from app.db.session import pool_stats, pool_status
+from app.geo.tiles import tile_cache
+
+router = APIRouter()
+
+
+@registry.collector
+def _component_metrics():
+    """Counters the components keep themselves, read at scrape time."""
+    pool = pool_status()
+    yield snapshot(Gauge, "db_pool_size", "Connections kept in the pool.", pool["size"])
+    yield snapshot(Gauge, "db_pool_checked_out", "Connections in use.", pool["checked_out"])
+    yield snapshot(Gauge, "db_pool_overflow", "Connections open beyond the pool size.", pool["overflow"])
+    yield snapshot(Counter, "db_pool_checkouts_total", "Connections handed out.", pool_stats.checkouts)
+    yield snapshot(Counter, "db_pool_timeouts_total", "Checkouts that timed out.", pool_stats.timeouts)
+    yield snapshot(
+        Counter, "db_pool_wait_seconds_total", "Time spent waiting for a connection.", pool_stats.wait_seconds_total
+    )
+
+    yield snapshot(Counter, "rate_limit_checks_total", "Requests checked against a rate limit.", limiter.checks)
+    yield snapshot(Counter, "rate_limit_rejections_total", "Requests rejected with 429.", limiter.rejections)
+
+    yield snapshot(Counter, "user_cache_hits_total", "Authenticated-user cache hits.", user_cache.hits)
+    yield snapshot(Counter, "user_cache_misses_total", "Authenticated-user cache misses.", user_cache.misses)
+    yield snapshot(Gauge, "user_cache_entries", "Users in the cache.", len(user_cache))
+
+    yield snapshot(Counter, "response_cache_hits_total", "Response cache hits.", response_cache.hits)
+    yield snapshot(Counter, "response_cache_misses_total", "Response cache misses.", response_cache.misses)
+    if isinstance(response_cache, MemoryResponseCache):
+        yield snapshot(Gauge, "response_cache_bytes", "Bytes of cached responses.", response_cache.size_bytes)
+        yield snapshot(Counter, "response_cache_evictions_total", "Responses evicted.", response_cache.evictions)
+
+    yield snapshot(Gauge, "compressed_cache_bytes", "Bytes of cached compressed responses.", compressed_cache.size_bytes)
+
+    yield snapshot(Counter, "tile_cache_hits_total", "Vector tile cache hits.", tile_cache.hits)
+    yield snapshot(Counter, "tile_cache_misses_total", "Vector tile cache misses.", tile_cache.misses)
+    yield snapshot(Gauge, "tile_cache_bytes", "Bytes of cached tiles.", tile_cache.size_bytes)
+
+    yield snapshot(Gauge, "password_hash_pending", "Password hashes running or queued.", password_hasher.pending)
+    yield snapshot(
+        Counter, "password_hash_rejected_total", "Logins refused because the hasher was busy.", password_hasher.rejected
+    )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus text exposition for this worker process.
+
+    Async so rendering runs on the event loop, the only thread that touches
+    the metric dicts; a threadpool render could see them change size.
+    """
+    return Response(registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Optional
+
+from fastapi import Request
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _parse_accept(header: str) -> list[tuple[str, dict[str, str], float]]:
+    entries = []
+    for raw in header.split(","):
+        media_type, *raw_params = (part.strip() for part in raw.split(";"))
+        if not media_type:
+            continue
+        params: dict[str, str] = {}
+        for param in raw_params:
+            key, _, value = param.partition("=")
+            params[key.strip().lower()] = value.strip().strip('"')
+        try:
+            q = float(params.pop("q", "1"))
+        except ValueError:
+            q = 0.0
+        entries.append((media_type.lower(), params, q))
+    # Stable sort keeps header order among equal q-values.
+    entries.sort(key=lambda e: -e[2])
+    return entries
+
+
+def negotiate(request: Request, offered: Sequence[str]) -> Optional[tuple[str, dict[str, str]]]:
+    """Pick the client's preferred media type among `offered` alternatives.
+
+    Only explicit matches count; wildcards, plain JSON and missing headers
+    return None so callers fall back to their default JSON representation.
+    """
+    header = request.headers.get("accept")
+    if not header:
+        return None
+    for media_type, params, q in _parse_accept(header):
+        if q <= 0:
+            continue
+        if media_type == JSON_MEDIA_TYPE:
+            return None
+        if media_type in offered:
+            return media_type, params
+    return None
+
+
+def accepts_encoding(request: Request, coding: str) -> bool:
+    """Whether Accept-Encoding allows `coding`, by name or through "*"."""
+    header = request.headers.get("accept-encoding")
+    if not header:
+        return False
+    q_values = {name: q for name, _, q in _parse_accept(header)}
+    return q_values.get(coding, q_values.get("*", 0.0)) > 0
+
+
+def preferred_encoding(header: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """The content coding to use from `offered` (in server preference order).
+
+    The highest q-value wins; ties go to the earlier entry of `offered`. "*"
+    stands for any coding the header doesn't name.
+    """
+    if not header:
+        return None
+    q_values = {name: q for name, _, q in _parse_accept(header)}
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = q_values.get(coding, q_values.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
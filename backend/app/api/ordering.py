@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import bisect
+from collections.abc import Hashable, Sequence
+from typing import Optional, TypeVar
+
+# Markers are ordered by a sparse integer key (Marker.order_index): new keys
+# go halfway into the gap between their neighbours, so inserting or moving a
+# marker rewrites only that marker. Keys start ORDER_GAP apart; when a gap is
+# used up the route is renumbered (inline if there is no room at all, in the
+# background once gaps get small). Keys are never negative; negative values
+# are only used transiently while renumbering under the unique constraint.
+
+ORDER_GAP = 1024
+# Below this, schedule a background compaction.
+ORDER_MIN_GAP = 16
+
+K = TypeVar("K", bound=Hashable)
+
+
+def spaced_keys(count: int) -> list[int]:
+    return [(i + 1) * ORDER_GAP for i in range(count)]
+
+
+def next_key(last: Optional[int]) -> int:
+    """Key after the current last one (or the first key of an empty list).
+
+    The first key is ORDER_GAP rather than 0 to leave room in front of it.
+    """
+    return ORDER_GAP if last is None else (last // ORDER_GAP + 1) * ORDER_GAP
+
+
+def key_between(lo: Optional[int], hi: Optional[int]) -> Optional[int]:
+    """A key strictly between `lo` and `hi` (None = open end), or None if there is no room."""
+    if hi is None:
+        return next_key(lo)
+    lo = -1 if lo is None else lo
+    if hi - lo < 2:
+        return None
+    return (lo + hi) // 2
+
+
+def _increasing_subset(seq: Sequence[K], keys: dict[K, int]) -> set[K]:
+    """Largest set of items in `seq` whose existing keys are already in order."""
+    candidates = [item for item in seq if item in keys]
+    tails: list[int] = []  # smallest tail key of an increasing run of each length
+    tail_idx: list[int] = []
+    prev: list[int] = [-1] * len(candidates)
+    for i, item in enumerate(candidates):
+        pos = bisect.bisect_left(tails, keys[item])
+        if pos == len(tails):
+            tails.append(keys[item])
+            tail_idx.append(i)
+        else:
+            tails[pos] = keys[item]
+            tail_idx[pos] = i
+        prev[i] = tail_idx[pos - 1] if pos else -1
+    kept: set[K] = set()
+    i = tail_idx[-1] if tail_idx else -1
+    while i >= 0:
+        kept.add(candidates[i])
+        i = prev[i]
+    return kept
+
+
+def assign_keys(seq: Sequence[K], keys: dict[K, int]) -> Optional[dict[K, int]]:
+    """Keys for `seq` (the desired order) that reuse as many of `keys` as possible.
+
+    Items without a key, or whose key is out of order, get new keys spread
+    evenly over the gap they land in. Returns None when some gap is too small;
+    the caller then renumbers everything with `spaced_keys`.
+    """
+    fixed = _increasing_subset(seq, keys)
+    result: dict[K, int] = {}
+    run: list[K] = []
+    lo = -1
+    for item in [*seq, None]:
+        if item is not None and item not in fixed:
+            run.append(item)
+            continue
+        if item is None:
+            # Open-ended tail: step by the full gap.
+            last = lo if lo >= 0 else None
+            for pending in run:
+                last = result[pending] = next_key(last)
+            break
+        hi = keys[item]
+        if run:
+            if hi - lo - 1 < len(run):
+                return None
+            step = (hi - lo) / (len(run) + 1)
+            for j, pending in enumerate(run):
+                result[pending] = int(lo + step * (j + 1))
+            run = []
+        result[item] = hi
+        lo = hi
+    return result
+
+
+def min_gap(keys: Sequence[int]) -> Optional[int]:
+    """Smallest difference between consecutive sorted keys (None for < 2 keys)."""
+    ordered = sorted(keys)
+    if len(ordered) < 2:
+        return None
+    return min(b - a for a, b in zip(ordered, ordered[1:]))
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import base64
+import uuid
+from datetime import datetime
+
+# Keyset pagination over (created_at, id). Cursors are opaque to clients: they
+# are the URL-safe base64 of "<created_at iso>|<id>" of the last row served.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: str, id: str) -> str:
+    """Build the cursor for the row after `(created_at, id)` (as serialized)."""
+    raw = f"{created_at}|{id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_s, id_s = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_s), uuid.UUID(id_s)
+    except Exception:
+        raise ValueError("Invalid cursor")
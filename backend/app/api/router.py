@@ -3,10 +3,20 @@ from __future__ import annotations
 from fastapi import APIRouter
 
 from app.api.auth import router as auth_router
+from app.api.exports import router as exports_router
 from app.api.health import router as health_router
+from app.api.imports import router as imports_router
 from app.api.routes import router as routes_router
+from app.api.shares import router as shares_router
+from app.api.tiles import router as tiles_router
 
 api_router = APIRouter()
 api_router.include_router(health_router, tags=["health"])
 api_router.include_router(auth_router, tags=["auth"])
+# Before routes_router so /routes/import, /routes/export and /routes/share/...
+# aren't taken for a route id.
+api_router.include_router(imports_router)
+api_router.include_router(exports_router)
+api_router.include_router(shares_router)
 api_router.include_router(routes_router)
+api_router.include_router(tiles_router, tags=["tiles"])
@@ -4,23 +4,64 @@ import json
 import uuid
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import func
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.conditional import is_not_modified, make_etag, not_modified, validator_headers, variant
+from app.api.cache import CachedResponse, response_cache, route_tag, user_tag
+from app.api.negotiation import JSON_MEDIA_TYPE, negotiate
+from app.api.ordering import ORDER_GAP, ORDER_MIN_GAP, assign_keys, key_between, min_gap, next_key, spaced_keys
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.api.serializers import (
+    BINARY_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    POLYLINE_MEDIA_TYPE,
+    MarkerOut,
+    RawJSONResponse,
+    RouteOut,
+    RouteRecord,
+    RouteSummaryOut,
+    iter_routes_ndjson,
+    load_route_records,
+    lod_geojson,
+    refresh_lods,
+    polyline_route,
+    route_json,
+    route_out,
+    route_records,
+    route_rows_query,
+    routes_binary,
+    routes_json,
+    serialize_marker,
+    serialize_route_json,
+    serialize_route_markers,
+)
+from app.auth.cache import CurrentUser
 from app.auth.deps import get_current_user
 from app.auth.deps import get_optional_user
-from app.auth.models import User
 from app.core.rate_limit import limiter, RateLimits
 from app.db import get_db
-from app.geo.geojson import linestring_wkt_from_geojson, point_wkt_from_geojson
+from app.db.session import AsyncSessionLocal
+from app.geo.encoding import MAX_BINARY_PRECISION
+from app.geo.geojson import ewkb_linestring, linestring_coords_from_geojson, point_wkb_from_geojson
+from app.geo.kernel import bbox as array_bbox, total_distance_km
+from app.geo.tiles import BBox, bbox_of_coordinates, invalidate_tiles
 from app.models.route import Route
 from app.models.marker import Marker
 
 router = APIRouter(prefix="/routes")
 
+ROUTES_PAGE_MAX = 200
+MARKER_BATCH_MAX = 500
+
+POLYLINE_PRECISIONS = (5, 6)
+ENCODED_MEDIA_TYPES = (POLYLINE_MEDIA_TYPE, BINARY_MEDIA_TYPE)
+ENCODED_RESPONSES = {200: {"content": {t: {} for t in ENCODED_MEDIA_TYPES}}}
+
 
 class RouteCreateRequest(BaseModel):
     title: str = Field(min_length=1, max_length=255)
@@ -36,152 +77,353 @@ class RouteUpdateRequest(BaseModel):
     is_public: Optional[bool] = None
 
 
-class MarkerCreateRequest(BaseModel):
+class _MarkerCreateFields(BaseModel):
     geometry: dict  # GeoJSON Point
     label: Optional[str] = Field(None, max_length=100)
     description: Optional[str] = None
     icon_type: str = Field(default="default", max_length=50)
-    order_index: Optional[int] = None  # if omitted, append to end
 
 
-class MarkerUpdateRequest(BaseModel):
+class _MarkerUpdateFields(BaseModel):
     geometry: Optional[dict] = None  # GeoJSON Point
     label: Optional[str] = Field(None, max_length=100)
     description: Optional[str] = None
     icon_type: Optional[str] = Field(None, max_length=50)
-    order_index: Optional[int] = None
-
-
-class MarkerOut(BaseModel):
-    id: str
-    geometry: dict
-    label: Optional[str]
-    description: Optional[str]
-    icon_type: str
-    order_index: int
-
-
-class RouteOut(BaseModel):
-    id: str
-    title: str
-    description: Optional[str]
-    geometry: dict
-    distance_km: float
-    is_public: bool
-    created_at: str
-    updated_at: str
-    markers: list[MarkerOut]
-
-    class Config:
-        from_attributes = True
-
-
-def _haversine_km(a: list[float], b: list[float]) -> float:
-    # a/b are [lon, lat]
-    import math
-
-    R = 6371.0
-    lon1, lat1 = math.radians(a[0]), math.radians(a[1])
-    lon2, lat2 = math.radians(b[0]), math.radians(b[1])
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-    return 2 * R * math.asin(min(1.0, math.sqrt(h)))
-
-
-def _distance_km_from_linestring_geojson(geometry: dict) -> float:
-    coords = geometry.get("coordinates")
-    if not (isinstance(coords, list) and len(coords) >= 2):
-        return 0.0
-    total = 0.0
-    for i in range(1, len(coords)):
-        a = coords[i - 1]
-        b = coords[i]
-        if not (isinstance(a, list) and isinstance(b, list) and len(a) == 2 and len(b) == 2):
-            continue
-        try:
-            total += _haversine_km([float(a[0]), float(a[1])], [float(b[0]), float(b[1])])
-        except Exception:
-            continue
-    return float(total)
 
 
-async def _geojson_for_route(db: AsyncSession, route_id: uuid.UUID) -> dict:
-    geojson_str = await db.scalar(
-        select(func.ST_AsGeoJSON(Route.geometry)).where(Route.id == route_id)
+class MarkerCreateRequest(_MarkerCreateFields):
+    order_index: Optional[int] = Field(None, ge=0)  # sort key; if omitted, append to end
+
+
+class MarkerUpdateRequest(_MarkerUpdateFields):
+    order_index: Optional[int] = Field(None, ge=0)
+
+
+class MarkerBatchCreate(_MarkerCreateFields):
+    id: Optional[uuid.UUID] = None  # client-chosen, so `order` can refer to it
+    position: Optional[int] = Field(
+        None, ge=0, description="Index in the route's final marker list; appended if omitted."
     )
-    if not geojson_str:
-        return {"type": "LineString", "coordinates": []}
-    return json.loads(geojson_str)
 
 
-async def _marker_rows_with_geojson(db: AsyncSession, route_id: uuid.UUID) -> list[tuple[Marker, str | None]]:
-    rows = (
+class MarkerBatchUpdate(_MarkerUpdateFields):
+    id: uuid.UUID
+    position: Optional[int] = Field(
+        None, ge=0, description="Index in the route's final marker list; unchanged if omitted."
+    )
+
+
+class MarkerMoveRequest(BaseModel):
+    # Exactly one: the marker to move in front of, or behind.
+    before: Optional[uuid.UUID] = None
+    after: Optional[uuid.UUID] = None
+
+
+class MarkerBatchRequest(BaseModel):
+    create: list[MarkerBatchCreate] = Field(default_factory=list, max_length=MARKER_BATCH_MAX)
+    update: list[MarkerBatchUpdate] = Field(default_factory=list, max_length=MARKER_BATCH_MAX)
+    delete: list[uuid.UUID] = Field(default_factory=list, max_length=MARKER_BATCH_MAX)
+    # Final order of every marker on the route; overrides positions above.
+    order: Optional[list[uuid.UUID]] = Field(None, max_length=MARKER_BATCH_MAX)
+
+
+async def _extent(db: AsyncSession, geometry, *criteria) -> Optional[BBox]:
+    ext = func.ST_Extent(geometry)
+    row = (
         await db.execute(
-            select(Marker, func.ST_AsGeoJSON(Marker.geometry))
-            .where(Marker.route_id == route_id)
-            .order_by(Marker.order_index.asc())
-        )
-    ).all()
-    return [(m, gj) for (m, gj) in rows]
-
-
-async def _serialize_route(db: AsyncSession, route: Route) -> RouteOut:
-    geometry = await _geojson_for_route(db, route.id)
-    marker_rows = await _marker_rows_with_geojson(db, route.id)
-    markers: list[MarkerOut] = []
-    for m, gj in marker_rows:
-        mg = json.loads(gj) if gj else {"type": "Point", "coordinates": [0, 0]}
-        markers.append(
-            MarkerOut(
-                id=str(m.id),
-                geometry=mg,
-                label=m.label,
-                description=m.description,
-                icon_type=m.icon_type,
-                order_index=m.order_index,
-            )
+            select(func.ST_XMin(ext), func.ST_YMin(ext), func.ST_XMax(ext), func.ST_YMax(ext)).where(*criteria)
         )
+    ).one()
+    return None if row[0] is None else (float(row[0]), float(row[1]), float(row[2]), float(row[3]))
+
+
+async def _tile_extents(db: AsyncSession, route_id: uuid.UUID) -> list[Optional[BBox]]:
+    """Areas a public route currently covers on the vector tile layers."""
+    return [
+        await _extent(db, Route.geometry, Route.id == route_id),
+        await _extent(db, Marker.geometry, Marker.route_id == route_id),
+    ]
 
-    return RouteOut(
-        id=str(route.id),
-        title=route.title,
-        description=route.description,
-        geometry=geometry,
-        distance_km=float(route.distance_km),
-        is_public=bool(route.is_public),
-        created_at=route.created_at.isoformat() if getattr(route, "created_at", None) else "",
-        updated_at=route.updated_at.isoformat() if getattr(route, "updated_at", None) else "",
-        markers=markers,
+
+def _geojson_lod(
+    simplify: Optional[float] = Query(
+        None, gt=0, le=1, description="Douglas-Peucker tolerance in degrees"
+    ),
+    zoom: Optional[int] = Query(
+        None, ge=0, le=22, description="Map zoom the geometry will be drawn at"
+    ),
+):
+    if simplify is not None and zoom is not None:
+        raise HTTPException(status_code=422, detail="Use either simplify or zoom")
+    return lod_geojson(simplify=simplify, zoom=zoom)
+
+
+async def _touch_markers(db: AsyncSession, route_id: uuid.UUID) -> None:
+    """Record a marker change on the route (feeds its ETag / Last-Modified)."""
+    await db.execute(
+        update(Route)
+        .where(Route.id == route_id)
+        # Keep updated_at: it tracks the route's own fields.
+        .values(markers_updated_at=func.now(), updated_at=Route.updated_at)
     )
 
 
-async def _serialize_marker(db: AsyncSession, marker: Marker) -> MarkerOut:
-    geojson_str = await db.scalar(select(func.ST_AsGeoJSON(Marker.geometry)).where(Marker.id == marker.id))
-    mg = json.loads(geojson_str) if geojson_str else {"type": "Point", "coordinates": [0, 0]}
-    return MarkerOut(
-        id=str(marker.id),
-        geometry=mg,
-        label=marker.label,
-        description=marker.description,
-        icon_type=marker.icon_type,
-        order_index=marker.order_index,
+async def _marker_keys(db: AsyncSession, route_id: uuid.UUID) -> dict[uuid.UUID, int]:
+    """The route's marker ids -> order_index, in order."""
+    rows = await db.execute(
+        select(Marker.id, Marker.order_index).where(Marker.route_id == route_id).order_by(Marker.order_index)
     )
+    return dict(rows.all())
+
 
+async def _write_keys(db: AsyncSession, current: dict[uuid.UUID, int], final: dict[uuid.UUID, int]) -> list[uuid.UUID]:
+    """Park the markers whose key changes from `current` to `final`; return their ids.
 
-@router.get("", response_model=list[RouteOut])
+    Parked rows go below every current and final key (and below 0, as rows
+    written before keys were validated may be negative), so no intermediate
+    state violates uq_markers_route_order_index. The caller writes the final
+    keys.
+    """
+    changed = [marker_id for marker_id, key in current.items() if marker_id in final and final[marker_id] != key]
+    if changed:
+        floor = min(0, *current.values(), *final.values())
+        await db.execute(
+            update(Marker), [{"id": marker_id, "order_index": floor - 1 - i} for i, marker_id in enumerate(changed)]
+        )
+    return changed
+
+
+async def _compact_markers(db: AsyncSession, route_id: uuid.UUID) -> None:
+    """Renumber the route's markers ORDER_GAP apart. The caller holds the route lock."""
+    current = await _marker_keys(db, route_id)
+    final = dict(zip(current, spaced_keys(len(current))))
+    changed = await _write_keys(db, current, final)
+    if changed:
+        await db.execute(update(Marker), [{"id": marker_id, "order_index": final[marker_id]} for marker_id in changed])
+
+
+async def compact_route_markers(route_id: uuid.UUID) -> None:
+    """Background task: renumber a route whose marker keys are getting crowded."""
+    async with AsyncSessionLocal() as db:
+        route = (
+            await db.execute(
+                select(Route.user_id, Route.is_public).where(Route.id == route_id).with_for_update()
+            )
+        ).first()
+        if route is None:
+            return
+        # Another request may have compacted (or deleted the crowded markers) meanwhile.
+        if (min_gap(list((await _marker_keys(db, route_id)).values())) or ORDER_GAP) >= ORDER_MIN_GAP:
+            await db.rollback()
+            return
+        await _compact_markers(db, route_id)
+        await _touch_markers(db, route_id)
+        await db.commit()
+        extent = await _extent(db, Marker.geometry, Marker.route_id == route_id) if route.is_public else None
+    await response_cache.invalidate(route_tag(route_id), user_tag(route.user_id))
+    if route.is_public:
+        # Tiles carry order_index.
+        invalidate_tiles(extent, layers=("markers",))
+
+
+async def _ndjson_stream(db: AsyncSession, criteria: list, order_by: list, limit: int | None, geojson):
+    # The stream outlives the handler, so it owns closing the session.
+    try:
+        async for line in iter_routes_ndjson(db, *criteria, order_by=order_by, limit=limit, geojson=geojson):
+            yield line
+    finally:
+        await db.close()
+
+
+def _render_routes(
+    records: list[RouteRecord],
+    choice: Optional[tuple[str, dict[str, str]]],
+    precision: Optional[int],
+    single: bool = False,
+) -> CachedResponse:
+    """Serialize routes as JSON, encoded polylines or a BRGB buffer (see app.geo.encoding).
+
+    `choice` is the negotiated (media type, params), None for plain JSON.
+    `precision` comes from the query string, else the Accept `precision` param.
+    Plain JSON splices the GeoJSON text from PostGIS; only the compact
+    encodings parse it.
+    """
+    if choice is None:
+        return CachedResponse(JSON_MEDIA_TYPE, route_json(records[0]) if single else routes_json(records), {})
+    routes = [route_out(r) for r in records]
+
+    media_type, params = choice
+    if precision is None and "precision" in params:
+        try:
+            precision = int(params["precision"])
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid precision")
+    if media_type == BINARY_MEDIA_TYPE:
+        precision = MAX_BINARY_PRECISION if precision is None else precision
+        if not 0 <= precision <= MAX_BINARY_PRECISION:
+            raise HTTPException(status_code=422, detail="Unsupported precision")
+        return CachedResponse(media_type, routes_binary(routes, precision), {})
+
+    precision = POLYLINE_PRECISIONS[0] if precision is None else precision
+    if precision not in POLYLINE_PRECISIONS:
+        raise HTTPException(status_code=422, detail="Unsupported precision")
+    encoded = [polyline_route(r, precision).model_dump(mode="json") for r in routes]
+    body = json.dumps(encoded[0] if single else encoded, separators=(",", ":")).encode()
+    return CachedResponse(media_type, body, {})
+
+
+@router.get(
+    "",
+    response_model=list[RouteOut],
+    responses={200: {"content": {t: {} for t in (NDJSON_MEDIA_TYPE, *ENCODED_MEDIA_TYPES)}}},
+)
 @limiter.limit(RateLimits.ROUTES_LIST)
 async def list_routes(
     request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=ROUTES_PAGE_MAX),
+    cursor: Optional[str] = None,
+    precision: Optional[int] = Query(None, ge=0),
+    geojson=Depends(_geojson_lod),
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    """List routes for current user, newest first.
+
+    Without `limit` every route is returned. With `limit` the list is
+    keyset-paginated on (created_at, id) and the `X-Next-Cursor` header carries
+    the `cursor` for the next page. `Accept: application/x-ndjson` streams one
+    route per line instead of building the whole array (paged the same way);
+    the polyline and binary media types return compact geometry encodings.
+    `zoom` or `simplify` return a simplified line for overview maps.
+
+    Responses carry an ETag; `If-None-Match` gets a 304 after one aggregate
+    query when none of the listed routes or their markers changed.
+    """
+    criteria = [Route.user_id == user.id]
+    if cursor is not None:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        criteria.append(tuple_(Route.created_at, Route.id) < tuple_(created_at, last_id))
+    order_by = [Route.created_at.desc(), Route.id.desc()]
+
+    choice = negotiate(request, (NDJSON_MEDIA_TYPE, *ENCODED_MEDIA_TYPES))
+    if choice is not None and choice[0] == NDJSON_MEDIA_TYPE:
+        headers = {}
+        if limit is not None:
+            # Headers go out before the first line, so look up the page's last
+            # row (and whether another follows) on the keyset index first.
+            edge = (
+                await db.execute(
+                    select(Route.created_at, Route.id).where(*criteria).order_by(*order_by).offset(limit - 1).limit(2)
+                )
+            ).all()
+            if len(edge) > 1:
+                headers[NEXT_CURSOR_HEADER] = encode_cursor(edge[0].created_at.isoformat(), str(edge[0].id))
+        return StreamingResponse(
+            _ndjson_stream(db, criteria, order_by, limit, geojson), media_type=NDJSON_MEDIA_TYPE, headers=headers
+        )
+
+    # Any insert, update or delete among the matching routes (or their
+    # markers) changes one of these. No Last-Modified: a delete doesn't move it.
+    count, routes_updated, markers_updated = (
+        await db.execute(
+            select(func.count(), func.max(Route.updated_at), func.max(Route.markers_updated_at)).where(*criteria)
+        )
+    ).one()
+    etag = make_etag(user.id, count, routes_updated, markers_updated, variant(request, choice))
+    headers = validator_headers(etag)
+    if is_not_modified(request, etag):
+        return not_modified(headers)
+
+    cache_key = f"list:{etag}:{user.id}"
+    cached = await response_cache.get(cache_key)
+    if cached is None:
+        records = await load_route_records(
+            db,
+            *criteria,
+            order_by=order_by,
+            limit=limit + 1 if limit is not None else None,
+            geojson=geojson,
+        )
+        cached = _render_routes(records[:limit] if limit is not None else records, choice, precision)
+        if limit is not None and len(records) > limit:
+            last = records[limit - 1].route
+            cached.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at.isoformat(), str(last.id))
+        await response_cache.set(cache_key, cached, [user_tag(user.id)])
+    return Response(cached.body, media_type=cached.media_type, headers={**cached.headers, **headers})
+
+
+def _parse_bbox(raw: str) -> tuple[float, float, float, float]:
+    parts = raw.split(",")
+    if len(parts) != 4:
+        raise ValueError("bbox must be minx,miny,maxx,maxy")
+    try:
+        minx, miny, maxx, maxy = (float(p) for p in parts)
+    except ValueError:
+        raise ValueError("bbox must be minx,miny,maxx,maxy")
+    if not (-180.0 <= minx <= maxx <= 180.0 and -90.0 <= miny <= maxy <= 90.0):
+        raise ValueError("bbox out of range")
+    return minx, miny, maxx, maxy
+
+
+@router.get("/search", response_model=list[RouteSummaryOut])
+@limiter.limit(RateLimits.ROUTES_LIST)
+async def search_routes(
+    request: Request,
+    bbox: str = Query(..., description="minx,miny,maxx,maxy in EPSG:4326"),
+    limit: int = Query(50, ge=1, le=ROUTES_PAGE_MAX),
+    min_distance_km: Optional[float] = Query(None, ge=0),
+    max_distance_km: Optional[float] = Query(None, ge=0),
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
 ):
-    """List routes for current user."""
-    result = await db.execute(
-        select(Route).where(Route.user_id == user.id).order_by(Route.created_at.desc())
+    """Find public routes intersecting a viewport.
+
+    `&&` lets the planner use `ix_routes_geometry_gist`; `ST_Intersects` then
+    drops routes whose bounding box overlaps but whose line does not.
+    """
+    try:
+        minx, miny, maxx, maxy = _parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    envelope = func.ST_MakeEnvelope(minx, miny, maxx, maxy, 4326)
+    query = (
+        select(
+            Route.id,
+            Route.title,
+            Route.distance_km,
+            Route.updated_at,
+            func.ST_XMin(Route.geometry),
+            func.ST_YMin(Route.geometry),
+            func.ST_XMax(Route.geometry),
+            func.ST_YMax(Route.geometry),
+        )
+        .where(
+            Route.is_public == True,  # noqa: E712  (matches ix_routes_public_true)
+            Route.geometry.op("&&")(envelope),
+            func.ST_Intersects(Route.geometry, envelope),
+        )
+        .order_by(Route.updated_at.desc())
+        .limit(limit)
     )
-    routes = result.scalars().all()
-    return [await _serialize_route(db, r) for r in routes]
+    if min_distance_km is not None:
+        query = query.where(Route.distance_km >= min_distance_km)
+    if max_distance_km is not None:
+        query = query.where(Route.distance_km <= max_distance_km)
+
+    rows = await db.execute(query)
+    return [
+        RouteSummaryOut(
+            id=str(rid),
+            title=title,
+            distance_km=float(distance_km),
+            bbox=[float(x0), float(y0), float(x1), float(y1)],
+            updated_at=updated_at.isoformat() if updated_at else "",
+        )
+        for rid, title, distance_km, updated_at, x0, y0, x1, y1 in rows
+    ]
 
 
 @router.post("", response_model=RouteOut, status_code=status.HTTP_201_CREATED)
@@ -190,40 +432,56 @@ async def create_route(
     request: Request,
     payload: RouteCreateRequest,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     """Create a new route."""
     try:
-        geom = linestring_wkt_from_geojson(payload.geometry)
+        coords = linestring_coords_from_geojson(payload.geometry)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
-    distance_km = _distance_km_from_linestring_geojson(payload.geometry)
     route = Route(
         user_id=user.id,
         title=payload.title,
         description=payload.description,
-        geometry=geom,
+        geometry=ewkb_linestring(coords),
         is_public=payload.is_public,
-        distance_km=distance_km,
+        distance_km=total_distance_km(coords),
     )
     db.add(route)
+    await db.flush()
+    await refresh_lods(db, route.id)
     await db.commit()
-    await db.refresh(route)
-    return await _serialize_route(db, route)
+    await response_cache.invalidate(user_tag(user.id))
+    if route.is_public:
+        invalidate_tiles(array_bbox(coords), layers=("routes",))
+    return RawJSONResponse(await serialize_route_json(db, route), status_code=status.HTTP_201_CREATED)
 
 
-@router.get("/{route_id}", response_model=RouteOut)
+@router.get("/{route_id}", response_model=RouteOut, responses=ENCODED_RESPONSES)
 @limiter.limit(RateLimits.ROUTE_DETAIL)
 async def get_route(
     request: Request,
     route_id: str,
+    precision: Optional[int] = Query(None, ge=0),
+    geojson=Depends(_geojson_lod),
     db: AsyncSession = Depends(get_db),
-    user: User | None = Depends(get_optional_user)
+    user: CurrentUser | None = Depends(get_optional_user)
 ):
-    """Get route details."""
+    """Get route details (optionally simplified with `zoom` or `simplify`).
+
+    The polyline and binary media types in `Accept` return compact geometry
+    encodings instead of GeoJSON. `If-None-Match` / `If-Modified-Since` get a
+    304 from a metadata-only query.
+    """
     rid = uuid.UUID(route_id)
-    route = await db.get(Route, rid)
+    route = (
+        await db.execute(
+            select(Route.user_id, Route.is_public, Route.updated_at, Route.markers_updated_at).where(
+                Route.id == rid
+            )
+        )
+    ).first()
 
     # Unauthenticated users can only access public routes; otherwise respond 401
     # to avoid leaking route existence.
@@ -234,16 +492,27 @@ async def get_route(
                 detail="Missing authorization header",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return await _serialize_route(db, route)
-
-    if not route:
+    elif not route or (route.user_id != user.id and not route.is_public):
+        # Check ownership or public access
         raise HTTPException(status_code=404, detail="route_not_found")
 
-    # Check ownership or public access
-    if route.user_id != user.id and not route.is_public:
-        raise HTTPException(status_code=404, detail="route_not_found")
-
-    return await _serialize_route(db, route)
+    choice = negotiate(request, ENCODED_MEDIA_TYPES)
+    last_modified = max(route.updated_at, route.markers_updated_at)
+    etag = make_etag(rid, route.updated_at, route.markers_updated_at, variant(request, choice))
+    headers = validator_headers(etag, last_modified, private=not route.is_public)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(headers)
+
+    # Access is settled above; private entries are additionally scoped to the owner.
+    cache_key = f"route:{etag}:{'public' if route.is_public else route.user_id}"
+    cached = await response_cache.get(cache_key)
+    if cached is None:
+        row = (await db.execute(route_rows_query(Route.id == rid, geojson=geojson))).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="route_not_found")
+        cached = _render_routes(await route_records(db, [row]), choice, precision, single=True)
+        await response_cache.set(cache_key, cached, [route_tag(rid), user_tag(route.user_id)])
+    return Response(cached.body, media_type=cached.media_type, headers={**cached.headers, **headers})
 
 
 @router.put("/{route_id}", response_model=RouteOut)
@@ -253,30 +522,40 @@ async def update_route(
     route_id: str,
     payload: RouteUpdateRequest,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     """Update a route."""
     route = await db.get(Route, uuid.UUID(route_id))
     
     if not route or route.user_id != user.id:
         raise HTTPException(status_code=404, detail="route_not_found")
+
+    tile_extents = await _tile_extents(db, route.id) if route.is_public or payload.is_public else []
     
     if payload.title is not None:
         route.title = payload.title
     if payload.description is not None:
         route.description = payload.description
+    coords = None
     if payload.geometry is not None:
         try:
-            route.geometry = linestring_wkt_from_geojson(payload.geometry)
+            coords = linestring_coords_from_geojson(payload.geometry)
         except ValueError as e:
             raise HTTPException(status_code=422, detail=str(e))
-        route.distance_km = _distance_km_from_linestring_geojson(payload.geometry)
+        route.geometry = ewkb_linestring(coords)
+        route.distance_km = total_distance_km(coords)
     if payload.is_public is not None:
         route.is_public = payload.is_public
-    
+
+    if payload.geometry is not None:
+        await db.flush()
+        await refresh_lods(db, route.id)
     await db.commit()
-    await db.refresh(route)
-    return await _serialize_route(db, route)
+    await response_cache.invalidate(route_tag(route.id), user_tag(user.id))
+    if tile_extents and coords is not None:
+        tile_extents.append(array_bbox(coords))
+    invalidate_tiles(*tile_extents)
+    return RawJSONResponse(await serialize_route_json(db, route))
 
 
 @router.delete("/{route_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -285,19 +564,207 @@ async def delete_route(
     request: Request,
     route_id: str,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     """Delete a route."""
     route = await db.get(Route, uuid.UUID(route_id))
     
     if not route or route.user_id != user.id:
         raise HTTPException(status_code=404, detail="route_not_found")
+
+    tile_extents = await _tile_extents(db, route.id) if route.is_public else []
     
     await db.delete(route)
     await db.commit()
+    await response_cache.invalidate(route_tag(route.id), user_tag(user.id))
+    invalidate_tiles(*tile_extents)
     return None
 
 
+_MARKER_FIELDS = ("geometry", "label", "description", "icon_type")
+
+
+def _marker_values(payload: _MarkerCreateFields | _MarkerUpdateFields) -> dict:
+    """Column values for the fields set in `payload` (None means unchanged)."""
+    values = {f: getattr(payload, f) for f in _MARKER_FIELDS if getattr(payload, f) is not None}
+    if "geometry" in values:
+        try:
+            values["geometry"] = point_wkb_from_geojson(values["geometry"])
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    return values
+
+
+def _place(seq: list[uuid.UUID], marker_id: uuid.UUID, position: Optional[int]) -> None:
+    if position is None:
+        seq.append(marker_id)
+    else:
+        seq.insert(max(0, position), marker_id)
+
+
+@router.patch("/{route_id}/markers", response_model=list[MarkerOut])
+@limiter.limit(RateLimits.UPDATE)
+async def batch_markers(
+    request: Request,
+    route_id: str,
+    payload: MarkerBatchRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Create, update, delete and reorder markers in one transaction.
+
+    Positions (`position` or `order`) are resolved against the final list.
+    Markers that stay in relative order keep their keys; the others get keys
+    from the gaps they land in. Returns the route's ordered markers.
+    """
+    rid = uuid.UUID(route_id)
+    # Lock the route row: concurrent batches on one route would race on order_index.
+    route = (
+        await db.execute(select(Route.user_id, Route.is_public).where(Route.id == rid).with_for_update())
+    ).first()
+    if not route or route.user_id != user.id:
+        raise HTTPException(status_code=404, detail="route_not_found")
+
+    current = await _marker_keys(db, rid)
+    touched = [u.id for u in payload.update] + list(payload.delete)
+    if len(set(touched)) != len(touched):
+        raise HTTPException(status_code=422, detail="Each marker may appear in one update or delete")
+    if any(marker_id not in current for marker_id in touched):
+        raise HTTPException(status_code=404, detail="marker_not_found")
+
+    new_ids = [c.id or uuid.uuid4() for c in payload.create]
+    if len(set(new_ids)) != len(new_ids) or any(marker_id in current for marker_id in new_ids):
+        raise HTTPException(status_code=422, detail="Duplicate marker id")
+
+    # Resolve the final order.
+    deleted = set(payload.delete)
+    moved = {u.id for u in payload.update if u.position is not None}
+    seq = [marker_id for marker_id in current if marker_id not in deleted and marker_id not in moved]
+    for u in payload.update:
+        if u.position is not None:
+            _place(seq, u.id, u.position)
+    for marker_id, c in zip(new_ids, payload.create):
+        _place(seq, marker_id, c.position)
+    if payload.order is not None:
+        if len(payload.order) != len(seq) or set(payload.order) != set(seq):
+            raise HTTPException(status_code=422, detail="order must list every marker of the route exactly once")
+        seq = list(payload.order)
+    final = assign_keys(seq, {marker_id: current[marker_id] for marker_id in seq if marker_id in current})
+    if final is None:
+        final = dict(zip(seq, spaced_keys(len(seq))))
+
+    rows = {u.id: _marker_values(u) for u in payload.update}
+    new_rows = [
+        {
+            **_marker_values(c),
+            "id": marker_id,
+            "route_id": rid,
+            "order_index": final[marker_id],
+        }
+        for marker_id, c in zip(new_ids, payload.create)
+    ]
+
+    tile_extents = [await _extent(db, Marker.geometry, Marker.route_id == rid)] if route.is_public else []
+
+    if deleted:
+        await db.execute(delete(Marker).where(Marker.id.in_(deleted)))
+    for marker_id in await _write_keys(db, current, final):
+        rows.setdefault(marker_id, {})["order_index"] = final[marker_id]
+    updates = [{"id": marker_id, **values} for marker_id, values in rows.items() if values]
+    if updates:
+        # ORM bulk UPDATE by primary key: one executemany per distinct column set.
+        await db.execute(update(Marker), updates)
+    if new_rows:
+        await db.execute(insert(Marker), new_rows)
+    await _touch_markers(db, rid)
+    await db.commit()
+
+    await response_cache.invalidate(route_tag(rid), user_tag(user.id))
+    if route.is_public:
+        tile_extents.append(await _extent(db, Marker.geometry, Marker.route_id == rid))
+        invalidate_tiles(*tile_extents, layers=("markers",))
+    if (min_gap(list(final.values())) or ORDER_GAP) < ORDER_MIN_GAP:
+        background_tasks.add_task(compact_route_markers, rid)
+    return await serialize_route_markers(db, rid)
+
+
+async def _move_bounds(
+    db: AsyncSession, route_id: uuid.UUID, marker_id: uuid.UUID, anchor_id: uuid.UUID, before: bool
+) -> tuple[Optional[int], Optional[int]]:
+    """Keys of the markers the moved one will sit between (None = route end)."""
+    anchor = await db.scalar(
+        select(Marker.order_index).where(Marker.id == anchor_id, Marker.route_id == route_id)
+    )
+    if anchor is None:
+        raise HTTPException(status_code=404, detail="marker_not_found")
+    others = (Marker.route_id == route_id, Marker.id != marker_id)
+    if before:
+        return await db.scalar(select(func.max(Marker.order_index)).where(*others, Marker.order_index < anchor)), anchor
+    return anchor, await db.scalar(select(func.min(Marker.order_index)).where(*others, Marker.order_index > anchor))
+
+
+@router.post("/{route_id}/markers/{marker_id}/move", response_model=MarkerOut)
+@limiter.limit(RateLimits.UPDATE)
+async def move_marker(
+    request: Request,
+    route_id: str,
+    marker_id: str,
+    payload: MarkerMoveRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Move a marker directly before or after another marker of the route.
+
+    Only the moved marker's order_index changes; the route is renumbered first
+    only if its new neighbours have adjacent keys.
+    """
+    if (payload.before is None) == (payload.after is None):
+        raise HTTPException(status_code=422, detail="Give exactly one of before or after")
+    rid, mid = uuid.UUID(route_id), uuid.UUID(marker_id)
+    anchor_id = payload.before or payload.after
+    if anchor_id == mid:
+        raise HTTPException(status_code=422, detail="Cannot move a marker relative to itself")
+
+    route = (
+        await db.execute(select(Route.user_id, Route.is_public).where(Route.id == rid).with_for_update())
+    ).first()
+    if not route or route.user_id != user.id:
+        raise HTTPException(status_code=404, detail="route_not_found")
+    key = await db.scalar(select(Marker.order_index).where(Marker.id == mid, Marker.route_id == rid))
+    if key is None:
+        raise HTTPException(status_code=404, detail="marker_not_found")
+
+    lo, hi = await _move_bounds(db, rid, mid, anchor_id, payload.before is not None)
+    moved = not ((lo is None or lo < key) and (hi is None or key < hi))
+    compacted = False
+    tile_extents = []
+    if moved:
+        new_key = key_between(lo, hi)
+        if new_key is None:
+            # No room between the neighbours: renumber inline, then retry.
+            await _compact_markers(db, rid)
+            compacted = True
+            lo, hi = await _move_bounds(db, rid, mid, anchor_id, payload.before is not None)
+            new_key = key_between(lo, hi)
+        await db.execute(update(Marker).where(Marker.id == mid).values(order_index=new_key))
+        await _touch_markers(db, rid)
+        if route.is_public:
+            # Tiles carry order_index.
+            scope = Marker.route_id == rid if compacted else Marker.id == mid
+            tile_extents.append(await _extent(db, Marker.geometry, scope))
+    await db.commit()
+
+    if moved:
+        await response_cache.invalidate(route_tag(rid), user_tag(user.id))
+        invalidate_tiles(*tile_extents, layers=("markers",))
+        if (lo is not None and new_key - lo < ORDER_MIN_GAP) or (hi is not None and hi - new_key < ORDER_MIN_GAP):
+            background_tasks.add_task(compact_route_markers, rid)
+    marker = await db.get(Marker, mid)
+    return await serialize_marker(db, marker)
+
+
 @router.post("/{route_id}/markers", response_model=MarkerOut, status_code=status.HTTP_201_CREATED)
 @limiter.limit(RateLimits.CREATE)
 async def create_marker(
@@ -305,22 +772,19 @@ async def create_marker(
     route_id: str,
     payload: MarkerCreateRequest,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     route = await db.get(Route, uuid.UUID(route_id))
     if not route or route.user_id != user.id:
         raise HTTPException(status_code=404, detail="route_not_found")
 
     try:
-        geom = point_wkt_from_geojson(payload.geometry)
+        geom = point_wkb_from_geojson(payload.geometry)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
     if payload.order_index is None:
-        max_idx = await db.scalar(
-            select(func.coalesce(func.max(Marker.order_index), -1)).where(Marker.route_id == route.id)
-        )
-        order_index = int(max_idx or -1) + 1
+        order_index = next_key(await db.scalar(select(func.max(Marker.order_index)).where(Marker.route_id == route.id)))
     else:
         order_index = int(payload.order_index)
 
@@ -333,9 +797,13 @@ async def create_marker(
         order_index=order_index,
     )
     db.add(marker)
+    await _touch_markers(db, route.id)
     await db.commit()
+    await response_cache.invalidate(route_tag(route.id), user_tag(user.id))
     await db.refresh(marker)
-    return await _serialize_marker(db, marker)
+    if route.is_public:
+        invalidate_tiles(bbox_of_coordinates([payload.geometry["coordinates"]]), layers=("markers",))
+    return await serialize_marker(db, marker)
 
 
 @router.put("/{route_id}/markers/{marker_id}", response_model=MarkerOut)
@@ -346,7 +814,7 @@ async def update_marker(
     marker_id: str,
     payload: MarkerUpdateRequest,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     route = await db.get(Route, uuid.UUID(route_id))
     if not route or route.user_id != user.id:
@@ -356,9 +824,11 @@ async def update_marker(
     if not marker or marker.route_id != route.id:
         raise HTTPException(status_code=404, detail="marker_not_found")
 
+    tile_extents = [await _extent(db, Marker.geometry, Marker.id == marker.id)] if route.is_public else []
+
     if payload.geometry is not None:
         try:
-            marker.geometry = point_wkt_from_geojson(payload.geometry)
+            marker.geometry = point_wkb_from_geojson(payload.geometry)
         except ValueError as e:
             raise HTTPException(status_code=422, detail=str(e))
     if payload.label is not None:
@@ -370,9 +840,14 @@ async def update_marker(
     if payload.order_index is not None:
         marker.order_index = int(payload.order_index)
 
+    await _touch_markers(db, route.id)
     await db.commit()
+    await response_cache.invalidate(route_tag(route.id), user_tag(user.id))
     await db.refresh(marker)
-    return await _serialize_marker(db, marker)
+    if tile_extents and payload.geometry is not None:
+        tile_extents.append(bbox_of_coordinates([payload.geometry["coordinates"]]))
+    invalidate_tiles(*tile_extents, layers=("markers",))
+    return await serialize_marker(db, marker)
 
 
 @router.delete("/{route_id}/markers/{marker_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -382,7 +857,7 @@ async def delete_marker(
     route_id: str,
     marker_id: str,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     route = await db.get(Route, uuid.UUID(route_id))
     if not route or route.user_id != user.id:
@@ -392,6 +867,11 @@ async def delete_marker(
     if not marker or marker.route_id != route.id:
         raise HTTPException(status_code=404, detail="marker_not_found")
 
+    tile_extents = [await _extent(db, Marker.geometry, Marker.id == marker.id)] if route.is_public else []
+
     await db.delete(marker)
+    await _touch_markers(db, route.id)
     await db.commit()
+    await response_cache.invalidate(route_tag(route.id), user_tag(user.id))
+    invalidate_tiles(*tile_extents, layers=("markers",))
     return None
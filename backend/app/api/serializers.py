@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, NamedTuple, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import Select, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.geo.encoding import BinaryMarker, BinaryRoute, encode_binary, encode_polyline
+from app.geo.lod import LOD_BANDS, SIMPLIFY_DECIMALS, band_for_zoom, pixel_tolerance_deg
+from app.models.marker import Marker
+from app.models.route import Route
+
+
+class MarkerOut(BaseModel):
+    id: str
+    geometry: dict
+    label: Optional[str]
+    description: Optional[str]
+    icon_type: str
+    order_index: int
+
+
+class RouteOut(BaseModel):
+    id: str
+    title: str
+    description: Optional[str]
+    geometry: dict
+    distance_km: float
+    is_public: bool
+    created_at: str
+    updated_at: str
+    markers: list[MarkerOut]
+
+    class Config:
+        from_attributes = True
+
+
+class RouteSummaryOut(BaseModel):
+    id: str
+    title: str
+    distance_km: float
+    bbox: list[float]  # [minx, miny, maxx, maxy]
+    updated_at: str
+
+
+RouteRow = tuple[Route, Optional[str]]
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+POLYLINE_MEDIA_TYPE = "application/vnd.bikeroutes.polyline+json"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+
+def lod_geojson(simplify: float | None = None, zoom: int | None = None) -> Any:
+    """GeoJSON expression for the route line at the requested level of detail.
+
+    `zoom` picks the precomputed band covering that zoom (full resolution above
+    the last band); `simplify` runs Douglas-Peucker with that tolerance, in
+    degrees, on the fly.
+    """
+    if zoom is not None:
+        band = band_for_zoom(zoom)
+        if band is not None:
+            geom = func.coalesce(getattr(Route, band.column), Route.geometry)
+            return func.ST_AsGeoJSON(geom, band.decimals)
+    elif simplify is not None:
+        return func.ST_AsGeoJSON(func.ST_Simplify(Route.geometry, simplify, True), SIMPLIFY_DECIMALS)
+    return func.ST_AsGeoJSON(Route.geometry)
+
+
+async def refresh_lods(db: AsyncSession, *route_ids: uuid.UUID) -> None:
+    """Recompute the simplified geometry bands from the stored lines."""
+    await db.execute(
+        update(Route)
+        .where(Route.id.in_(route_ids))
+        .values(
+            {
+                band.column: func.ST_Simplify(Route.geometry, pixel_tolerance_deg(band.max_zoom), True)
+                for band in LOD_BANDS
+            }
+        )
+    )
+
+
+def route_rows_query(*criteria: Any, geojson: Any = None) -> Select:
+    """Select routes together with their GeoJSON in a single round trip."""
+    if geojson is None:
+        geojson = lod_geojson()
+    return select(Route, geojson).where(*criteria)
+
+
+MarkerRow = tuple[Marker, Optional[str]]
+
+_EMPTY_LINE = '{"type":"LineString","coordinates":[]}'
+_EMPTY_POINT = '{"type":"Point","coordinates":[0,0]}'
+
+# Same output as the models' model_dump_json for the text fields.
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class RouteRecord(NamedTuple):
+    """A route with its GeoJSON text and marker rows, before rendering.
+
+    `route_json` splices the GeoJSON text from PostGIS into the body as is;
+    `route_out` parses it for the encodings that need the coordinates.
+    """
+
+    route: Route
+    geojson: Optional[str]
+    markers: list[MarkerRow]
+
+
+def _marker_out(marker: Marker, geojson_str: str | None) -> MarkerOut:
+    return MarkerOut(
+        id=str(marker.id),
+        geometry=json.loads(geojson_str or _EMPTY_POINT),
+        label=marker.label,
+        description=marker.description,
+        icon_type=marker.icon_type,
+        order_index=marker.order_index,
+    )
+
+
+def _timestamp(route: Route, name: str) -> str:
+    value = getattr(route, name, None)
+    return value.isoformat() if value else ""
+
+
+def route_out(record: RouteRecord) -> RouteOut:
+    route = record.route
+    return RouteOut(
+        id=str(route.id),
+        title=route.title,
+        description=route.description,
+        geometry=json.loads(record.geojson or _EMPTY_LINE),
+        distance_km=float(route.distance_km),
+        is_public=bool(route.is_public),
+        created_at=_timestamp(route, "created_at"),
+        updated_at=_timestamp(route, "updated_at"),
+        markers=[_marker_out(m, gj) for m, gj in record.markers],
+    )
+
+
+def _marker_json(marker: Marker, geojson_str: str | None) -> str:
+    return (
+        f'{{"id":"{marker.id}","geometry":{geojson_str or _EMPTY_POINT},'
+        f'"label":{_dumps(marker.label)},"description":{_dumps(marker.description)},'
+        f'"icon_type":{_dumps(marker.icon_type)},"order_index":{int(marker.order_index)}}}'
+    )
+
+
+def route_json(record: RouteRecord) -> bytes:
+    """The `RouteOut` JSON of a route, without parsing or re-encoding its geometry."""
+    route = record.route
+    markers = ",".join(_marker_json(m, gj) for m, gj in record.markers)
+    return (
+        f'{{"id":"{route.id}","title":{_dumps(route.title)},"description":{_dumps(route.description)},'
+        f'"geometry":{record.geojson or _EMPTY_LINE},"distance_km":{_dumps(float(route.distance_km))},'
+        f'"is_public":{_dumps(bool(route.is_public))},"created_at":"{_timestamp(route, "created_at")}",'
+        f'"updated_at":"{_timestamp(route, "updated_at")}","markers":[{markers}]}}'
+    ).encode("utf-8")
+
+
+def routes_json(records: Sequence[RouteRecord]) -> bytes:
+    return b"[" + b",".join(route_json(r) for r in records) + b"]"
+
+
+class RawJSONResponse(JSONResponse):
+    """JSON response that sends already rendered bytes untouched.
+
+    Route endpoints return `route_json` bodies through it, so FastAPI neither
+    validates them against the response model nor encodes them again; the
+    response model still documents the schema. Other content is encoded as
+    JSONResponse would.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return super().render(content)
+
+
+async def _marker_rows_by_route(
+    db: AsyncSession, route_ids: Sequence[uuid.UUID]
+) -> dict[uuid.UUID, list[MarkerRow]]:
+    """Load the ordered markers of many routes with one query."""
+    grouped: dict[uuid.UUID, list[MarkerRow]] = {rid: [] for rid in route_ids}
+    if not route_ids:
+        return grouped
+    rows = await db.execute(
+        select(Marker, func.ST_AsGeoJSON(Marker.geometry))
+        .where(Marker.route_id.in_(route_ids))
+        .order_by(Marker.route_id, Marker.order_index.asc())
+    )
+    for m, gj in rows:
+        grouped[m.route_id].append((m, gj))
+    return grouped
+
+
+async def route_records(db: AsyncSession, rows: Sequence[RouteRow]) -> list[RouteRecord]:
+    """Attach markers to already-fetched (route, geojson) rows.
+
+    Markers for all routes are fetched in one extra query, so the cost is
+    constant regardless of how many routes are serialized.
+    """
+    markers = await _marker_rows_by_route(db, [route.id for route, _ in rows])
+    return [RouteRecord(route, gj, markers[route.id]) for route, gj in rows]
+
+
+async def load_route_records(
+    db: AsyncSession,
+    *criteria: Any,
+    order_by: Sequence[Any] = (),
+    limit: int | None = None,
+    geojson: Any = None,
+) -> list[RouteRecord]:
+    """Load every route matching `criteria` with its markers in two queries."""
+    query = route_rows_query(*criteria, geojson=geojson).order_by(*order_by).limit(limit)
+    rows = (await db.execute(query)).all()
+    return await route_records(db, rows)
+
+
+async def iter_route_records(
+    db: AsyncSession,
+    *criteria: Any,
+    order_by: Sequence[Any] = (),
+    limit: int | None = None,
+    geojson: Any = None,
+    chunk_size: int = 100,
+) -> AsyncIterator[RouteRecord]:
+    """Yield routes read from a server-side cursor.
+
+    Markers are batched per chunk, so memory stays bounded by `chunk_size`
+    rather than by the number of matching routes.
+    """
+    query = route_rows_query(*criteria, geojson=geojson).order_by(*order_by).limit(limit)
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    async for rows in result.partitions():
+        for record in await route_records(db, rows):
+            yield record
+
+
+async def iter_route_outs(db: AsyncSession, *criteria: Any, **options: Any) -> AsyncIterator[RouteOut]:
+    """`iter_route_records` parsed into `RouteOut`s."""
+    async for record in iter_route_records(db, *criteria, **options):
+        yield route_out(record)
+
+
+async def iter_marker_outs(
+    db: AsyncSession,
+    *criteria: Any,
+    order_by: Sequence[Any] = (),
+    chunk_size: int = 1000,
+) -> AsyncIterator[tuple[uuid.UUID, MarkerOut]]:
+    """Yield (route id, marker) for the routes matching `criteria`, from a server-side cursor.
+
+    Markers come route by route in `order_by` order, each route's in marker order.
+    """
+    query = (
+        select(Marker, func.ST_AsGeoJSON(Marker.geometry))
+        .join(Route, Marker.route_id == Route.id)
+        .where(*criteria)
+        .order_by(*order_by, Marker.order_index.asc())
+    )
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    async for m, gj in result:
+        yield m.route_id, _marker_out(m, gj)
+
+
+async def iter_routes_ndjson(
+    db: AsyncSession,
+    *criteria: Any,
+    order_by: Sequence[Any] = (),
+    limit: int | None = None,
+    geojson: Any = None,
+) -> AsyncIterator[bytes]:
+    """Yield one JSON document per line (see `iter_route_records`)."""
+    async for record in iter_route_records(db, *criteria, order_by=order_by, limit=limit, geojson=geojson):
+        yield route_json(record) + b"\n"
+
+
+async def serialize_route_json(db: AsyncSession, route: Route) -> bytes:
+    """Render a single route, reloading server-side defaults in the same query."""
+    return route_json((await load_route_records(db, Route.id == route.id))[0])
+
+
+async def serialize_route_markers(db: AsyncSession, route_id: uuid.UUID) -> list[MarkerOut]:
+    return [_marker_out(m, gj) for m, gj in (await _marker_rows_by_route(db, [route_id]))[route_id]]
+
+
+async def serialize_marker(db: AsyncSession, marker: Marker) -> MarkerOut:
+    geojson_str = await db.scalar(select(func.ST_AsGeoJSON(Marker.geometry)).where(Marker.id == marker.id))
+    return _marker_out(marker, geojson_str)
+
+
+def _polyline_geometry(geometry_type: str, coords: list, precision: int) -> dict:
+    return {
+        "type": geometry_type,
+        "encoding": "polyline",
+        "precision": precision,
+        "polyline": encode_polyline(coords, precision),
+    }
+
+
+def polyline_route(route: RouteOut, precision: int = 5) -> RouteOut:
+    """Same route with the line and marker points as encoded polylines."""
+    return route.model_copy(
+        update={
+            "geometry": _polyline_geometry("LineString", route.geometry.get("coordinates", []), precision),
+            "markers": [
+                m.model_copy(
+                    update={"geometry": _polyline_geometry("Point", [m.geometry["coordinates"]], precision)}
+                )
+                for m in route.markers
+            ],
+        }
+    )
+
+
+def routes_binary(routes: Sequence[RouteOut], precision: int = 6) -> bytes:
+    """Route lines and marker points in the BRGB buffer format (app.geo.encoding)."""
+    return encode_binary(
+        [
+            BinaryRoute(
+                uuid.UUID(r.id),
+                r.geometry.get("coordinates", []),
+                [
+                    BinaryMarker(uuid.UUID(m.id), m.order_index, m.geometry["coordinates"])
+                    for m in r.markers
+                ],
+            )
+            for r in routes
+        ],
+        precision,
+    )
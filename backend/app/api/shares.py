@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import secrets
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.conditional import http_date, is_not_modified, not_modified
+from app.api.negotiation import JSON_MEDIA_TYPE, accepts_encoding
+from app.api.serializers import RouteOut, serialize_route_json
+from app.auth.cache import CurrentUser
+from app.auth.deps import get_current_user
+from app.core.rate_limit import limiter, RateLimits
+from app.core.settings import settings
+from app.db import get_db
+from app.models.route import Route
+
+router = APIRouter(prefix="/routes")
+
+# A share link serves a snapshot rendered when it was minted: gzipped route
+# JSON stored on the row. Reads are one Core select on the unique share_token
+# index and send the stored bytes as they are. Sharing again renders a new
+# snapshot under a new token, so the content behind a token never changes.
+
+_routes = Route.__table__
+
+_SHARE_COLUMNS_CLEARED = {"share_token": None, "share_snapshot": None, "share_etag": None, "shared_at": None}
+
+
+class ShareOut(BaseModel):
+    token: str
+    path: str
+    shared_at: str
+
+
+def render_snapshot(body: bytes) -> tuple[bytes, str]:
+    """Gzipped JSON body and the digest its ETags are built from."""
+    return gzip.compress(body, compresslevel=9, mtime=0), hashlib.sha256(body).hexdigest()[:32]
+
+
+@router.post("/{route_id}/share", response_model=ShareOut, status_code=status.HTTP_201_CREATED)
+@limiter.limit(RateLimits.UPDATE)
+async def share_route(
+    request: Request,
+    route_id: str,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Mint a share link to a snapshot of the route as it is now.
+
+    Any previous link of the route stops working.
+    """
+    route = await db.get(Route, uuid.UUID(route_id))
+    if not route or route.user_id != user.id:
+        raise HTTPException(status_code=404, detail="route_not_found")
+
+    snapshot, digest = render_snapshot(await serialize_route_json(db, route))
+    token = secrets.token_urlsafe(32)
+    shared_at = (
+        await db.execute(
+            update(Route)
+            .where(Route.id == route.id)
+            # Keep updated_at: the route itself didn't change.
+            .values(
+                share_token=token,
+                share_snapshot=snapshot,
+                share_etag=digest,
+                shared_at=func.now(),
+                updated_at=Route.updated_at,
+            )
+            .returning(Route.shared_at)
+        )
+    ).scalar_one()
+    await db.commit()
+    return ShareOut(token=token, path=f"/api/routes/share/{token}", shared_at=shared_at.isoformat())
+
+
+@router.delete("/{route_id}/share", status_code=status.HTTP_204_NO_CONTENT)
+@limiter.limit(RateLimits.DELETE)
+async def revoke_share(
+    request: Request,
+    route_id: str,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    result = await db.execute(
+        update(Route)
+        .where(Route.id == uuid.UUID(route_id), Route.user_id == user.id)
+        .values(**_SHARE_COLUMNS_CLEARED, updated_at=Route.updated_at)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="route_not_found")
+    await db.commit()
+    return None
+
+
+@router.get("/share/{token}", response_model=RouteOut)
+@limiter.limit(RateLimits.SHARED)
+async def get_shared_route(request: Request, token: str, db: AsyncSession = Depends(get_db)):
+    """The route snapshot behind a share link; no authentication."""
+    if len(token) > 64:
+        raise HTTPException(status_code=404, detail="share_not_found")
+    row = (
+        await db.execute(
+            select(_routes.c.share_snapshot, _routes.c.share_etag, _routes.c.shared_at).where(
+                _routes.c.share_token == token, _routes.c.share_snapshot.is_not(None)
+            )
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="share_not_found")
+
+    # The stored bytes are the gzip representation; the rare client without
+    # gzip gets them decompressed under a different strong ETag.
+    gzipped = accepts_encoding(request, "gzip")
+    etag = f'"{row.share_etag}-gzip"' if gzipped else f'"{row.share_etag}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(row.shared_at),
+        "Cache-Control": f"public, max-age={settings.share_cache_max_age}, immutable",
+        "Vary": "Accept-Encoding",
+    }
+    if is_not_modified(request, etag, row.shared_at):
+        return not_modified(headers)
+    if gzipped:
+        return Response(row.share_snapshot, media_type=JSON_MEDIA_TYPE, headers={**headers, "Content-Encoding": "gzip"})
+    return Response(gzip.decompress(row.share_snapshot), media_type=JSON_MEDIA_TYPE, headers=headers)
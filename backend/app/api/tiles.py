@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.rate_limit import limiter, RateLimits
+from app.db import get_db
+from app.geo.tiles import TILE_BUFFER, TILE_EXTENT, tile_cache, tile_in_range
+
+router = APIRouter(prefix="/tiles")
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+# Only public routes (and their markers) are rendered: tiles are shared by all
+# viewers, so they can never carry per-user data.
+_LAYER_SQL = {
+    "routes": text(
+        """
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS geom,
+                   ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), 4326) AS geom_4326
+        ), mvtgeom AS (
+            SELECT ST_AsMVTGeom(ST_Transform(r.geometry, 3857), bounds.geom, :extent, :buffer, true) AS geom,
+                   r.id::text AS id,
+                   r.title,
+                   r.distance_km
+            FROM routes r, bounds
+            WHERE r.is_public = true
+              AND r.geometry && bounds.geom_4326
+        )
+        SELECT ST_AsMVT(mvtgeom.*, 'routes', :extent, 'geom') FROM mvtgeom
+        """
+    ),
+    "markers": text(
+        """
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS geom,
+                   ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), 4326) AS geom_4326
+        ), mvtgeom AS (
+            SELECT ST_AsMVTGeom(ST_Transform(m.geometry, 3857), bounds.geom, :extent, :buffer, true) AS geom,
+                   m.id::text AS id,
+                   m.route_id::text AS route_id,
+                   m.label,
+                   m.icon_type,
+                   m.order_index
+            FROM markers m
+            JOIN routes r ON r.id = m.route_id, bounds
+            WHERE r.is_public = true
+              AND m.geometry && bounds.geom_4326
+        )
+        SELECT ST_AsMVT(mvtgeom.*, 'markers', :extent, 'geom') FROM mvtgeom
+        """
+    ),
+}
+
+
+async def _tile(db: AsyncSession, layer: str, z: int, x: int, y: int) -> Response:
+    if not tile_in_range(z, x, y):
+        raise HTTPException(status_code=404, detail="tile_not_found")
+
+    key = (layer, z, x, y)
+    # Read before rendering: a write committed meanwhile moves it, so the tile
+    # below is never cached as current for that write.
+    version = tile_cache.version(key)
+    data = tile_cache.get(key, version)
+    if data is None:
+        data = await db.scalar(
+            _LAYER_SQL[layer],
+            {
+                "z": z,
+                "x": x,
+                "y": y,
+                "extent": TILE_EXTENT,
+                "buffer": TILE_BUFFER,
+                "margin": TILE_BUFFER / TILE_EXTENT,
+            },
+        )
+        data = bytes(data or b"")
+        tile_cache.put(key, data, version)
+
+    return Response(
+        content=data,
+        media_type=MVT_MEDIA_TYPE,
+        headers={"Cache-Control": "public, max-age=60"},
+    )
+
+
+@router.get("/routes/{z}/{x}/{y}.pbf", response_class=Response)
+@limiter.limit(RateLimits.TILES)
+async def route_tile(
+    request: Request,
+    z: int,
+    x: int,
+    y: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """Public routes as a Mapbox Vector Tile (layer `routes`)."""
+    return await _tile(db, "routes", z, x, y)
+
+
+@router.get("/markers/{z}/{x}/{y}.pbf", response_class=Response)
+@limiter.limit(RateLimits.TILES)
+async def marker_tile(
+    request: Request,
+    z: int,
+    x: int,
+    y: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """Markers of public routes as a Mapbox Vector Tile (layer `markers`)."""
+    return await _tile(db, "markers", z, x, y)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from app.auth.cache import CurrentUser
 from app.auth.deps import get_current_user
 
-__all__ = ["get_current_user"]
+__all__ = ["CurrentUser", "get_current_user"]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.auth.models import User
+from app.core.settings import settings
+
+
+class CurrentUser(NamedTuple):
+    """What request handlers get for the authenticated user (no ORM instance)."""
+
+    id: uuid.UUID
+    email: str
+    is_active: bool
+
+
+class UserCache:
+    """Process-local LRU of CurrentUser with a per-entry TTL.
+
+    Entries are dropped when the user row is updated or deleted in this
+    process; other workers see the change once the TTL expires, so keep it
+    short.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[uuid.UUID, tuple[float, CurrentUser]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: uuid.UUID) -> Optional[CurrentUser]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user: CurrentUser) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+user_cache = UserCache(
+    max_entries=settings.user_cache_max_entries,
+    # Never trust a cached user for longer than one access token lives.
+    ttl_seconds=min(settings.user_cache_ttl_seconds, settings.access_token_ttl_minutes * 60),
+)
+
+_STALE_KEY = "user_cache_stale"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target: User) -> None:
+    user_cache.invalidate(target.id)
+    # A concurrent request may re-cache the old row before this transaction
+    # commits, so drop the entry again once it has.
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_STALE_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for user_id in session.info.pop(_STALE_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale(session: Session) -> None:
+    session.info.pop(_STALE_KEY, None)
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from fastapi import Depends, HTTPException, status
+import uuid
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.cache import CurrentUser, user_cache
 from app.auth.jwt import decode_access_token, JWTError
 from app.auth.models import User
 from app.db import get_db
@@ -13,10 +16,15 @@ security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """Dependency to get the current authenticated user."""
+) -> CurrentUser:
+    """Dependency to get the current authenticated user.
+
+    Returns a cached (id, email, is_active) projection, so most requests skip
+    the users query.
+    """
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,35 +43,51 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Get user from database
-    result = await db.execute(select(User).where(User.id == payload.sub))
-    user = result.scalar_one_or_none()
-    
-    if not user:
+    try:
+        user_id = uuid.UUID(payload.sub)
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
+            detail="Invalid token: bad subject",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    user = user_cache.get(user_id)
+    if user is None:
+        # Get user from database
+        row = (
+            await db.execute(select(User.id, User.email, User.is_active).where(User.id == user_id))
+        ).first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user = CurrentUser(*row)
+        user_cache.put(user)
     
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user",
         )
-    
+
+    # Lets the rate limiter key on the user instead of the client address.
+    request.state.user_id = user.id
     return user
 
 
 async def get_optional_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User | None:
+) -> CurrentUser | None:
     """Dependency to optionally get the current user (returns None if not authenticated)."""
     if not credentials:
         return None
     
     try:
-        return await get_current_user(credentials, db)
+        return await get_current_user(request, credentials, db)
     except HTTPException:
         return None
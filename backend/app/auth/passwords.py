@@ -1,31 +1,121 @@
 from __future__ import annotations
 
+import argparse
+import asyncio
 import hashlib
 import hmac
 import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.core.settings import settings
 
 _PBKDF2_ALG = "sha256"
-_PBKDF2_ITERS = 210_000
+_SCHEME = f"pbkdf2_{_PBKDF2_ALG}"
 _SALT_BYTES = 16
+_MIN_ITERS = 100_000  # calibration never goes below this
 
 
-def hash_password(password: str) -> str:
+def _parse(stored: str) -> Optional[tuple[int, bytes, bytes]]:
+    try:
+        scheme, iters_s, salt_hex, dk_hex = stored.split("$", 3)
+        if scheme != _SCHEME:
+            return None
+        return int(iters_s), bytes.fromhex(salt_hex), bytes.fromhex(dk_hex)
+    except Exception:
+        return None
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    iters = iterations or settings.password_hash_iterations
     salt = secrets.token_bytes(_SALT_BYTES)
-    dk = hashlib.pbkdf2_hmac(_PBKDF2_ALG, password.encode("utf-8"), salt, _PBKDF2_ITERS)
-    return f"pbkdf2_{_PBKDF2_ALG}${_PBKDF2_ITERS}${salt.hex()}${dk.hex()}"
+    dk = hashlib.pbkdf2_hmac(_PBKDF2_ALG, password.encode("utf-8"), salt, iters)
+    return f"{_SCHEME}${iters}${salt.hex()}${dk.hex()}"
 
 
 def verify_password(password: str, stored: str) -> bool:
-    try:
-        scheme, iters_s, salt_hex, dk_hex = stored.split("$", 3)
-        if scheme != f"pbkdf2_{_PBKDF2_ALG}":
-            return False
-        iters = int(iters_s)
-        salt = bytes.fromhex(salt_hex)
-        expected = bytes.fromhex(dk_hex)
-    except Exception:
+    parsed = _parse(stored)
+    if parsed is None:
         return False
-
+    iters, salt, expected = parsed
     actual = hashlib.pbkdf2_hmac(_PBKDF2_ALG, password.encode("utf-8"), salt, iters)
     return hmac.compare_digest(actual, expected)
 
+
+def needs_rehash(stored: str) -> bool:
+    """True when `stored` was hashed with a different scheme or iteration count."""
+    parsed = _parse(stored)
+    return parsed is None or parsed[0] != settings.password_hash_iterations
+
+
+def calibrate_iterations(target_ms: float, sample_iters: int = 50_000, rounds: int = 3) -> int:
+    """Iteration count that makes one hash take about `target_ms` on this host."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac(_PBKDF2_ALG, b"calibration", b"\0" * _SALT_BYTES, sample_iters)
+        best = min(best, time.perf_counter() - start)
+    iters = int(sample_iters * (target_ms / 1000) / best)
+    return max(_MIN_ITERS, iters // 1000 * 1000)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool has no room for another job."""
+
+
+class PasswordHasher:
+    """Runs PBKDF2 in a bounded thread pool so it never blocks the event loop.
+
+    `hashlib.pbkdf2_hmac` releases the GIL, so threads give real parallelism.
+    At most `workers` hashes run and `max_queue` more wait; beyond that calls
+    fail fast with PasswordHasherBusy instead of queueing unboundedly.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="pbkdf2")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, stored: str) -> bool:
+        return await self._run(verify_password, password, stored)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick a PBKDF2 iteration count for this host.")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="target latency of one hash")
+    args = parser.parse_args()
+    iters = calibrate_iterations(args.target_ms)
+    print(f"PASSWORD_HASH_ITERATIONS={iters}")
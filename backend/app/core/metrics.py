@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import bisect
+import collections
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Prometheus text exposition without the client library. Metrics are plain
+# dicts keyed by label tuples and are only touched from the event loop thread,
+# so there is no locking. Values are per worker process: scrape every worker
+# (or run one per container) to see all traffic.
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = tuple[str, ...]
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterator[tuple[str, Sequence[str], Sequence[str], float]]:
+        """(name suffix, extra label names, label values, value)."""
+        return iter(())
+
+    def render(self, out: list[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.type}")
+        for suffix, extra, values, value in self.samples():
+            out.append(f"{self.name}{suffix}{_label_str(self.labelnames + tuple(extra), values)} {_fmt(value)}")
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield "", (), labels, value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (+Inf last)..., sum]
+        self._data: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        data = self._data.get(labels)
+        if data is None:
+            data = self._data[labels] = [0.0] * (len(self.buckets) + 2)
+        data[bisect.bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        data = self._data.get(labels)
+        return int(sum(data[:-1])) if data else 0
+
+    def samples(self):
+        for labels, data in self._data.items():
+            cumulative = 0.0
+            for bound, n in zip((*self.buckets, float("inf")), data):
+                cumulative += n
+                yield "_bucket", ("le",), (*labels, _fmt(bound)), cumulative
+            yield "_sum", (), labels, data[-1]
+            yield "_count", (), labels, cumulative
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[Metric] = []
+        self._collectors: list[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable[Metric]]) -> Callable[[], Iterable[Metric]]:
+        """Register `fn` to build metrics from other components at scrape time."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        out: list[str] = []
+        for metric in self._metrics:
+            metric.render(out)
+        for collect in self._collectors:
+            for metric in collect():
+                metric.render(out)
+        return "\n".join(out) + "\n"
+
+
+def snapshot(kind: type[Counter], name: str, help: str, value: float) -> Counter:
+    """A one-off counter or gauge for collectors."""
+    metric = kind(name, help)
+    metric.inc(amount=value)
+    return metric
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter("http_requests_total", "Requests by route template and status.", ("method", "route", "status"))
+)
+http_duration = registry.register(
+    Histogram("http_request_duration_seconds", "Time to last response byte.", ("method", "route"), LATENCY_BUCKETS)
+)
+http_response_size = registry.register(
+    Histogram("http_response_size_bytes", "Response body size.", ("method", "route"), SIZE_BUCKETS)
+)
+http_in_flight = registry.register(Gauge("http_requests_in_flight", "Requests being served."))
+http_db_queries = registry.register(
+    Histogram("http_request_db_queries", "SQL statements per request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+)
+http_db_seconds = registry.register(
+    Histogram("http_request_db_seconds", "Time in SQL statements per request.", ("method", "route"), LATENCY_BUCKETS)
+)
+http_compressed = registry.register(
+    Counter("http_compressed_responses_total", "Responses compressed, by coding.", ("coding", "cached"))
+)
+http_compression_in = registry.register(
+    Counter("http_compression_bytes_in_total", "Response bytes before compression.", ("coding",))
+)
+http_compression_out = registry.register(
+    Counter("http_compression_bytes_out_total", "Response bytes after compression.", ("coding",))
+)
+http_compression_seconds = registry.register(
+    Counter("http_compression_cpu_seconds_total", "CPU time spent compressing responses.", ("coding",))
+)
+db_queries = registry.register(Counter("db_queries_total", "SQL statements executed."))
+db_query_seconds = registry.register(Counter("db_query_seconds_total", "Time spent executing SQL statements."))
+
+
+class QueryStats:
+    """Statements run (and time spent) within a `count_queries` block."""
+
+    __slots__ = ("count", "seconds", "statements", "parent")
+
+    def __init__(self, parent: Optional[QueryStats] = None, record: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Optional[list[str]] = [] if record else None
+        self.parent = parent
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def count_queries(record: bool = False) -> Iterator[QueryStats]:
+    """Count the SQL statements run by the current task (and tasks it starts).
+
+    Blocks nest: statements count towards every enclosing block. With `record`
+    the statement texts are kept in `statements`.
+    """
+    stats = QueryStats(_query_stats.get(), record)
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+# Bind parameters in any DBAPI paramstyle, then runs of them (IN lists, VALUES rows).
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|%s|\?|(?<!:):\w+")
+_PARAM_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_VALUES_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+
+
+def statement_shape(statement: str) -> str:
+    """`statement` with whitespace collapsed and parameters (and lists of them) as `?`."""
+    shape = _PARAM.sub("?", " ".join(statement.split()))
+    return _VALUES_ROWS.sub("(?)", _PARAM_LIST.sub("?", shape))
+
+
+def repeated_statements(statements: Iterable[str], max_repeats: int) -> dict[str, int]:
+    """Statement shapes run more than `max_repeats` times: the mark of an N+1 loop."""
+    counts = collections.Counter(statement_shape(s) for s in statements)
+    return {shape: n for shape, n in counts.items() if n > max_repeats}
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    db_queries.inc()
+    db_query_seconds.inc(amount=elapsed)
+    stats = _query_stats.get()
+    while stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+        stats = stats.parent
+
+
+def _on_error(context) -> None:
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Count statements and their time via engine events (SQLAlchemy runs them in the request's context)."""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_execute)
+    event.listen(sync_engine, "handle_error", _on_error)
+
+
+_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class MetricsMiddleware:
+    """Per-route-template request metrics, as a plain ASGI middleware.
+
+    The template comes from the route the router matched (`scope["route"]`),
+    so label cardinality is bounded by the app's routes.
+    """
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            with count_queries() as queries:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            method = scope["method"] if scope["method"] in _METHODS else "OTHER"
+            labels = (method, route)
+            http_requests.inc((method, route, str(status)))
+            http_duration.observe(time.perf_counter() - start, labels)
+            http_response_size.observe(size, labels)
+            http_db_queries.observe(queries.count, labels)
+            http_db_seconds.observe(queries.seconds, labels)
@@ -1,27 +1,139 @@
 from __future__ import annotations
 
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import functools
+import inspect
+from typing import Any, Callable, Optional
 
-# Create limiter instance
-limiter = Limiter(key_func=get_remote_address)
+from starlette.requests import Request
+
+from app.core.rate_limit_storage import RateLimitStorage, make_storage
+from app.core.settings import settings
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate: str) -> tuple[int, float]:
+    """"5/minute" -> (5, 60.0)."""
+    try:
+        count, period = rate.split("/", 1)
+        return int(count), float(_PERIODS[period.strip().rstrip("s")])
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate: {rate!r}")
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, limit: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded: {limit}")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+def client_key(request: Request) -> str:
+    """Rate limit identity: the authenticated user, else the client address.
+
+    Auth dependencies put the user id on `request.state`; they run before the
+    endpoint (and so before the limit check).
+    """
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is not None:
+        return f"user:{user_id}"
+    if settings.rate_limit_trust_forwarded:
+        # The proxy appends the address it saw, so the last entry is the one to trust.
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return f"ip:{forwarded.rsplit(',', 1)[-1].strip()}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class Limiter:
+    """Token-bucket limits applied per endpoint and client via a decorator.
+
+    Usage mirrors slowapi: decorate the endpoint with `@limiter.limit("5/minute")`
+    and give it a `request: Request` parameter.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[RateLimitStorage] = None,
+        key_func: Callable[[Request], str] = client_key,
+        enabled: bool = True,
+    ):
+        self._storage = storage
+        self.key_func = key_func
+        self.enabled = enabled
+        self.checks = 0
+        self.rejections = 0
+
+    @property
+    def storage(self) -> RateLimitStorage:
+        # Created on first use so importing the app doesn't touch /dev/shm or Redis.
+        if self._storage is None:
+            self._storage = make_storage(
+                settings.rate_limit_backend,
+                shm_path=settings.rate_limit_shm_path or None,
+                shm_slots=settings.rate_limit_shm_slots,
+                redis_url=settings.rate_limit_redis_url or None,
+            )
+        return self._storage
+
+    async def check(self, request: Request, scope: str, rate: str) -> None:
+        if not self.enabled:
+            return
+        count, period = parse_rate(rate)
+        self.checks += 1
+        allowed, retry_after = await self.storage.hit(
+            f"{scope}:{self.key_func(request)}", period / count, period
+        )
+        if not allowed:
+            self.rejections += 1
+            raise RateLimitExceeded(rate, retry_after)
+
+    def limit(self, rate: str) -> Callable:
+        parse_rate(rate)  # fail at import time on typos
+
+        def decorator(func: Callable) -> Callable:
+            scope = f"{func.__module__}.{func.__qualname__}"
+            is_async = inspect.iscoroutinefunction(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                request = kwargs.get("request")
+                if not isinstance(request, Request):
+                    request = next(a for a in args if isinstance(a, Request))
+                await self.check(request, scope, rate)
+                if is_async:
+                    return await func(*args, **kwargs)
+                return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+limiter = Limiter(enabled=settings.rate_limit_enabled)
 
 # Rate limit configurations
 class RateLimits:
     """Rate limit presets."""
-    
+
     # Auth endpoints - stricter limits to prevent brute force
     AUTH = "5/minute"  # 5 attempts per minute
     REGISTER = "3/minute"  # 3 registrations per minute
-    
+
     # General API - moderate limits
     DEFAULT = "100/minute"  # 100 requests per minute
-    
+
     # Data-intensive endpoints - higher limits
     ROUTES_LIST = "60/minute"
     ROUTE_DETAIL = "120/minute"
-    
+    TILES = "600/minute"
+    EXPORT = "5/minute"
+    # Share links are hit anonymously and in bursts; reads are a single lookup.
+    SHARED = "300/minute"
+
     # Write operations - moderate limits
     CREATE = "30/minute"
+    IMPORT = "5/minute"
     UPDATE = "30/minute"
     DELETE = "20/minute"
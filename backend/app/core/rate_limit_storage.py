@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Optional, Protocol
+
+# Token buckets stored as GCRA "theoretical arrival times" (TAT): one float per
+# key instead of (tokens, timestamp). A bucket of `limit` tokens refilling one
+# token every `interval` seconds over `period = limit * interval` admits a hit
+# at `now` iff max(tat, now) + interval - now <= period, then stores that value.
+# A TAT at or before `now` means the bucket is full, so stale entries need no
+# cleanup to be correct.
+
+
+class RateLimitStorage(Protocol):
+    async def hit(self, key: str, interval: float, period: float) -> tuple[bool, float]:
+        """Take one token from `key`'s bucket; return (allowed, retry_after_seconds)."""
+        ...
+
+
+def _gcra(tat: float, now: float, interval: float, period: float) -> tuple[bool, float, float]:
+    """Return (allowed, new_tat, retry_after)."""
+    new_tat = max(tat, now) + interval
+    excess = new_tat - now - period
+    if excess > 0:
+        return False, tat, excess
+    return True, new_tat, 0.0
+
+
+class MemoryStorage:
+    """Per-process buckets. Only one event loop touches it, so no locking."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tats: dict[str, float] = {}
+
+    async def hit(self, key: str, interval: float, period: float) -> tuple[bool, float]:
+        now = time.time()
+        allowed, tat, retry_after = _gcra(self._tats.get(key, 0.0), now, interval, period)
+        if allowed:
+            self._tats[key] = tat
+            if len(self._tats) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now: float) -> None:
+        self._tats = {k: t for k, t in self._tats.items() if t > now}
+        while len(self._tats) > self.max_keys:
+            self._tats.pop(next(iter(self._tats)))
+
+
+class SharedMemoryStorage:
+    """Buckets in an mmap'd file shared by every worker on the host.
+
+    The file is a table of 16-byte slots (uint64 key hash, float64 TAT). A key
+    lives in one of PROBE consecutive slots starting at hash % slots; a slot
+    whose TAT has passed is free, otherwise the one closest to expiry is
+    evicted. Writes lock just that probe window with fcntl; requests that are
+    clearly over the limit are rejected from an unlocked read.
+    """
+
+    PROBE = 4
+    _SLOT = struct.Struct("<Qd")
+
+    def __init__(self, path: str, slots: int = 65536):
+        self.slots = slots
+        size = (slots + self.PROBE) * self._SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size != size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Must agree across processes, so not the builtin (salted) hash().
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def _find(self, h: int, start: int) -> tuple[int, float]:
+        """Offset of `h`'s slot in the window (or the slot to reuse) and its TAT."""
+        best_offset, best_tat = start, float("inf")
+        for i in range(self.PROBE):
+            offset = start + i * self._SLOT.size
+            slot_hash, tat = self._SLOT.unpack_from(self._map, offset)
+            if slot_hash == h:
+                return offset, tat
+            if tat < best_tat:
+                best_offset, best_tat = offset, tat
+        return best_offset, 0.0
+
+    async def hit(self, key: str, interval: float, period: float) -> tuple[bool, float]:
+        now = time.time()
+        h = self._hash(key)
+        start = (h % self.slots) * self._SLOT.size
+
+        # Fast path: a TAT only moves forward, so a rejection based on an
+        # unlocked read stands.
+        _, tat = self._find(h, start)
+        allowed, _, retry_after = _gcra(tat, now, interval, period)
+        if not allowed:
+            return False, retry_after
+
+        window = self.PROBE * self._SLOT.size
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, window, start)
+        try:
+            offset, tat = self._find(h, start)
+            allowed, tat, retry_after = _gcra(tat, now, interval, period)
+            if allowed:
+                self._SLOT.pack_into(self._map, offset, h, tat)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, window, start)
+        return allowed, retry_after
+
+
+_REDIS_GCRA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+local new_tat = math.max(tat, now) + interval
+local excess = new_tat - now - period
+if excess > 0 then
+  return {0, tostring(excess)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0'}
+"""
+
+
+class RedisStorage:
+    """Buckets in Redis (or a compatible server) for limits shared across hosts.
+
+    Uses the server clock so hosts with skewed clocks agree.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_GCRA)
+
+    async def hit(self, key: str, interval: float, period: float) -> tuple[bool, float]:
+        allowed, retry_after = await self._script(keys=[self.prefix + key], args=[interval, period])
+        return bool(allowed), float(retry_after)
+
+
+def default_shm_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "bikeroutes-ratelimit")
+
+
+def make_storage(
+    backend: str,
+    shm_path: Optional[str] = None,
+    shm_slots: int = 65536,
+    redis_url: Optional[str] = None,
+) -> RateLimitStorage:
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "shm":
+        return SharedMemoryStorage(shm_path or default_shm_path(), shm_slots)
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("rate_limit_redis_url is required for the redis backend")
+        return RedisStorage(redis_url)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
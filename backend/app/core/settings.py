@@ -13,5 +13,79 @@ class Settings(BaseSettings):
     access_token_ttl_minutes: int = 15
     refresh_token_ttl_days: int = 30
 
+    # Database pool (one engine per process). db_statement_cache_size maps to
+    # asyncpg's statement_cache_size; 0 also disables psycopg prepared statements.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_pool_warm_size: int = 2
+    db_statement_cache_size: int = 100
+
+    # PBKDF2 password hashing. Pick iterations for the host with
+    # `python -m app.auth.passwords --target-ms 250`; older hashes are
+    # upgraded on the next successful login.
+    password_hash_iterations: int = 210_000
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 32
+
+    # Authenticated-user cache; the TTL is capped at the access token lifetime.
+    user_cache_max_entries: int = 10_000
+    user_cache_ttl_seconds: int = 60
+
+    # Rate limiting. Backends: "memory" (per worker), "shm" (shared by the
+    # workers on one host) or "redis" (needs the redis package).
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "shm"
+    rate_limit_shm_path: str = ""
+    rate_limit_shm_slots: int = 65536
+    rate_limit_redis_url: str = ""
+    # Behind a reverse proxy, key anonymous clients by X-Forwarded-For.
+    rate_limit_trust_forwarded: bool = False
+
+    # Rendered route responses. Backends: "memory" (per worker) or "redis";
+    # a TTL of 0 disables caching.
+    response_cache_backend: str = "memory"
+    response_cache_max_bytes: int = 32 * 1024 * 1024
+    response_cache_ttl_seconds: int = 300
+    response_cache_redis_url: str = ""
+
+    # max-age of GET /api/routes/share/{token}; a revoked link may be served
+    # from shared caches for this long.
+    share_cache_max_age: int = 300
+
+    # Bulk import (POST /api/routes/import). Limits apply per uploaded file or
+    # archive member; points cap a single route (and its waypoints).
+    import_max_files: int = 500
+    import_max_file_bytes: int = 50 * 1024 * 1024
+    import_max_points: int = 200_000
+
+    # Response compression (gzip; br and zstd too with the `compression` extra).
+    # Levels trade CPU per response for bytes; compressed bodies with a strong
+    # ETag are kept in a per-worker cache (0 turns it off).
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    compression_media_types: str = (
+        "application/json,application/geo+json,application/x-ndjson,application/gpx+xml,"
+        "application/vnd.bikeroutes.polyline+json,application/vnd.mapbox-vector-tile,text/*"
+    )
+    compression_gzip_level: int = 4
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+    compression_cache_max_bytes: int = 16 * 1024 * 1024
+
+    # Request and query metrics served at GET /metrics (per worker process).
+    metrics_enabled: bool = True
+
+    # Vector tile cache (per worker); leave tile_cache_dir empty to keep tiles
+    # in memory only. Workers on a host invalidate each other's tiles through
+    # change counters in tile_cache_generations_path (default in /dev/shm); the
+    # TTL bounds staleness after writes on other hosts.
+    tile_cache_max_bytes: int = 64 * 1024 * 1024
+    tile_cache_dir: str = ""
+    tile_cache_ttl_seconds: int = 3600
+    tile_cache_generations_path: str = ""
+
 
 settings = Settings()
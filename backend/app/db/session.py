@@ -1,16 +1,124 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from collections.abc import AsyncIterator
+from typing import Any, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from app.core.metrics import instrument_engine
 from app.core.settings import settings
 
-engine = create_async_engine(settings.database_url, pool_pre_ping=True)
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+class PoolStats:
+    """Checkout counters for the application pool."""
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, ok: bool) -> None:
+        if ok:
+            self.checkouts += 1
+        else:
+            self.timeouts += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            pool_stats.record(time.perf_counter() - start, ok=False)
+            raise
+        pool_stats.record(time.perf_counter() - start, ok=True)
+        return conn
+
+
+def _connect_args(url: str) -> dict[str, Any]:
+    driver = make_url(url).get_driver_name()
+    size = settings.db_statement_cache_size
+    if driver == "asyncpg":
+        return {"statement_cache_size": size}
+    if driver == "psycopg":
+        # psycopg prepares server-side after `prepare_threshold` runs; None disables it.
+        return {"prepare_threshold": 5 if size > 0 else None}
+    return {}
+
+
+def create_engine() -> AsyncEngine:
+    async_engine = create_async_engine(
+        settings.database_url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=_connect_args(settings.database_url),
+    )
+    if settings.metrics_enabled:
+        instrument_engine(async_engine)
+    return async_engine
+
+
+engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = async_sessionmaker(expire_on_commit=False, class_=AsyncSession)
+
+
+def get_engine() -> AsyncEngine:
+    """The process-wide engine, created on first use if the lifespan hook has not run."""
+    global engine
+    if engine is None:
+        engine = create_engine()
+        AsyncSessionLocal.configure(bind=engine)
+    return engine
+
+
+async def warm_pool(size: int) -> None:
+    """Open `size` connections up front so the first requests don't pay for connecting."""
+    size = min(size, settings.db_pool_size)
+    if size <= 0:
+        return
+    conns = await asyncio.gather(*(get_engine().connect() for _ in range(size)))
+    for conn in conns:
+        await conn.close()
+
+
+async def dispose_engine() -> None:
+    global engine
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+
+
+def pool_status() -> dict[str, Any]:
+    pool = get_engine().pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+        "checkouts": pool_stats.checkouts,
+        "timeouts": pool_stats.timeouts,
+        "wait_seconds_total": round(pool_stats.wait_seconds_total, 6),
+        "wait_seconds_max": round(pool_stats.wait_seconds_max, 6),
+    }
 
 
 async def get_db_session() -> AsyncIterator[AsyncSession]:
+    get_engine()
     async with AsyncSessionLocal() as session:
         yield session
-
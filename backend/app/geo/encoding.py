@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import struct
+import uuid
+from typing import Any, NamedTuple
+
+import numpy as np
+
+# Compact geometry encodings offered next to GeoJSON.
+#
+# Encoded polyline: Google's algorithm (https://developers.google.com/maps/documentation/utilities/polylinealgorithm),
+# precision 5 or 6. Pairs are written lat,lng as the format requires; the
+# helpers here take and return GeoJSON-ordered [lon, lat] coordinates.
+#
+# Binary ("BRGB" v1, all integers little-endian):
+#
+#   header   magic "BRGB" | uint8 version=1 | uint8 precision | uint16 reserved=0 | uint32 route_count
+#   route    16-byte id | uint32 n | n x (int32 lon, int32 lat) | uint32 m | m x marker
+#   marker   16-byte id | int32 order_index | int32 lon | int32 lat
+#
+# Coordinates are degrees * 10**precision rounded to int32. Route vertices are
+# delta-encoded (first absolute, then differences from the previous vertex);
+# marker points are absolute.
+
+BINARY_MAGIC = b"BRGB"
+BINARY_VERSION = 1
+MAX_BINARY_PRECISION = 6  # a 360 degree delta * 10**6 still fits in int32
+
+_HEADER = struct.Struct("<4sBBHI")
+_COUNT = struct.Struct("<I")
+_MARKER = struct.Struct("<16siii")
+
+
+def encode_polyline(coords: Any, precision: int = 5) -> str:
+    scale = 10**precision
+    out: list[str] = []
+    prev_lat = prev_lng = 0
+    for lng, lat in coords:
+        ilat = round(lat * scale)
+        ilng = round(lng * scale)
+        for delta in (ilat - prev_lat, ilng - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        prev_lat, prev_lng = ilat, ilng
+    return "".join(out)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> list[list[float]]:
+    scale = 10**precision
+    coords: list[list[float]] = []
+    index = lat = lng = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                if index >= length:
+                    raise ValueError("Truncated polyline")
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coords.append([lng / scale, lat / scale])
+    return coords
+
+
+class BinaryMarker(NamedTuple):
+    id: uuid.UUID
+    order_index: int
+    coordinates: list[float]
+
+
+class BinaryRoute(NamedTuple):
+    id: uuid.UUID
+    coordinates: list[list[float]]
+    markers: list[BinaryMarker]
+
+
+def _scaled(coords: Any, precision: int) -> np.ndarray:
+    arr = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    return np.rint(arr * 10**precision).astype("<i4")
+
+
+def encode_binary(routes: list[BinaryRoute], precision: int = 6) -> bytes:
+    if not 0 <= precision <= MAX_BINARY_PRECISION:
+        raise ValueError("Unsupported precision")
+    parts = [_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, precision, 0, len(routes))]
+    for route in routes:
+        ints = _scaled(route.coordinates, precision)
+        deltas = np.diff(ints, axis=0, prepend=np.zeros((1, 2), dtype="<i4"))
+        parts.append(route.id.bytes)
+        parts.append(_COUNT.pack(len(ints)))
+        parts.append(deltas.astype("<i4").tobytes())
+        parts.append(_COUNT.pack(len(route.markers)))
+        for marker in route.markers:
+            lon, lat = _scaled(marker.coordinates, precision)[0]
+            parts.append(_MARKER.pack(marker.id.bytes, marker.order_index, int(lon), int(lat)))
+    return b"".join(parts)
+
+
+def decode_binary(data: bytes) -> tuple[int, list[BinaryRoute]]:
+    """Return (precision, routes) from a BRGB v1 buffer."""
+    view = memoryview(data)
+    magic, version, precision, _, count = _HEADER.unpack_from(view, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not a BRGB v1 buffer")
+    scale = 10**precision
+    offset = _HEADER.size
+    routes: list[BinaryRoute] = []
+    for _ in range(count):
+        route_id = uuid.UUID(bytes=bytes(view[offset:offset + 16]))
+        offset += 16
+        (n,) = _COUNT.unpack_from(view, offset)
+        offset += _COUNT.size
+        deltas = np.frombuffer(view, dtype="<i4", count=n * 2, offset=offset).reshape(n, 2)
+        offset += n * 8
+        coords = (np.cumsum(deltas, axis=0, dtype=np.int64) / scale).tolist()
+        (m,) = _COUNT.unpack_from(view, offset)
+        offset += _COUNT.size
+        markers = []
+        for _ in range(m):
+            mid, order_index, lon, lat = _MARKER.unpack_from(view, offset)
+            offset += _MARKER.size
+            markers.append(BinaryMarker(uuid.UUID(bytes=mid), order_index, [lon / scale, lat / scale]))
+        routes.append(BinaryRoute(route_id, coords, markers))
+    return precision, routes
@@ -1,36 +1,84 @@
 from __future__ import annotations
 
+import itertools
+import math
+import struct
 from typing import Any, Literal, TypeGuard
 
-from geoalchemy2.elements import WKTElement
+import numpy as np
+from geoalchemy2.elements import WKBElement
 
 
 def _is_number(x: Any) -> TypeGuard[int | float]:
     return isinstance(x, (int, float)) and not isinstance(x, bool)
 
 
-def point_wkt_from_geojson(geometry: dict[str, Any], *, srid: int = 4326) -> WKTElement:
+# EWKB: byte order, geometry type with the SRID flag, SRID, then the
+# coordinates as raw doubles. Sent as is, PostGIS skips parsing decimal text.
+_WKB_LITTLE_ENDIAN = 1
+_WKB_POINT = 1
+_WKB_LINESTRING = 2
+_EWKB_SRID_FLAG = 0x20000000
+
+
+def ewkb_point(lng: float, lat: float, *, srid: int = 4326) -> WKBElement:
+    data = struct.pack("<BIIdd", _WKB_LITTLE_ENDIAN, _WKB_POINT | _EWKB_SRID_FLAG, srid, lng, lat)
+    return WKBElement(data, srid=srid, extended=True)
+
+
+def ewkb_linestring(coords: np.ndarray, *, srid: int = 4326) -> WKBElement:
+    """EWKB LineString from an (n, 2) array of [lon, lat]."""
+    header = struct.pack("<BIII", _WKB_LITTLE_ENDIAN, _WKB_LINESTRING | _EWKB_SRID_FLAG, srid, len(coords))
+    return WKBElement(header + np.ascontiguousarray(coords, dtype="<f8").tobytes(), srid=srid, extended=True)
+
+
+def point_wkb_from_geojson(geometry: dict[str, Any], *, srid: int = 4326) -> WKBElement:
     if geometry.get("type") != "Point":
         raise ValueError("Expected GeoJSON Point geometry")
     coords = geometry.get("coordinates")
     if not (isinstance(coords, list) and len(coords) == 2 and _is_number(coords[0]) and _is_number(coords[1])):
         raise ValueError("Invalid GeoJSON Point coordinates")
-    lng, lat = float(coords[0]), float(coords[1])
-    return WKTElement(f"POINT({lng} {lat})", srid=srid)
+    try:
+        lng, lat = float(coords[0]), float(coords[1])
+    except OverflowError:
+        raise ValueError("Invalid GeoJSON Point coordinates")
+    if not (math.isfinite(lng) and math.isfinite(lat)):
+        raise ValueError("Invalid GeoJSON Point coordinates")
+    return ewkb_point(lng, lat, srid=srid)
+
 
+def _only(types: set[type], allowed: tuple[type, ...]) -> bool:
+    return all(issubclass(t, allowed) and not issubclass(t, bool) for t in types)
 
-def linestring_wkt_from_geojson(geometry: dict[str, Any], *, srid: int = 4326) -> WKTElement:
+
+def linestring_coords_from_geojson(geometry: dict[str, Any]) -> np.ndarray:
+    """Validated (n, 2) float64 array of a GeoJSON LineString's [lon, lat] pairs.
+
+    Every vertex must be a list of two finite numbers. The checks gather the
+    distinct vertex types, lengths and value types with `map` and numpy does
+    the conversion, so no Python-level loop walks the vertices.
+    """
     if geometry.get("type") != "LineString":
         raise ValueError("Expected GeoJSON LineString geometry")
     coords = geometry.get("coordinates")
     if not (isinstance(coords, list) and len(coords) >= 2):
         raise ValueError("Invalid GeoJSON LineString coordinates")
-    parts: list[str] = []
-    for pt in coords:
-        if not (isinstance(pt, list) and len(pt) == 2 and _is_number(pt[0]) and _is_number(pt[1])):
-            raise ValueError("Invalid GeoJSON LineString coordinates")
-        parts.append(f"{float(pt[0])} {float(pt[1])}")
-    return WKTElement(f"LINESTRING({', '.join(parts)})", srid=srid)
+    if not (_only(set(map(type, coords)), (list,)) and set(map(len, coords)) == {2}):
+        raise ValueError("Invalid GeoJSON LineString coordinates")
+    values = list(itertools.chain.from_iterable(coords))
+    if not _only(set(map(type, values)), (int, float)):
+        raise ValueError("Invalid GeoJSON LineString coordinates")
+    try:
+        arr = np.fromiter(values, dtype=np.float64, count=len(values)).reshape(-1, 2)
+    except OverflowError:
+        raise ValueError("Invalid GeoJSON LineString coordinates")
+    if not np.isfinite(arr).all():
+        raise ValueError("Invalid GeoJSON LineString coordinates")
+    return arr
+
+
+def linestring_wkb_from_geojson(geometry: dict[str, Any], *, srid: int = 4326) -> WKBElement:
+    return ewkb_linestring(linestring_coords_from_geojson(geometry), srid=srid)
 
 
 def feature(
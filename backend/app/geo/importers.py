@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import codecs
+import json
+import math
+import os
+import xml.etree.ElementTree as ET
+import zipfile
+from array import array
+from typing import IO, Any, Iterator, NamedTuple, Optional
+
+import numpy as np
+
+# Streaming readers for route files from other apps. XML goes through
+# iterparse and each handled element is detached from the tree; GeoJSON
+# FeatureCollections are decoded one feature at a time; zip members are
+# decompressed as they are read. Memory is bounded by the largest single route
+# rather than by the size of the upload.
+#
+# Waypoints (GPX <wpt>, KML Point placemarks, GeoJSON Point features) become
+# markers of the route that follows them; waypoints after the last route go to
+# the last route. GPX waypoints carrying a <br:route> extension (as written by
+# GET /routes/export) go to the track with the matching <br:id> instead, since
+# GPX 1.1 wants every <wpt> before the first <trk>.
+
+ROUTE_EXTENSIONS = (".gpx", ".kml", ".geojson", ".json")
+ARCHIVE_EXTENSIONS = (".zip", ".kmz")
+
+_CHUNK = 64 * 1024
+
+# Namespace of the GPX extensions that tie exported waypoints to their track.
+GPX_EXTENSIONS_NS = "urn:bikeroutes:gpx:1"
+
+
+class ImportedMarker(NamedTuple):
+    lon: float
+    lat: float
+    label: Optional[str]
+    description: Optional[str]
+    icon_type: str
+
+
+class ImportedRoute(NamedTuple):
+    title: str
+    description: Optional[str]
+    coordinates: np.ndarray  # (n, 2) [lon, lat]
+    markers: list[ImportedMarker]
+
+
+def extension(name: str) -> str:
+    return os.path.splitext(name)[1].lower()
+
+
+def is_archive(name: str) -> bool:
+    return extension(name) in ARCHIVE_EXTENSIONS
+
+
+class LimitedReader:
+    """File wrapper that raises ValueError once more than `limit` bytes are read."""
+
+    def __init__(self, raw: IO[bytes], limit: int):
+        self._raw = raw
+        self._left = limit
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(self._left + 1 if size < 0 else min(size, self._left + 1))
+        self._left -= len(data)
+        if self._left < 0:
+            raise ValueError("File is too large")
+        return data
+
+
+def _point(lon: Any, lat: Any) -> tuple[float, float]:
+    try:
+        x, y = float(lon), float(lat)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid coordinates")
+    if not (math.isfinite(x) and math.isfinite(y) and -180 <= x <= 180 and -90 <= y <= 90):
+        raise ValueError("Coordinates out of range")
+    return x, y
+
+
+def _clip(text: Optional[str], length: int) -> Optional[str]:
+    text = (text or "").strip()
+    return text[:length] or None
+
+
+class _Collector:
+    """Accumulates one route's points and pairs routes with waypoints."""
+
+    def __init__(self, default_title: str, max_points: int):
+        self.default_title = default_title
+        self.max_points = max_points
+        self._coords = array("d")
+        self._waypoints: list[ImportedMarker] = []
+        self._tagged: dict[str, list[ImportedMarker]] = {}
+        self._held = 0
+        self._pending: Optional[ImportedRoute] = None
+
+    def point(self, lon: Any, lat: Any) -> None:
+        if len(self._coords) >= 2 * self.max_points:
+            raise ValueError(f"Route has more than {self.max_points} points")
+        self._coords.extend(_point(lon, lat))
+
+    def waypoint(
+        self,
+        lon: Any,
+        lat: Any,
+        label: Optional[str],
+        description: Optional[str],
+        icon: Optional[str],
+        route_key: Optional[str] = None,
+    ) -> None:
+        """Add a waypoint for the next route, or for the route tagged `route_key`."""
+        if self._held >= self.max_points:
+            raise ValueError(f"More than {self.max_points} waypoints")
+        marker = ImportedMarker(
+            *_point(lon, lat), _clip(label, 100), _clip(description, 10_000), _clip(icon, 50) or "default"
+        )
+        if route_key:
+            self._tagged.setdefault(route_key, []).append(marker)
+        else:
+            self._waypoints.append(marker)
+        self._held += 1
+
+    def route(
+        self, title: Optional[str], description: Optional[str], key: Optional[str] = None
+    ) -> Optional[ImportedRoute]:
+        """Close the current route; return the previous one, now complete."""
+        coords, self._coords = self._coords, array("d")
+        if len(coords) < 4:
+            return None  # fewer than two points: not a line
+        markers = self._waypoints
+        if key:
+            markers.extend(self._tagged.pop(key, ()))
+        done, self._pending = self._pending, ImportedRoute(
+            _clip(title, 255) or self.default_title,
+            _clip(description, 1000),
+            np.frombuffer(coords, dtype=np.float64).reshape(-1, 2),
+            markers,
+        )
+        self._held -= len(markers)
+        self._waypoints = []
+        return done
+
+    def finish(self) -> Optional[ImportedRoute]:
+        if self._pending is None:
+            return None
+        self._pending.markers.extend(self._waypoints)
+        for markers in self._tagged.values():
+            self._pending.markers.extend(markers)  # no matching track
+        return self._pending
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(elem: ET.Element, name: str) -> Optional[str]:
+    for child in elem:
+        if _local(child.tag) == name:
+            return child.text
+    return None
+
+
+def _extension_text(elem: ET.Element, name: str) -> Optional[str]:
+    for child in elem:
+        if _local(child.tag) == "extensions":
+            text = child.findtext(f"{{{GPX_EXTENSIONS_NS}}}{name}")
+            return text.strip() if text else None
+    return None
+
+
+def _xml_ends(fileobj: IO[bytes]) -> Iterator[tuple[str, ET.Element, Optional[ET.Element]]]:
+    """(local tag, element, parent) for every closed element."""
+    stack: list[ET.Element] = []
+    for event, elem in ET.iterparse(fileobj, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+        else:
+            stack.pop()
+            yield _local(elem.tag), elem, stack[-1] if stack else None
+
+
+def _detach(elem: ET.Element, parent: Optional[ET.Element]) -> None:
+    # Handled siblings are already gone, so the parent stays small.
+    elem.clear()
+    if parent is not None:
+        parent.remove(elem)
+
+
+def iter_gpx(fileobj: IO[bytes], default_title: str, max_points: int) -> Iterator[ImportedRoute]:
+    routes = _Collector(default_title, max_points)
+    for tag, elem, parent in _xml_ends(fileobj):
+        if tag in ("trkpt", "rtept"):
+            routes.point(elem.get("lon"), elem.get("lat"))
+        elif tag == "wpt":
+            routes.waypoint(
+                elem.get("lon"), elem.get("lat"),
+                _child_text(elem, "name"), _child_text(elem, "desc"), _child_text(elem, "sym"),
+                _extension_text(elem, "route"),
+            )
+        elif tag in ("trk", "rte"):
+            # Track segments are joined into one line.
+            key = _extension_text(elem, "id")
+            if done := routes.route(_child_text(elem, "name"), _child_text(elem, "desc"), key):
+                yield done
+        else:
+            continue
+        _detach(elem, parent)
+    if done := routes.finish():
+        yield done
+
+
+def _kml_coordinates(text: Optional[str]) -> Iterator[list[str]]:
+    for tuple_ in (text or "").split():
+        yield tuple_.split(",")
+
+
+def iter_kml(fileobj: IO[bytes], default_title: str, max_points: int) -> Iterator[ImportedRoute]:
+    routes = _Collector(default_title, max_points)
+    point: Optional[list[str]] = None
+    for tag, elem, parent in _xml_ends(fileobj):
+        if tag == "coordinates":
+            kind = _local(parent.tag) if parent is not None else ""
+            if kind == "Point":
+                point = next(_kml_coordinates(elem.text), None)
+            elif kind == "LineString":
+                for lon, lat, *_ in _kml_coordinates(elem.text):
+                    routes.point(lon, lat)
+        elif tag == "coord":  # gx:Track
+            parts = (elem.text or "").split()
+            routes.point(*(parts + [None, None])[:2])
+        elif tag == "Placemark":
+            name, description = _child_text(elem, "name"), _child_text(elem, "description")
+            if done := routes.route(name, description):
+                yield done
+            elif point is not None:
+                routes.waypoint(point[0], point[1] if len(point) > 1 else None, name, description, None)
+            point = None
+        else:
+            continue
+        _detach(elem, parent)
+    if done := routes.finish():
+        yield done
+
+
+def _iter_features(fileobj: IO[bytes]) -> Iterator[dict[str, Any]]:
+    """Decode the `features` of a FeatureCollection one at a time."""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    buf = ""
+    eof = False
+
+    def fill(size: int = _CHUNK) -> None:
+        nonlocal buf, eof
+        chunk = fileobj.read(max(size, _CHUNK))
+        eof = not chunk
+        buf += text.decode(chunk, final=eof)
+
+    # Scan the top-level members for `"features": [`, tracking strings and
+    # nesting so keys of nested objects are not mistaken for it.
+    depth, pos = 0, 0
+    in_string = escaped = after_key = False
+    chars: list[str] = []
+    last_string: Optional[str] = None
+    while True:
+        if pos == len(buf):
+            if eof:
+                raise ValueError("Expected a GeoJSON FeatureCollection")
+            buf, pos = "", 0
+            fill()
+            continue
+        ch = buf[pos]
+        pos += 1
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                last_string = "".join(chars) if depth == 1 else None
+            elif len(chars) <= len("features"):
+                chars.append(ch)
+            continue
+        if ch.isspace():
+            continue
+        if after_key and ch == "[":
+            break
+        after_key = ch == ":" and depth == 1 and last_string == "features"
+        last_string = None
+        if ch == '"':
+            in_string, chars = True, []
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+    buf = buf[pos:]
+
+    while True:
+        buf = buf.lstrip(" \t\r\n,")
+        if not buf:
+            if eof:
+                raise ValueError("Unterminated FeatureCollection")
+            fill()
+            continue
+        if buf[0] == "]":
+            return
+        if buf[0] != "{":
+            raise ValueError("Features must be objects")
+        try:
+            obj, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            # Incomplete feature: read at least as much again (no quadratic retries).
+            if eof:
+                raise ValueError("Invalid GeoJSON")
+            fill(len(buf))
+            continue
+        yield obj
+        buf = buf[end:]
+
+
+def _geojson_lines(geometry: dict[str, Any]) -> Optional[list[Any]]:
+    kind = geometry.get("type")
+    if kind == "LineString":
+        return [geometry.get("coordinates")]
+    if kind == "MultiLineString":
+        return geometry.get("coordinates")
+    return None
+
+
+def iter_geojson(fileobj: IO[bytes], default_title: str, max_points: int) -> Iterator[ImportedRoute]:
+    routes = _Collector(default_title, max_points)
+    for feature in _iter_features(fileobj):
+        geometry = feature.get("geometry") or {}
+        props = feature.get("properties") or {}
+        if not isinstance(geometry, dict) or not isinstance(props, dict):
+            raise ValueError("Invalid GeoJSON feature")
+        title = props.get("title") or props.get("name")
+        description = props.get("description")
+        lines = _geojson_lines(geometry)
+        if lines is not None:
+            for line in lines if isinstance(lines, list) else ():
+                for pt in line if isinstance(line, list) else ():
+                    if not (isinstance(pt, list) and len(pt) >= 2):
+                        raise ValueError("Invalid GeoJSON LineString coordinates")
+                    routes.point(pt[0], pt[1])
+            if done := routes.route(str(title) if title else None, str(description) if description else None):
+                yield done
+        elif geometry.get("type") == "Point":
+            pt = geometry.get("coordinates")
+            if not (isinstance(pt, list) and len(pt) >= 2):
+                raise ValueError("Invalid GeoJSON Point coordinates")
+            label = props.get("label") or props.get("name")
+            icon = props.get("icon_type") or props.get("sym")
+            routes.waypoint(
+                pt[0], pt[1],
+                str(label) if label else None,
+                str(description) if description else None,
+                str(icon) if icon else None,
+            )
+    if done := routes.finish():
+        yield done
+
+
+_READERS = {".gpx": iter_gpx, ".kml": iter_kml, ".geojson": iter_geojson, ".json": iter_geojson}
+
+
+def iter_routes(name: str, fileobj: IO[bytes], max_points: int) -> Iterator[ImportedRoute]:
+    """Routes in a GPX, KML or GeoJSON file, chosen by extension."""
+    reader = _READERS.get(extension(name))
+    if reader is None:
+        raise ValueError(f"Unsupported file type: {extension(name) or name}")
+    title = os.path.splitext(os.path.basename(name))[0][:255] or "Imported route"
+    return reader(fileobj, title, max_points)
+
+
+def archive_members(archive: zipfile.ZipFile) -> Iterator[zipfile.ZipInfo]:
+    """Route files in a zip (or KMZ), skipping directories and macOS metadata."""
+    for info in archive.infolist():
+        base = os.path.basename(info.filename)
+        if info.is_dir() or info.filename.startswith("__MACOSX/") or base.startswith("."):
+            continue
+        if extension(base) in ROUTE_EXTENSIONS:
+            yield info
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+# Vectorized geodesic helpers over (n, 2) float64 arrays of [lon, lat] degrees.
+# Convert a coordinate list once with `coords_array` and pass the array around
+# instead of walking the Python list per segment.
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def coords_array(coords: Any) -> np.ndarray:
+    """Contiguous (n, 2) float64 array of [lon, lat] pairs.
+
+    Raises ValueError for ragged, non-numeric or non-2D input.
+    """
+    if isinstance(coords, np.ndarray):
+        arr = np.ascontiguousarray(coords, dtype=np.float64)
+    else:
+        try:
+            arr = np.array(coords, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid coordinate array")
+    if arr.ndim != 2 or arr.shape[1] != 2:
+        raise ValueError("Invalid coordinate array")
+    return arr
+
+
+def segment_lengths_km(arr: np.ndarray) -> np.ndarray:
+    """Haversine length of each of the n-1 segments."""
+    if len(arr) < 2:
+        return np.zeros(0)
+    rad = np.radians(arr)
+    lon, lat = rad[:, 0], rad[:, 1]
+    dlon = np.diff(lon)
+    dlat = np.diff(lat)
+    cos_lat = np.cos(lat)
+    h = np.sin(dlat / 2) ** 2 + cos_lat[:-1] * cos_lat[1:] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(h)))
+
+
+def total_distance_km(arr: np.ndarray) -> float:
+    return float(segment_lengths_km(arr).sum())
+
+
+def cumulative_distance_km(arr: np.ndarray) -> np.ndarray:
+    """Distance from the first vertex to each vertex (first element is 0)."""
+    out = np.zeros(len(arr))
+    if len(arr) > 1:
+        np.cumsum(segment_lengths_km(arr), out=out[1:])
+    return out
+
+
+def segment_bearings_deg(arr: np.ndarray) -> np.ndarray:
+    """Initial great-circle bearing of each segment, clockwise from north in [0, 360)."""
+    if len(arr) < 2:
+        return np.zeros(0)
+    rad = np.radians(arr)
+    lon, lat = rad[:, 0], rad[:, 1]
+    dlon = np.diff(lon)
+    lat1, lat2 = lat[:-1], lat[1:]
+    y = np.sin(dlon) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return np.degrees(np.arctan2(y, x)) % 360.0
+
+
+def bbox(arr: np.ndarray) -> tuple[float, float, float, float]:
+    """(minx, miny, maxx, maxy) of a non-empty coordinate array."""
+    lo = arr.min(axis=0)
+    hi = arr.max(axis=0)
+    return (float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1]))
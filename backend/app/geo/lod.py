@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import NamedTuple, Optional
+
+# Level-of-detail bands for route geometry. Each band stores a Douglas-Peucker
+# simplification (ST_Simplify) good for every zoom up to `max_zoom`; above the
+# last band the full-resolution line is served.
+
+
+class LodBand(NamedTuple):
+    max_zoom: int
+    column: str
+    decimals: int  # ST_AsGeoJSON maxdecimaldigits, enough for the band's resolution
+
+
+LOD_BANDS = (
+    LodBand(8, "geometry_lod_z8", 4),
+    LodBand(11, "geometry_lod_z11", 5),
+    LodBand(14, "geometry_lod_z14", 6),
+)
+
+# Precision used for arbitrary ?simplify= tolerances.
+SIMPLIFY_DECIMALS = 6
+
+
+def pixel_tolerance_deg(zoom: int) -> float:
+    """Width of one 256px-tile pixel at `zoom`, in degrees of longitude."""
+    return 360.0 / (256 * (1 << zoom))
+
+
+def band_for_zoom(zoom: int) -> Optional[LodBand]:
+    for band in LOD_BANDS:
+        if zoom <= band.max_zoom:
+            return band
+    return None
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional
+
+from app.core.settings import settings
+from app.geo.kernel import bbox as array_bbox, coords_array
+
+BBox = tuple[float, float, float, float]  # (minx, miny, maxx, maxy) in EPSG:4326
+TileKey = tuple[str, int, int, int]  # (layer, z, x, y)
+
+TILE_LAYERS = ("routes", "markers")
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+MAX_ZOOM = 22
+
+
+def tile_in_range(z: int, x: int, y: int) -> bool:
+    if not 0 <= z <= MAX_ZOOM:
+        return False
+    n = 1 << z
+    return 0 <= x < n and 0 <= y < n
+
+
+def tile_bounds(z: int, x: int, y: int) -> BBox:
+    """Lon/lat bounds of a Web Mercator (XYZ) tile."""
+    n = 1 << z
+
+    def lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y))
+
+
+def bbox_of_coordinates(coords: Iterable[list[float]]) -> Optional[BBox]:
+    coords = list(coords)
+    if not coords:
+        return None
+    return array_bbox(coords_array(coords))
+
+
+def _intersects(a: BBox, b: BBox) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _buffered(bounds: BBox) -> BBox:
+    # Features within TILE_BUFFER of the edge are clipped into the tile too.
+    pad_x = (bounds[2] - bounds[0]) * TILE_BUFFER / TILE_EXTENT
+    pad_y = (bounds[3] - bounds[1]) * TILE_BUFFER / TILE_EXTENT
+    return (bounds[0] - pad_x, bounds[1] - pad_y, bounds[2] + pad_x, bounds[3] + pad_y)
+
+
+def _cell_range(bbox: BBox, z: int) -> tuple[int, int, int, int]:
+    """Inclusive (x0, y0, x1, y1) of the zoom `z` tiles covering `bbox`."""
+    n = 1 << z
+
+    def col(lon: float) -> int:
+        return min(n - 1, max(0, int((lon + 180.0) / 360.0 * n)))
+
+    def row(lat: float) -> int:
+        lat = math.radians(min(85.0511, max(-85.0511, lat)))
+        return min(n - 1, max(0, int((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * n)))
+
+    return col(bbox[0]), row(bbox[3]), col(bbox[2]), row(bbox[1])
+
+
+class TileGenerations:
+    """Change counters per layer and area, in an mmap'd file shared by the workers on a host.
+
+    Areas are zoom GENERATION_ZOOM tiles. A cached tile is valid while the
+    counters of the areas under its buffered bounds haven't moved; tiles below
+    that zoom use one counter per layer, bumped by every write. Counters live in
+    `slots` uint64 slots by hash, so a collision only invalidates more than it
+    must. Bumps lock their slot with fcntl; reads don't lock (counters only grow).
+    """
+
+    GENERATION_ZOOM = 8
+    MAX_AREAS = 256  # larger extents bump the layer-wide counter instead
+    _SLOT = struct.Struct("<Q")
+
+    def __init__(self, path: str, slots: int = 65536):
+        self.slots = slots
+        size = slots * self._SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size != size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _offset(self, *parts: object) -> int:
+        # Must agree across processes, so not the builtin (salted) hash().
+        digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.slots * self._SLOT.size
+
+    def _read(self, offset: int) -> int:
+        return self._SLOT.unpack_from(self._map, offset)[0]
+
+    def _areas(self, layer: str, bbox: BBox) -> Optional[list[int]]:
+        x0, y0, x1, y1 = _cell_range(bbox, self.GENERATION_ZOOM)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > self.MAX_AREAS:
+            return None
+        return [self._offset(layer, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def version(self, key: TileKey) -> int:
+        layer, z, x, y = key
+        version = self._read(self._offset(layer, "all"))
+        if z < self.GENERATION_ZOOM:
+            return version + self._read(self._offset(layer, "low"))
+        areas = self._areas(layer, _buffered(tile_bounds(z, x, y)))
+        return version + sum(self._read(offset) for offset in areas or ())
+
+    def bump(self, layer: str, bbox: BBox) -> None:
+        areas = self._areas(layer, bbox)
+        offsets = {self._offset(layer, "all")} if areas is None else {*areas, self._offset(layer, "low")}
+        for offset in sorted(offsets):
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self._SLOT.size, offset)
+            try:
+                self._SLOT.pack_into(self._map, offset, self._read(offset) + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self._SLOT.size, offset)
+
+
+def default_generations_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "bikeroutes-tilegen")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class TileCache:
+    """Size-bounded LRU of encoded vector tiles, per worker process.
+
+    Entries carry the `TileGenerations` version read before the tile was
+    rendered; a write anywhere under a tile (in any worker on the host) moves
+    the version, and the entry is no longer served. `ttl_seconds` bounds how
+    long a tile can outlive a write made on another host.
+
+    With `directory` set, tile bytes live on disk under a subdirectory per
+    worker and only their sizes are kept in memory; directories of workers
+    that are gone are removed at startup. Either way each worker caps its
+    tiles at `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        directory: str | None = None,
+        ttl_seconds: float = 3600,
+        generations: Optional[TileGenerations] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._generations = generations
+        self.directory = None
+        if directory:
+            root = Path(directory)
+            root.mkdir(parents=True, exist_ok=True)
+            for child in root.iterdir():
+                if child.name.isdigit() and (int(child.name) == os.getpid() or not _pid_alive(int(child.name))):
+                    shutil.rmtree(child, ignore_errors=True)
+            self.directory = root / str(os.getpid())
+        # key -> (expires at, version, bytes or size on disk)
+        self._entries: OrderedDict[TileKey, tuple[float, int, bytes | int]] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generations(self) -> TileGenerations:
+        # Created on first use so importing the app doesn't touch /dev/shm.
+        if self._generations is None:
+            self._generations = TileGenerations(settings.tile_cache_generations_path or default_generations_path())
+        return self._generations
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def _path(self, key: TileKey) -> Path:
+        layer, z, x, y = key
+        assert self.directory is not None
+        return self.directory / layer / str(z) / str(x) / f"{y}.pbf"
+
+    def version(self, key: TileKey) -> int:
+        """Read before rendering a tile, and pass to `get` and `put`."""
+        return self.generations.version(key)
+
+    def get(self, key: TileKey, version: int) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic() or entry[1] != version:
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        data = entry[2]
+        if isinstance(data, int):
+            try:
+                data = self._path(key).read_bytes()
+            except FileNotFoundError:
+                self._drop(key)
+                self.misses += 1
+                return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: TileKey, data: bytes, version: int) -> None:
+        if len(data) > self.max_bytes or self.ttl_seconds <= 0:
+            return
+        self._drop(key)
+        stored: bytes | int = data
+        if self.directory is not None:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            stored = len(data)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, version, stored)
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: TileKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= entry[2] if isinstance(entry[2], int) else len(entry[2])
+        if self.directory is not None:
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def invalidate_bbox(self, bbox: BBox, layers: Iterable[str] = TILE_LAYERS) -> int:
+        """Invalidate every tile of `layers` whose (buffered) bounds touch `bbox`.
+
+        Bumps the shared generations, which reaches the other workers, and
+        drops this worker's matching entries right away to free their space.
+        """
+        layers = set(layers)
+        for layer in layers:
+            self.generations.bump(layer, bbox)
+        stale = [
+            key
+            for key in self._entries
+            if key[0] in layers and _intersects(_buffered(tile_bounds(*key[1:])), bbox)
+        ]
+        for key in stale:
+            self._drop(key)
+        return len(stale)
+
+    def clear(self) -> None:
+        for key in list(self._entries):
+            self._drop(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+tile_cache = TileCache(
+    max_bytes=settings.tile_cache_max_bytes,
+    directory=settings.tile_cache_dir or None,
+    ttl_seconds=settings.tile_cache_ttl_seconds,
+)
+
+
+def invalidate_tiles(*bboxes: Optional[BBox], layers: Iterable[str] = TILE_LAYERS) -> None:
+    layers = tuple(layers)
+    for bbox in bboxes:
+        if bbox is not None:
+            tile_cache.invalidate_bbox(bbox, layers)
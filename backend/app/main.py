@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+import logging
+import math
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.errors import RateLimitExceeded
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from app.api.cache import cache_stats, response_cache
+from app.api.compression import CompressionMiddleware, compressed_cache
+from app.api.metrics import router as metrics_router
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.router import api_router
+from app.auth.passwords import password_hasher
+from app.core.metrics import MetricsMiddleware
 from app.core.settings import settings
-from app.core.rate_limit import limiter, RateLimits
+from app.core.rate_limit import limiter, RateLimitExceeded, RateLimits
+from app.db.session import dispose_engine, get_engine, pool_status, warm_pool
+
+logger = logging.getLogger(__name__)
 
 
 def _cors_origins_list() -> list[str]:
@@ -20,13 +30,24 @@ def _cors_origins_list() -> list[str]:
     return [o.strip() for o in raw.split(",") if o.strip()]
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_engine()
+    try:
+        await warm_pool(settings.db_pool_warm_size)
+    except Exception as e:
+        # Connections are opened lazily anyway; don't refuse to start.
+        logger.warning("database pool warm-up failed: %s", e)
+    yield
+    await dispose_engine()
+    password_hasher.shutdown()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="BikeRoutes API")
+    app = FastAPI(title="BikeRoutes API", lifespan=lifespan)
     
-    # Add rate limiter
     app.state.limiter = limiter
-    app.add_middleware(SlowAPIMiddleware)
-    
+
     origins = _cors_origins_list()
     if origins:
         app.add_middleware(
@@ -35,20 +56,41 @@ def create_app() -> FastAPI:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=[NEXT_CURSOR_HEADER],
         )
     
+    if settings.compression_enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            min_size=settings.compression_min_size,
+            media_types=settings.compression_media_types.split(","),
+            levels={
+                "gzip": settings.compression_gzip_level,
+                "br": settings.compression_brotli_quality,
+                "zstd": settings.compression_zstd_level,
+            },
+            cache=compressed_cache,
+        )
+
+    if settings.metrics_enabled:
+        # Added last so it is outermost and times the whole stack.
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
+
     app.include_router(api_router, prefix="/api")
     
     # Rate limit error handler
     @app.exception_handler(RateLimitExceeded)
     async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+        retry_after = max(1, math.ceil(exc.retry_after))
         return JSONResponse(
             status_code=429,
             content={
                 "error": "rate_limit_exceeded",
                 "message": "Too many requests. Please try again later.",
-                "retry_after": getattr(exc, "retry_after", 60)
-            }
+                "retry_after": retry_after
+            },
+            headers={"Retry-After": str(retry_after)},
         )
     
     return app
@@ -58,8 +100,13 @@ app = create_app()
 
 
 @app.api_route("/healthz", methods=["GET", "HEAD"])
-def healthz() -> dict[str, str]:
-    return {"status": "ok", "env": settings.app_env}
+def healthz() -> dict:
+    return {
+        "status": "ok",
+        "env": settings.app_env,
+        "db_pool": pool_status(),
+        "response_cache": cache_stats(response_cache),
+    }
 
 
 @app.get("/api/rate-limits")
@@ -72,7 +119,11 @@ def get_rate_limits(request: Request) -> dict:
         "default": RateLimits.DEFAULT,
         "routes_list": RateLimits.ROUTES_LIST,
         "route_detail": RateLimits.ROUTE_DETAIL,
+        "tiles": RateLimits.TILES,
+        "export": RateLimits.EXPORT,
+        "shared": RateLimits.SHARED,
         "create": RateLimits.CREATE,
+        "import": RateLimits.IMPORT,
         "update": RateLimits.UPDATE,
         "delete": RateLimits.DELETE,
     }
@@ -28,7 +28,10 @@ class Marker(Base):
         index=True,
     )
 
-    geometry: Mapped[object] = mapped_column(Geometry(geometry_type="POINT", srid=4326), nullable=False)
+    # Deferred like Route.geometry: serializers read it through ST_AsGeoJSON.
+    geometry: Mapped[object] = mapped_column(
+        Geometry(geometry_type="POINT", srid=4326), nullable=False, deferred=True
+    )
 
     label: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
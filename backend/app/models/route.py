@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Optional
 
 from geoalchemy2 import Geometry
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, String, Text
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, LargeBinary, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -15,6 +15,10 @@ from app.db.base import Base
 
 class Route(Base):
     __tablename__ = "routes"
+    __table_args__ = (
+        # Keyset pagination of a user's routes on (created_at, id).
+        Index("ix_routes_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -30,8 +34,22 @@ class Route(Base):
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
+    # Deferred: reads go through ST_AsGeoJSON, so loading the raw WKB with every
+    # Route row would only double the transfer.
     geometry: Mapped[object] = mapped_column(
-        Geometry(geometry_type="LINESTRING", srid=4326), nullable=False
+        Geometry(geometry_type="LINESTRING", srid=4326), nullable=False, deferred=True
+    )
+
+    # Simplified copies for low zooms (see app.geo.lod), refreshed on every
+    # geometry write.
+    geometry_lod_z8: Mapped[Optional[object]] = mapped_column(
+        Geometry(geometry_type="LINESTRING", srid=4326, spatial_index=False), nullable=True, deferred=True
+    )
+    geometry_lod_z11: Mapped[Optional[object]] = mapped_column(
+        Geometry(geometry_type="LINESTRING", srid=4326, spatial_index=False), nullable=True, deferred=True
+    )
+    geometry_lod_z14: Mapped[Optional[object]] = mapped_column(
+        Geometry(geometry_type="LINESTRING", srid=4326, spatial_index=False), nullable=True, deferred=True
     )
 
     distance_km: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
@@ -42,6 +60,11 @@ class Route(Base):
     share_token: Mapped[Optional[str]] = mapped_column(
         String(64), nullable=True, unique=True
     )
+    # Gzipped route JSON rendered when the share link was minted; the share
+    # endpoint serves it as is. share_etag is a digest of the uncompressed body.
+    share_snapshot: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    share_etag: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    shared_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
@@ -52,12 +75,19 @@ class Route(Base):
         server_default=func.now(),
         onupdate=func.now(),
     )
+    # Last marker insert/update/delete on this route; with updated_at it
+    # versions the full route representation (ETag / Last-Modified).
+    markers_updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
 
     markers: Mapped[list["Marker"]] = relationship(
         back_populates="route",
         cascade="all, delete-orphan",
         order_by="Marker.order_index",
-        lazy="selectin",
+        # Markers are fetched in batch by the serializers; the FK cascades deletes.
+        lazy="select",
+        passive_deletes=True,
     )
 
 
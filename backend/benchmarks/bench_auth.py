@@ -0,0 +1,32 @@
+"""Per-request auth work: access tokens and password verification."""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+from app.auth.jwt import create_access_token, decode_access_token
+from app.auth.passwords import hash_password, verify_password
+
+TOKEN_COUNTS = (1, 100, 10_000)
+USER_IDS = [str(uuid.UUID(int=i)) for i in range(max(TOKEN_COUNTS))]
+
+
+@pytest.mark.parametrize("count", TOKEN_COUNTS, ids=lambda n: f"{n}t")
+def test_create_access_token(benchmark, count):
+    user_ids = USER_IDS[:count]
+    tokens = benchmark(lambda: [create_access_token(u) for u in user_ids])
+    assert len(tokens) == count
+
+
+@pytest.mark.parametrize("count", TOKEN_COUNTS, ids=lambda n: f"{n}t")
+def test_decode_access_token(benchmark, count):
+    tokens = [create_access_token(u) for u in USER_IDS[:count]]
+    payloads = benchmark(lambda: [decode_access_token(t) for t in tokens])
+    assert payloads[-1].sub == USER_IDS[count - 1]
+
+
+def test_verify_password(benchmark):
+    # At the configured PASSWORD_HASH_ITERATIONS; each call takes a worker for this long.
+    stored = hash_password("correct horse battery staple")
+    assert benchmark.pedantic(verify_password, ("correct horse battery staple", stored), rounds=5)
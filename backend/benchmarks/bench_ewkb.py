@@ -0,0 +1,76 @@
+"""Compare EWKB geometry ingest with the WKT string path it replaced.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_ewkb
+
+CPU time, peak Python allocation while building the bind value, and the size
+of the parameter sent to PostGIS (GeoAlchemy2 sends EWKB as hex). The pytest
+suite runs both builders too, so `benchmarks.compare` can track them.
+"""
+from __future__ import annotations
+
+import timeit
+import tracemalloc
+from typing import Any
+
+from geoalchemy2.elements import WKTElement
+
+from app.geo.geojson import _is_number, linestring_wkb_from_geojson
+from benchmarks.bench_geodesic import synthetic_track
+
+
+def legacy_linestring_wkt(geometry: dict[str, Any], *, srid: int = 4326) -> WKTElement:
+    """`linestring_wkt_from_geojson` as it was before EWKB ingest."""
+    if geometry.get("type") != "LineString":
+        raise ValueError("Expected GeoJSON LineString geometry")
+    coords = geometry.get("coordinates")
+    if not (isinstance(coords, list) and len(coords) >= 2):
+        raise ValueError("Invalid GeoJSON LineString coordinates")
+    parts: list[str] = []
+    for pt in coords:
+        if not (isinstance(pt, list) and len(pt) == 2 and _is_number(pt[0]) and _is_number(pt[1])):
+            raise ValueError("Invalid GeoJSON LineString coordinates")
+        parts.append(f"{float(pt[0])} {float(pt[1])}")
+    return WKTElement(f"LINESTRING({', '.join(parts)})", srid=srid)
+
+
+def test_legacy_linestring_wkt(benchmark, linestring):
+    assert benchmark(legacy_linestring_wkt, linestring).data.startswith("LINESTRING(")
+
+
+def test_linestring_wkb_hex(benchmark, linestring):
+    # Building the element and its hex form, as GeoAlchemy2 binds it.
+    assert benchmark(lambda: linestring_wkb_from_geojson(linestring).desc).startswith("01020000")
+
+
+def _peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    print(
+        f"{'vertices':>9} {'wkt ms':>9} {'ewkb ms':>9} {'speedup':>8} "
+        f"{'wkt peak KiB':>13} {'ewkb peak KiB':>14} {'wkt param KiB':>14} {'ewkb param KiB':>15}"
+    )
+    for n in (10, 100, 1_000, 10_000, 100_000):
+        geometry = {"type": "LineString", "coordinates": synthetic_track(n)}
+        wkt = lambda: legacy_linestring_wkt(geometry).data  # noqa: E731
+        ewkb = lambda: linestring_wkb_from_geojson(geometry).desc  # noqa: E731
+        number = max(1, 20_000 // n)
+        t_wkt = min(timeit.repeat(wkt, number=number, repeat=5)) / number
+        t_ewkb = min(timeit.repeat(ewkb, number=number, repeat=5)) / number
+        print(
+            f"{n:>9} {t_wkt * 1e3:>9.3f} {t_ewkb * 1e3:>9.3f} {t_wkt / t_ewkb:>7.1f}x "
+            f"{_peak_bytes(wkt) / 1024:>13.1f} {_peak_bytes(ewkb) / 1024:>14.1f} "
+            f"{len(wkt()) / 1024:>14.1f} {len(ewkb()) / 1024:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""Geometry ingest: GeoJSON validation/EWKB encoding and route distance."""
+from __future__ import annotations
+
+from app.geo.geojson import linestring_coords_from_geojson, linestring_wkb_from_geojson
+from app.geo.kernel import total_distance_km
+
+
+def test_linestring_wkb_from_geojson(benchmark, linestring):
+    wkb = benchmark(linestring_wkb_from_geojson, linestring)
+    assert wkb.extended
+
+
+def test_distance_km_from_linestring_geojson(benchmark, linestring):
+    # What create_route runs on the payload.
+    assert benchmark(lambda: total_distance_km(linestring_coords_from_geojson(linestring))) > 0
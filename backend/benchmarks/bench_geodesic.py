@@ -0,0 +1,70 @@
+"""Compare the vectorized geodesic kernel with the per-segment haversine loop.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_geodesic
+"""
+from __future__ import annotations
+
+import random
+import timeit
+
+from app.geo.kernel import coords_array, total_distance_km
+
+
+def _haversine_km(a: list[float], b: list[float]) -> float:
+    # a/b are [lon, lat]
+    import math
+
+    R = 6371.0
+    lon1, lat1 = math.radians(a[0]), math.radians(a[1])
+    lon2, lat2 = math.radians(b[0]), math.radians(b[1])
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * R * math.asin(min(1.0, math.sqrt(h)))
+
+
+def legacy_distance_km(coords: list) -> float:
+    """The per-segment loop route distances were computed with before the kernel."""
+    total = 0.0
+    for i in range(1, len(coords)):
+        a = coords[i - 1]
+        b = coords[i]
+        if not (isinstance(a, list) and isinstance(b, list) and len(a) == 2 and len(b) == 2):
+            continue
+        try:
+            total += _haversine_km([float(a[0]), float(a[1])], [float(b[0]), float(b[1])])
+        except Exception:
+            continue
+    return float(total)
+
+
+def kernel_distance_km(coords: list) -> float:
+    return total_distance_km(coords_array(coords))
+
+
+def synthetic_track(n: int, seed: int = 1) -> list[list[float]]:
+    rng = random.Random(seed)
+    lon, lat = -77.04, -12.05
+    coords = []
+    for _ in range(n):
+        lon += rng.uniform(-0.0005, 0.0005)
+        lat += rng.uniform(-0.0005, 0.0005)
+        coords.append([lon, lat])
+    return coords
+
+
+def main() -> None:
+    print(f"{'vertices':>9} {'legacy ms':>10} {'kernel ms':>10} {'speedup':>8} {'abs diff km':>12}")
+    for n in (10, 100, 1_000, 10_000, 50_000, 100_000):
+        coords = synthetic_track(n)
+        number = max(1, 20_000 // n)
+        legacy = min(timeit.repeat(lambda: legacy_distance_km(coords), number=number, repeat=5)) / number
+        kernel = min(timeit.repeat(lambda: kernel_distance_km(coords), number=number, repeat=5)) / number
+        diff = abs(legacy_distance_km(coords) - kernel_distance_km(coords))
+        print(f"{n:>9} {legacy * 1e3:>10.3f} {kernel * 1e3:>10.3f} {legacy / kernel:>7.1f}x {diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare two pytest-benchmark JSON files and fail on regressions.
+
+Run from `backend/`:
+
+    python -m pytest -c benchmarks/pytest.ini --benchmark-json=.benchmarks/baseline.json   # on main
+    python -m pytest -c benchmarks/pytest.ini --benchmark-json=.benchmarks/current.json    # on the branch
+    python -m benchmarks.compare .benchmarks/baseline.json .benchmarks/current.json --threshold 0.15
+
+Benchmarks are matched by name and compared on the median, which shrugs off
+the odd slow round. Exits 1 when any benchmark matching `--track` got slower
+than the threshold allows. Only compare runs made on the same machine.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import sys
+from pathlib import Path
+
+
+def load_medians(path: Path) -> dict[str, float]:
+    data = json.loads(path.read_text())
+    return {b["fullname"]: b["stats"]["median"] for b in data["benchmarks"]}
+
+
+def compare(
+    baseline: dict[str, float], current: dict[str, float], threshold: float, track: list[str]
+) -> tuple[list[tuple[str, float, float, float]], list[str]]:
+    """(name, baseline, current, change) rows for common benchmarks, and the tracked ones that regressed."""
+    rows = []
+    regressed = []
+    for name in sorted(baseline.keys() & current.keys()):
+        change = current[name] / baseline[name] - 1
+        rows.append((name, baseline[name], current[name], change))
+        if change > threshold and any(fnmatch.fnmatch(name, pattern) for pattern in track):
+            regressed.append(name)
+    return rows, regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown, 0.15 = 15%% (default)")
+    parser.add_argument(
+        "--track", action="append", default=None, metavar="GLOB",
+        help="benchmark names that can fail the run (repeatable; default: all)",
+    )
+    args = parser.parse_args()
+
+    baseline, current = load_medians(args.baseline), load_medians(args.current)
+    rows, regressed = compare(baseline, current, args.threshold, args.track or ["*"])
+
+    width = max((len(name) for name, *_ in rows), default=4)
+    print(f"{'benchmark':<{width}} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, before, after, change in rows:
+        flag = "  REGRESSED" if name in regressed else ""
+        print(f"{name:<{width}} {before * 1e3:>12.4f} {after * 1e3:>12.4f} {change:>+8.1%}{flag}")
+    for name in sorted(baseline.keys() - current.keys()):
+        print(f"{name}: missing from current run")
+
+    if regressed:
+        print(f"\n{len(regressed)} benchmark(s) slower than baseline by more than {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
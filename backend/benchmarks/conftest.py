@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.bench_geodesic import synthetic_track
+
+pytest.importorskip("pytest_benchmark")
+
+VERTEX_COUNTS = (10, 100, 1_000, 10_000, 100_000)
+
+
+@pytest.fixture(scope="session", params=VERTEX_COUNTS, ids=lambda n: f"{n}v")
+def linestring(request) -> dict:
+    """A GeoJSON LineString random walk with the parametrized vertex count."""
+    return {"type": "LineString", "coordinates": synthetic_track(request.param)}
@@ -0,0 +1,8 @@
+"""Offline load testing: seed a synthetic city, then drive the API with a request mix.
+
+Run from `backend/` against the database in DATABASE_URL:
+
+    python -m loadtest.seed --users 200 --routes 20
+    python -m loadtest.run --duration 60 --concurrency 32            # in-process ASGI
+    python -m loadtest.run --url http://127.0.0.1:8000 --duration 60 # a running uvicorn
+"""
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import math
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from app.geo.importers import ImportedMarker, ImportedRoute
+
+# Deterministic synthetic routes around a city centre. Lengths and vertex
+# counts are log-normal (most rides are short and sparse, a few are long
+# recorded tracks); marker counts are Poisson.
+
+EARTH_KM_PER_DEG = 111.32
+ICONS = ("default", "rest", "water", "food", "repair", "viewpoint")
+
+
+class City(NamedTuple):
+    lon: float = -77.04
+    lat: float = -12.05
+    radius_km: float = 15.0
+    median_km: float = 12.0
+    median_vertices: int = 300
+    max_vertices: int = 100_000
+    markers_per_route: float = 3.0
+    public_share: float = 0.3
+
+
+def _walk(rng: np.random.Generator, city: City, length_km: float, vertices: int) -> np.ndarray:
+    """A random walk of `vertices` points and about `length_km`, starting inside the city."""
+    r = city.radius_km * math.sqrt(rng.random())
+    theta = rng.uniform(0, 2 * math.pi)
+    heading = rng.uniform(0, 2 * math.pi) + np.cumsum(rng.normal(0, 0.15, vertices - 1))
+    step = length_km / (vertices - 1)
+    dx = np.concatenate([[r * math.cos(theta)], step * np.cos(heading)]).cumsum()
+    dy = np.concatenate([[r * math.sin(theta)], step * np.sin(heading)]).cumsum()
+    lat = np.clip(city.lat + dy / EARTH_KM_PER_DEG, -89.0, 89.0)
+    lon = city.lon + dx / (EARTH_KM_PER_DEG * np.cos(np.radians(lat)))
+    return np.column_stack([lon, lat])
+
+
+def synthetic_route(rng: np.random.Generator, city: City, index: int = 0) -> ImportedRoute:
+    length_km = float(rng.lognormal(math.log(city.median_km), 0.6))
+    vertices = int(np.clip(rng.lognormal(math.log(city.median_vertices), 1.0), 2, city.max_vertices))
+    coords = _walk(rng, city, length_km, vertices)
+    markers = [
+        ImportedMarker(float(lon), float(lat), f"Stop {j + 1}", None, str(rng.choice(ICONS)))
+        for j, (lon, lat) in enumerate(coords[np.sort(rng.integers(0, vertices, rng.poisson(city.markers_per_route)))])
+    ]
+    return ImportedRoute(f"Synthetic ride {index + 1}", None, coords, markers)
+
+
+def synthetic_routes(seed: int, city: City, count: int) -> Iterator[ImportedRoute]:
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        yield synthetic_route(rng, city, i)
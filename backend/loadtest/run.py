@@ -0,0 +1,233 @@
+"""Drive the API with a weighted request mix and report latency per endpoint.
+
+    python -m loadtest.run --duration 60 --concurrency 32 [--url http://127.0.0.1:8000]
+    python -m loadtest.run --mix list=50,detail=40,create=10 --json results.json
+
+Without `--url` the app runs in this process over ASGI (rate limiting off,
+as in the tests), which measures the app and database without socket and
+server overhead. Each worker logs in as one of the seeded riders and keeps its
+own tokens and route ids.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+import numpy as np
+
+# The in-process app is hammered from one address; read before settings load.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from loadtest.dataset import City, synthetic_route
+from loadtest.seed import LOADTEST_PASSWORD, rider_email
+
+DEFAULT_MIX = {"list": 30, "detail": 35, "create": 5, "update": 5, "marker": 10, "refresh": 10, "login": 5}
+
+# Mix name -> Rider method.
+OPERATIONS = {
+    "list": "list_routes",
+    "detail": "route_detail",
+    "create": "create_route",
+    "update": "update_route",
+    "marker": "add_marker",
+    "refresh": "refresh",
+    "login": "login",
+}
+
+
+class Rider:
+    """One simulated user: a client session plus what it has learnt so far."""
+
+    def __init__(self, client: httpx.AsyncClient, index: int, seed: int):
+        self.client = client
+        self.email = rider_email(index)
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        self.headers: dict[str, str] = {}
+        self.refresh_token = ""
+        self.route_ids: list[str] = []
+
+    def _session(self, response: httpx.Response) -> httpx.Response:
+        if response.status_code == 200:
+            data = response.json()
+            self.headers = {"Authorization": f"Bearer {data['access_token']}"}
+            self.refresh_token = data["refresh_token"]
+        return response
+
+    async def login(self) -> httpx.Response:
+        return self._session(
+            await self.client.post("/api/auth/login", json={"email": self.email, "password": LOADTEST_PASSWORD})
+        )
+
+    async def refresh(self) -> httpx.Response:
+        return self._session(await self.client.post("/api/auth/refresh", json={"refresh_token": self.refresh_token}))
+
+    async def list_routes(self) -> httpx.Response:
+        response = await self.client.get("/api/routes", params={"limit": 20}, headers=self.headers)
+        if response.status_code == 200 and not self.route_ids:
+            self.route_ids = [r["id"] for r in response.json()]
+        return response
+
+    async def route_detail(self) -> httpx.Response:
+        if not self.route_ids:
+            return await self.list_routes()
+        return await self.client.get(f"/api/routes/{self.rng.choice(self.route_ids)}", headers=self.headers)
+
+    async def create_route(self) -> httpx.Response:
+        route = synthetic_route(self.np_rng, City(max_vertices=5_000))
+        response = await self.client.post(
+            "/api/routes",
+            json={
+                "title": route.title,
+                "geometry": {"type": "LineString", "coordinates": route.coordinates.tolist()},
+            },
+            headers=self.headers,
+        )
+        if response.status_code == 201:
+            self.route_ids.append(response.json()["id"])
+        return response
+
+    async def update_route(self) -> httpx.Response:
+        if not self.route_ids:
+            return await self.list_routes()
+        return await self.client.put(
+            f"/api/routes/{self.rng.choice(self.route_ids)}",
+            json={"title": f"Renamed {self.rng.randrange(10**6)}"},
+            headers=self.headers,
+        )
+
+    async def add_marker(self) -> httpx.Response:
+        if not self.route_ids:
+            return await self.list_routes()
+        return await self.client.post(
+            f"/api/routes/{self.rng.choice(self.route_ids)}/markers",
+            json={
+                "geometry": {"type": "Point", "coordinates": [-77.04 + self.rng.uniform(-0.1, 0.1), -12.05]},
+                "label": "Load test stop",
+            },
+            headers=self.headers,
+        )
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.statuses: dict[str, dict[int, int]] = {}
+
+    async def timed(self, name: str, call: Callable[[], Awaitable[httpx.Response]]) -> None:
+        start = time.perf_counter()
+        try:
+            status = (await call()).status_code
+        except httpx.HTTPError:
+            status = 0  # connection-level failure
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+        self.statuses.setdefault(name, {}).setdefault(status, 0)
+        self.statuses[name][status] += 1
+        if not 200 <= status < 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed: float) -> list[dict[str, Any]]:
+        rows = []
+        everything = [t for ts in self.latencies.values() for t in ts]
+        for name, ts in sorted(self.latencies.items()) + [("TOTAL", everything)]:
+            if not ts:
+                continue
+            p50, p95, p99 = np.percentile(np.array(ts) * 1e3, [50, 95, 99])
+            errors = sum(self.errors.values()) if name == "TOTAL" else self.errors.get(name, 0)
+            rows.append(
+                {
+                    "endpoint": name,
+                    "requests": len(ts),
+                    "rps": len(ts) / elapsed,
+                    "p50_ms": p50,
+                    "p95_ms": p95,
+                    "p99_ms": p99,
+                    "error_rate": errors / len(ts),
+                    "statuses": self.statuses.get(name, {}),
+                }
+            )
+        return rows
+
+
+def parse_mix(raw: Optional[str]) -> dict[str, int]:
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+async def _worker(rider: Rider, recorder: Recorder, mix: dict[str, int], deadline: float) -> None:
+    names, weights = list(mix), list(mix.values())
+    await recorder.timed("login", rider.login)
+    await recorder.timed("list", rider.list_routes)
+    while time.perf_counter() < deadline:
+        name = rider.rng.choices(names, weights)[0]
+        await recorder.timed(name, getattr(rider, OPERATIONS[name]))
+
+
+def _client(url: Optional[str], concurrency: int) -> httpx.AsyncClient:
+    if url:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        return httpx.AsyncClient(base_url=url, limits=limits, timeout=60)
+    from app.main import create_app
+
+    # Unhandled app errors count as 500s instead of stopping the worker.
+    transport = httpx.ASGITransport(app=create_app(), raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60)
+
+
+async def run(url: Optional[str], users: int, concurrency: int, duration: float, mix: dict[str, int], seed: int):
+    recorder = Recorder()
+    async with _client(url, concurrency) as client:
+        riders = [Rider(client, i % users, seed * 7919 + i) for i in range(concurrency)]
+        start = time.perf_counter()
+        await asyncio.gather(*(_worker(r, recorder, mix, start + duration) for r in riders))
+        elapsed = time.perf_counter() - start
+    if not url:
+        from app.db.session import dispose_engine
+
+        await dispose_engine()
+    return recorder.report(elapsed)
+
+
+def print_report(rows: list[dict[str, Any]]) -> None:
+    print(f"{'endpoint':<10} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for r in rows:
+        print(
+            f"{r['endpoint']:<10} {r['requests']:>9} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['error_rate']:>7.1%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Drive the API with a weighted request mix.")
+    parser.add_argument("--url", help="base URL of a running server (default: in-process ASGI)")
+    parser.add_argument("--users", type=int, default=100, help="seeded riders to log in as")
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous simulated riders")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--mix", help=f"name=weight,... (default {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.url, args.users, args.concurrency, args.duration, parse_mix(args.mix), args.seed))
+    print_report(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
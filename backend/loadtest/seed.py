@@ -0,0 +1,100 @@
+"""Seed the database with a synthetic city of riders, routes and markers.
+
+    python -m loadtest.seed --users 200 --routes 20 [--reset]
+
+Riders are `rider{i}@loadtest.invalid` with password LOADTEST_PASSWORD. Routes
+go through the bulk import insert path, so LODs and marker keys are the same
+as for real data. Riders that already exist are left alone, so a second run
+only adds the missing ones; use --reset to seed everyone again.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.bulk import insert_imported_routes
+from app.auth.models import User
+from app.auth.passwords import hash_password
+from app.db.session import AsyncSessionLocal, dispose_engine, get_engine
+from loadtest.dataset import City, synthetic_routes
+
+LOADTEST_DOMAIN = "loadtest.invalid"
+LOADTEST_PASSWORD = "loadtest-password"
+
+
+def rider_email(i: int) -> str:
+    return f"rider{i}@{LOADTEST_DOMAIN}"
+
+
+async def seed(users: int, routes_per_user: int, city: City, seed: int, reset: bool) -> None:
+    get_engine()
+    # One hash for everyone: logins cost what real ones do, seeding doesn't.
+    password_hash = hash_password(LOADTEST_PASSWORD)
+    async with AsyncSessionLocal() as db:
+        if reset:
+            await db.execute(delete(User).where(User.email.like(f"%@{LOADTEST_DOMAIN}")))
+            await db.commit()
+
+        start = time.perf_counter()
+        totals = [0, 0, 0]  # routes, vertices, markers
+        skipped = 0
+        for i in range(users):
+            user_id = await db.scalar(
+                insert(User)
+                .values(id=uuid.uuid4(), email=rider_email(i), password_hash=password_hash)
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User.id)
+            )
+            if user_id is None:
+                skipped += 1
+                continue
+            routes = list(synthetic_routes(seed * 1_000_003 + i, city, routes_per_user))
+            # Per rider, so riders added by a later run match a fresh seed.
+            public = np.random.default_rng([seed, i]).random(len(routes)) < city.public_share
+            for is_public in (False, True):
+                batch = [r for r, p in zip(routes, public) if p == is_public]
+                if batch:
+                    await insert_imported_routes(db, user_id, batch, is_public)
+            await db.commit()
+            totals[0] += len(routes)
+            totals[1] += sum(len(r.coordinates) for r in routes)
+            totals[2] += sum(len(r.markers) for r in routes)
+            if (i + 1) % 50 == 0 or i + 1 == users:
+                print(f"{i + 1}/{users} users, {totals[0]} routes, {totals[1]} vertices, {totals[2]} markers")
+        if skipped:
+            print(f"{skipped} riders already existed and were left as they are (use --reset to seed them again)")
+        print(f"seeded in {time.perf_counter() - start:.1f}s")
+    await dispose_engine()
+
+
+def main() -> None:
+    defaults = City()
+    parser = argparse.ArgumentParser(description="Seed a synthetic city for load tests.")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--routes", type=int, default=20, help="routes per user")
+    parser.add_argument("--median-km", type=float, default=defaults.median_km)
+    parser.add_argument("--median-vertices", type=int, default=defaults.median_vertices)
+    parser.add_argument("--max-vertices", type=int, default=defaults.max_vertices)
+    parser.add_argument("--markers", type=float, default=defaults.markers_per_route, help="mean markers per route")
+    parser.add_argument("--public-share", type=float, default=defaults.public_share)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reset", action="store_true", help="delete earlier load test users first")
+    args = parser.parse_args()
+    city = defaults._replace(
+        median_km=args.median_km,
+        median_vertices=args.median_vertices,
+        max_vertices=args.max_vertices,
+        markers_per_route=args.markers,
+        public_share=args.public_share,
+    )
+    asyncio.run(seed(args.users, args.routes, city, args.seed, args.reset))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,8 @@ from __future__ import annotations
 import asyncio
 import os
 import uuid
-from typing import AsyncGenerator
+from contextlib import contextmanager
+from typing import AsyncGenerator, Iterator, Optional
 
 import pytest
 import pytest_asyncio
@@ -11,6 +12,11 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+# Fixtures register many users from one client address; rate limiting has its
+# own tests.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from app.core.metrics import QueryStats, count_queries, instrument_engine, repeated_statements
 from app.main import create_app
 from app.db.base import Base
 
@@ -21,6 +27,7 @@ TEST_DATABASE_URL = os.getenv(
 )
 
 engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+instrument_engine(engine)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -69,3 +76,76 @@ async def auth_client(client) -> tuple[AsyncClient, dict]:
     )
     data = response.json()
     return client, {"Authorization": f"Bearer {data['access_token']}"}
+
+
+DEFAULT_LINE = [[-77.0, -12.0], [-77.1, -12.1]]
+
+
+@pytest.fixture
+def make_route(auth_client):
+    """Factory creating routes owned by the `auth_client` user.
+
+    Returns the created route as JSON, with `markers` markers (labelled M0,
+    M1, ... and placed on the line's vertices) in its "markers" list.
+
+        route = await make_route(markers=2, title="Lunch ride", is_public=True)
+    """
+    client, headers = auth_client
+
+    async def make(coords: Optional[list] = None, markers: int = 0, **fields) -> dict:
+        coords = coords or DEFAULT_LINE
+        response = await client.post(
+            "/api/routes",
+            json={"title": "Test route", **fields, "geometry": {"type": "LineString", "coordinates": coords}},
+            headers=headers,
+        )
+        assert response.status_code == 201, response.text
+        route = response.json()
+        for i in range(markers):
+            marker = await client.post(
+                f"/api/routes/{route['id']}/markers",
+                json={"geometry": {"type": "Point", "coordinates": coords[min(i, len(coords) - 1)]}, "label": f"M{i}"},
+                headers=headers,
+            )
+            assert marker.status_code == 201, marker.text
+            route["markers"].append(marker.json())
+        return route
+
+    return make
+
+
+# (test, label, queries, budget) for every query_budget block, reported at the end of the run.
+_query_report: list[tuple[str, str, int, int]] = []
+
+
+@pytest.fixture
+def query_budget(request):
+    """Context manager asserting how many SQL statements a block may run.
+
+    Statements of the same shape (parameters aside) run more than `max_repeats`
+    times fail the test as a likely N+1, whatever the budget.
+
+        with query_budget(3, "list_routes"):
+            await client.get("/api/routes", headers=headers)
+    """
+
+    @contextmanager
+    def budget(max_queries: int, label: Optional[str] = None, max_repeats: int = 1) -> Iterator[QueryStats]:
+        with count_queries(record=True) as stats:
+            yield stats
+        label = label or request.node.name
+        _query_report.append((request.node.nodeid, label, stats.count, max_queries))
+        listing = "\n".join(f"  {s}" for s in stats.statements)
+        repeated = repeated_statements(stats.statements, max_repeats)
+        assert not repeated, f"{label}: statements repeated (N+1?): {repeated}\n{listing}"
+        assert stats.count <= max_queries, f"{label}: {stats.count} queries, budget {max_queries}\n{listing}"
+
+    return budget
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _query_report:
+        return
+    terminalreporter.section("query budgets")
+    for nodeid, label, count, max_queries in _query_report:
+        terminalreporter.write_line(f"{count:>4} / {max_queries:<4} {label}  ({nodeid})")
@@ -108,3 +108,61 @@ async def test_login_invalid_credentials(client):
 async def test_me_without_auth(client):
     r = await client.get("/api/auth/me")
     assert r.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password(client, db_session):
+    from sqlalchemy import select
+
+    from app.auth.models import User
+    from app.auth.passwords import hash_password, needs_rehash
+
+    email = f"rehash_{uuid.uuid4()}@example.com"
+    db_session.add(User(email=email, password_hash=hash_password("OldPassword123!", iterations=1_000)))
+    await db_session.commit()
+
+    r = await client.post("/api/auth/login", json={"email": email, "password": "OldPassword123!"})
+    assert r.status_code == 200
+
+    user = await db_session.scalar(select(User).where(User.email == email))
+    await db_session.refresh(user)
+    assert not needs_rehash(user.password_hash)
+    r = await client.post("/api/auth/login", json={"email": email, "password": "OldPassword123!"})
+    assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_register_returns_503_when_hasher_saturated(client, monkeypatch):
+    from app.auth.passwords import password_hasher
+
+    monkeypatch.setattr(password_hasher, "_pending", password_hasher.workers + password_hasher.max_queue)
+    r = await client.post(
+        "/api/auth/register",
+        json={"email": f"busy_{uuid.uuid4()}@example.com", "password": "TestPassword123!"},
+    )
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_deactivated_user_is_not_served_from_cache(client, db_session):
+    from sqlalchemy import select
+
+    from app.auth.cache import user_cache
+    from app.auth.models import User
+
+    email = f"cache_{uuid.uuid4()}@example.com"
+    r = await client.post("/api/auth/register", json={"email": email, "password": "TestPassword123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+    hits = user_cache.hits
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+    assert user_cache.hits == hits + 1
+
+    user = await db_session.scalar(select(User).where(User.email == email))
+    user.is_active = False
+    await db_session.commit()
+
+    r = await client.get("/api/auth/me", headers=headers)
+    assert r.status_code == 403
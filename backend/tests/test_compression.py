@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.api.cache import MemoryResponseCache
+from app.api.compression import CompressionMiddleware
+from app.api.conditional import is_not_modified, make_etag
+from app.api.negotiation import preferred_encoding
+from app.core import metrics
+
+LINE = json.dumps({"type": "LineString", "coordinates": [[-77.0 + i / 1e4, -12.0 - i / 1e4] for i in range(500)]})
+ETAG = make_etag("route", 1)
+
+
+def _app(cache=None) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware,
+        min_size=1024,
+        media_types=["application/json", "application/x-ndjson", "text/*"],
+        cache=cache,
+    )
+
+    @app.get("/route")
+    async def route(request: Request):
+        headers = {"ETag": ETAG, "Vary": "Accept, Authorization"}
+        if is_not_modified(request, ETAG):
+            return Response(status_code=304, headers=headers)
+        return Response(LINE, media_type="application/json", headers=headers)
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/binary")
+    async def binary():
+        return Response(LINE.encode(), media_type="application/octet-stream")
+
+    @app.get("/precompressed")
+    async def precompressed():
+        return Response(
+            gzip.compress(LINE.encode()), media_type="application/json", headers={"Content-Encoding": "gzip"}
+        )
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(20):
+                yield (json.dumps({"i": i, "geometry": LINE}) + "\n").encode()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+
+def _client(app: FastAPI, encoding: str = "gzip") -> AsyncClient:
+    return AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test", headers={"Accept-Encoding": encoding}
+    )
+
+
+class TestNegotiation:
+    """Test content coding selection."""
+
+    def test_preferred_encoding(self):
+        offered = ("zstd", "br", "gzip")
+        assert preferred_encoding("gzip, deflate, br", offered) == "br"
+        assert preferred_encoding("gzip;q=1, br;q=0.5", offered) == "gzip"
+        assert preferred_encoding("*", offered) == "zstd"
+        assert preferred_encoding("*, zstd;q=0", offered) == "br"
+        assert preferred_encoding("identity", offered) is None
+        assert preferred_encoding(None, offered) is None
+
+
+class TestCompressionMiddleware:
+    """Test response compression."""
+
+    async def test_compresses_large_json(self):
+        before = metrics.http_compression_in.value(("gzip",))
+        async with _client(_app()) as client:
+            response = await client.get("/route")
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept, Authorization, Accept-Encoding"
+        assert response.headers["etag"] == f'{ETAG[:-1]}-gzip"'
+        assert int(response.headers["content-length"]) < len(LINE) / 2
+        assert response.text == LINE
+        assert metrics.http_compression_in.value(("gzip",)) - before == len(LINE)
+
+    async def test_skips(self):
+        async with _client(_app()) as client:
+            small = await client.get("/small")
+            binary = await client.get("/binary")
+            identity = await client.get("/route", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in small.headers and small.headers["vary"] == "Accept-Encoding"
+        assert "content-encoding" not in binary.headers and "vary" not in binary.headers
+        assert "content-encoding" not in identity.headers and identity.headers["etag"] == ETAG
+
+    async def test_precompressed_passes_through(self):
+        async with _client(_app()) as client:
+            response = await client.get("/precompressed")
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == LINE
+
+    async def test_stream_is_compressed_incrementally(self):
+        app = _app()
+        chunks: list[bytes] = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                chunks.append(dict(message["headers"])[b"content-encoding"])
+            else:
+                chunks.append(message["body"])
+
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()  # the client never disconnects
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/stream",
+            "raw_path": b"/stream",
+            "query_string": b"",
+            "headers": [(b"accept-encoding", b"gzip")],
+            "scheme": "http",
+            "server": ("test", 80),
+            "http_version": "1.1",
+        }
+        await app(scope, receive, send)
+        assert chunks[0] == b"gzip"
+        # Every chunk is flushed, so each line can be decoded as it arrives.
+        decoder = zlib.decompressobj(31)
+        assert json.loads(decoder.decompress(chunks[1])) == {"i": 0, "geometry": LINE}
+        lines = (decoder.decompress(b"".join(chunks[2:])) + decoder.flush()).splitlines()
+        assert len(lines) == 19 and decoder.eof
+
+    async def test_revalidation_with_coded_etag(self):
+        async with _client(_app()) as client:
+            etag = (await client.get("/route")).headers["etag"]
+            again = await client.get("/route", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.headers["etag"] == etag
+
+    async def test_cache_reuses_compressed_body(self):
+        cache = MemoryResponseCache(1 << 20, 60)
+        before = metrics.http_compressed.value(("gzip", "true"))
+        async with _client(_app(cache)) as client:
+            first = await client.get("/route")
+            second = await client.get("/route")
+        assert first.content == second.content and len(cache) == 1
+        assert metrics.http_compressed.value(("gzip", "true")) - before == 1
+
+    @pytest.mark.parametrize("module, coding", [("brotli", "br"), ("zstandard", "zstd")])
+    async def test_optional_codings(self, module, coding):
+        pytest.importorskip(module)
+        async with _client(_app(), coding) as client:
+            response = await client.get("/route")
+        assert response.headers["content-encoding"] == coding
+        assert response.text == LINE
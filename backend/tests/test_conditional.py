@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from starlette.requests import Request
+
+from app.api.conditional import http_date, is_not_modified, make_etag, variant
+from app.api.negotiation import accepts_encoding
+
+
+def _request(headers: dict[str, str] | None = None, query: str = "") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "query_string": query.encode(),
+            "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        }
+    )
+
+
+class TestConditional:
+    """Test ETag / Last-Modified evaluation."""
+
+    def test_etag_is_strong_and_stable(self):
+        etag = make_etag("route", 1)
+        assert etag.startswith('"') and etag == make_etag("route", 1)
+        assert etag != make_etag("route", 2)
+
+    def test_if_none_match(self):
+        etag = make_etag("x")
+        assert is_not_modified(_request({"If-None-Match": etag}), etag)
+        assert is_not_modified(_request({"If-None-Match": f'"other", W/{etag}'}), etag)
+        assert is_not_modified(_request({"If-None-Match": "*"}), etag)
+        assert not is_not_modified(_request({"If-None-Match": '"other"'}), etag)
+        assert not is_not_modified(_request(), etag)
+
+    def test_if_modified_since(self):
+        modified = datetime(2026, 5, 1, 12, 0, 0, 500_000, tzinfo=timezone.utc)
+        etag = make_etag("x")
+        assert is_not_modified(_request({"If-Modified-Since": http_date(modified)}), etag, modified)
+        earlier = http_date(datetime(2026, 5, 1, 11, 59, 59, tzinfo=timezone.utc))
+        assert not is_not_modified(_request({"If-Modified-Since": earlier}), etag, modified)
+        assert not is_not_modified(_request({"If-Modified-Since": "garbage"}), etag, modified)
+
+    def test_if_none_match_takes_precedence(self):
+        modified = datetime(2026, 5, 1, tzinfo=timezone.utc)
+        request = _request({"If-None-Match": '"stale"', "If-Modified-Since": http_date(modified)})
+        assert not is_not_modified(request, make_etag("x"), modified)
+
+    def test_variant_depends_on_query_and_media_type(self):
+        assert variant(_request(query="zoom=8&limit=5")) == variant(_request(query="limit=5&zoom=8"))
+        assert variant(_request(query="zoom=8")) != variant(_request(query="zoom=9"))
+        assert variant(_request(), ("application/octet-stream", {})) != variant(_request())
+
+    def test_accepts_encoding(self):
+        assert accepts_encoding(_request({"Accept-Encoding": "gzip, deflate, br"}), "gzip")
+        assert accepts_encoding(_request({"Accept-Encoding": "*"}), "gzip")
+        assert not accepts_encoding(_request({"Accept-Encoding": "gzip;q=0, br"}), "gzip")
+        assert not accepts_encoding(_request({"Accept-Encoding": "*, gzip;q=0"}), "gzip")
+        assert not accepts_encoding(_request(), "gzip")
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.session import PoolStats, TimedQueuePool, _connect_args
+
+
+class TestPoolConfig:
+    """Test engine configuration helpers."""
+
+    def test_statement_cache_per_driver(self, monkeypatch):
+        monkeypatch.setattr("app.db.session.settings.db_statement_cache_size", 0)
+        assert _connect_args("postgresql+asyncpg://u:p@h/db") == {"statement_cache_size": 0}
+        assert _connect_args("postgresql+psycopg://u:p@h/db") == {"prepare_threshold": None}
+        assert _connect_args("sqlite+aiosqlite://") == {}
+
+    def test_stats_record(self):
+        stats = PoolStats()
+        stats.record(0.5, ok=True)
+        stats.record(2.0, ok=False)
+        assert (stats.checkouts, stats.timeouts) == (1, 1)
+        assert stats.wait_seconds_total == 2.5
+        assert stats.wait_seconds_max == 2.0
+
+
+class TestTimedQueuePool:
+    """Test checkout wait accounting."""
+
+    async def test_records_checkout_wait(self, monkeypatch):
+        pytest.importorskip("aiosqlite")
+        stats = PoolStats()
+        monkeypatch.setattr("app.db.session.pool_stats", stats)
+        engine = create_async_engine(
+            "sqlite+aiosqlite://", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=1
+        )
+        try:
+            first = await engine.connect()
+
+            async def release():
+                await asyncio.sleep(0.05)
+                await first.close()
+
+            task = asyncio.create_task(release())
+            second = await engine.connect()
+            await second.close()
+            await task
+        finally:
+            await engine.dispose()
+        assert stats.checkouts == 2
+        assert stats.wait_seconds_max >= 0.04
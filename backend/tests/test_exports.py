@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import io
+import json
+import xml.etree.ElementTree as ET
+import zipfile
+
+from app.api.exports import geojson_stream, gpx_stream, zip_stream
+from app.api.serializers import MarkerOut, RouteOut
+from app.geo.importers import iter_routes
+
+
+def _route(n: int) -> RouteOut:
+    return RouteOut(
+        id=f"{n:08d}-0000-0000-0000-000000000000",
+        title=f"Ride <{n}> & co",
+        description="Coast",
+        geometry={"type": "LineString", "coordinates": [[-77.0, -12.0], [-77.1 - n, -12.1]]},
+        distance_km=12.5,
+        is_public=False,
+        created_at="2026-01-01T00:00:00+00:00",
+        updated_at="2026-01-01T00:00:00+00:00",
+        markers=[
+            MarkerOut(
+                id="m", geometry={"type": "Point", "coordinates": [-77.05, -12.05]},
+                label="Café", description=None, icon_type="coffee", order_index=1024,
+            )
+        ],
+    )
+
+
+async def _routes(count: int):
+    for n in range(count):
+        yield _route(n)
+
+
+async def _markers(count: int):
+    async for route in _routes(count):
+        for marker in route.markers:
+            yield route.id, marker
+
+
+async def _collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+class TestExportFormats:
+    async def test_gpx_round_trip(self):
+        data = await _collect(gpx_stream(_markers(3), _routes(3)))
+        routes = list(iter_routes("export.gpx", io.BytesIO(data), 1000))
+        assert [r.title for r in routes] == ["Ride <0> & co", "Ride <1> & co", "Ride <2> & co"]
+        assert routes[2].coordinates.tolist() == [[-77.0, -12.0], [-79.1, -12.1]]
+        assert [[(m.label, m.icon_type) for m in r.markers] for r in routes] == [[("Café", "coffee")]] * 3
+
+    async def test_gpx_waypoints_precede_tracks(self):
+        # GPX 1.1: metadata?, wpt*, rte*, trk*
+        data = await _collect(gpx_stream(_markers(3), _routes(3)))
+        tags = [child.tag.rsplit("}", 1)[-1] for child in ET.fromstring(data)]
+        assert tags == ["wpt"] * 3 + ["trk"] * 3
+
+    async def test_gpx_tagged_waypoints_find_their_track(self):
+        async def markers():
+            yield _route(0).id, _route(0).markers[0]
+            yield _route(2).id, _route(2).markers[0].model_copy(update={"label": "Last"})
+
+        data = await _collect(gpx_stream(markers(), _routes(3)))
+        routes = list(iter_routes("export.gpx", io.BytesIO(data), 1000))
+        assert [[m.label for m in r.markers] for r in routes] == [["Café"], [], ["Last"]]
+
+    async def test_geojson(self):
+        data = await _collect(geojson_stream(_routes(2)))
+        collection = json.loads(data)
+        kinds = [f["geometry"]["type"] for f in collection["features"]]
+        assert kinds == ["Point", "LineString", "Point", "LineString"]
+        routes = list(iter_routes("export.geojson", io.BytesIO(data), 1000))
+        assert [len(r.markers) for r in routes] == [1, 1]
+
+        empty = json.loads(await _collect(geojson_stream(_routes(0))))
+        assert empty == {"type": "FeatureCollection", "features": []}
+
+    async def test_zip_is_streamed_per_route(self):
+        chunks = [chunk async for chunk in zip_stream(_routes(3))]
+        assert sum(1 for c in chunks if c) >= 3
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            names = archive.namelist()
+            assert len(names) == 3 and all(n.endswith(".gpx") for n in names)
+            (route,) = iter_routes(names[0], archive.open(names[0]), 1000)
+            assert route.title == "Ride <0> & co"
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import uuid
+
+import pytest
+
+from app.geo.encoding import (
+    BinaryMarker,
+    BinaryRoute,
+    decode_binary,
+    decode_polyline,
+    encode_binary,
+    encode_polyline,
+)
+
+
+class TestPolyline:
+    """Test the encoded polyline algorithm."""
+
+    def test_reference_example(self):
+        # Example from the algorithm's documentation (given there as lat,lng).
+        coords = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+        assert encode_polyline(coords) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+        assert decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@") == coords
+
+    @pytest.mark.parametrize("precision", [5, 6])
+    def test_round_trip(self, precision):
+        coords = [[-77.05 + i * 0.00013, -12.05 - i * 0.00007] for i in range(200)]
+        decoded = decode_polyline(encode_polyline(coords, precision), precision)
+        assert len(decoded) == len(coords)
+        tolerance = 0.5 / 10**precision + 1e-12
+        for (lon, lat), (dlon, dlat) in zip(coords, decoded):
+            assert abs(lon - dlon) <= tolerance
+            assert abs(lat - dlat) <= tolerance
+
+    def test_truncated(self):
+        with pytest.raises(ValueError):
+            decode_polyline("_p~iF~ps|U_")
+
+
+class TestBinary:
+    """Test the BRGB binary geometry buffer."""
+
+    def _routes(self):
+        return [
+            BinaryRoute(
+                uuid.uuid4(),
+                [[-77.05 + i * 0.0001, -12.05] for i in range(50)],
+                [BinaryMarker(uuid.uuid4(), 0, [-77.05, -12.05]), BinaryMarker(uuid.uuid4(), 1, [-77.0451, -12.05])],
+            ),
+            BinaryRoute(uuid.uuid4(), [[179.9, -85.0], [-179.9, 85.0]], []),
+        ]
+
+    def test_round_trip(self):
+        routes = self._routes()
+        precision, decoded = decode_binary(encode_binary(routes))
+        assert precision == 6
+        assert [r.id for r in decoded] == [r.id for r in routes]
+        for original, result in zip(routes, decoded):
+            flat = [c for pair in result.coordinates for c in pair]
+            assert flat == pytest.approx([c for pair in original.coordinates for c in pair], abs=1e-6)
+            assert [m.id for m in result.markers] == [m.id for m in original.markers]
+            assert [m.order_index for m in result.markers] == [m.order_index for m in original.markers]
+
+    def test_smaller_than_geojson(self):
+        route = self._routes()[0]
+        geojson = json.dumps({"type": "LineString", "coordinates": route.coordinates})
+        assert len(encode_binary([route])) < len(geojson) / 2
+
+    def test_rejects_unsupported_precision(self):
+        with pytest.raises(ValueError):
+            encode_binary(self._routes(), precision=7)
+
+    def test_rejects_foreign_buffer(self):
+        with pytest.raises(ValueError):
+            decode_binary(b"GEOJ" + bytes(8))
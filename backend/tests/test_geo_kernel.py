@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from app.geo.kernel import (
+    bbox,
+    coords_array,
+    cumulative_distance_km,
+    segment_bearings_deg,
+    segment_lengths_km,
+    total_distance_km,
+)
+
+
+def _haversine_km(a, b):
+    # Scalar reference: the per-segment loop the kernel replaced.
+    lon1, lat1 = math.radians(a[0]), math.radians(a[1])
+    lon2, lat2 = math.radians(b[0]), math.radians(b[1])
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _random_track(n, seed=7):
+    rng = random.Random(seed)
+    lon, lat = -77.04, -12.05
+    coords = []
+    for _ in range(n):
+        lon += rng.uniform(-0.001, 0.001)
+        lat += rng.uniform(-0.001, 0.001)
+        coords.append([lon, lat])
+    return coords
+
+
+class TestGeodesicKernel:
+    """Test the vectorized kernel against the scalar haversine loop."""
+
+    @pytest.mark.parametrize("n", [2, 3, 100, 5000])
+    def test_total_distance_matches_scalar_loop(self, n):
+        coords = _random_track(n)
+        expected = sum(_haversine_km(coords[i - 1], coords[i]) for i in range(1, n))
+        assert total_distance_km(coords_array(coords)) == pytest.approx(expected, rel=1e-12)
+
+    def test_cumulative_distance(self):
+        arr = coords_array(_random_track(50))
+        cumulative = cumulative_distance_km(arr)
+        assert cumulative[0] == 0.0
+        assert cumulative[-1] == pytest.approx(total_distance_km(arr))
+        assert np.all(np.diff(cumulative) >= 0)
+        assert np.allclose(np.diff(cumulative), segment_lengths_km(arr))
+
+    def test_bearings(self):
+        arr = coords_array([[0.0, 0.0], [0.0, 1.0], [1.0, 1.0], [1.0, 0.0], [0.0, 0.0]])
+        assert segment_bearings_deg(arr) == pytest.approx([0.0, 90.0, 180.0, 270.0], abs=0.01)
+
+    def test_bbox(self):
+        assert bbox(coords_array([[-77.1, -12.0], [-77.0, -12.2]])) == (-77.1, -12.2, -77.0, -12.0)
+
+    @pytest.mark.parametrize("coords", [[[1, 2], [3]], [[1, 2, 3]], [["a", 1]], [1, 2]])
+    def test_rejects_malformed_input(self, coords):
+        with pytest.raises(ValueError):
+            coords_array(coords)
+
+    def test_two_point_distance(self):
+        assert total_distance_km(coords_array([[0, 0]])) == 0.0
+        expected = _haversine_km([-77.0428, -12.0464], [-77.0430, -12.0470])
+        assert total_distance_km(coords_array([[-77.0428, -12.0464], [-77.0430, -12.0470]])) == pytest.approx(expected)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import struct
+
+import numpy as np
+import pytest
+
+from app.geo.geojson import (
+    ewkb_linestring,
+    ewkb_point,
+    linestring_coords_from_geojson,
+    linestring_wkb_from_geojson,
+    point_wkb_from_geojson,
+)
+
+LINE_ERROR = "Invalid GeoJSON LineString coordinates"
+POINT_ERROR = "Invalid GeoJSON Point coordinates"
+
+
+class TestEWKB:
+    """Test EWKB encoding of write geometries."""
+
+    def test_linestring_layout(self):
+        coords = [[-77.0428, -12.0464], [-77.043, -12.047], [-77.044, -12.048]]
+        element = linestring_wkb_from_geojson({"type": "LineString", "coordinates": coords})
+        data = bytes(element.data)
+        assert struct.unpack_from("<BIII", data) == (1, 0x20000002, 4326, 3)
+        assert np.frombuffer(data, dtype="<f8", offset=13).reshape(-1, 2).tolist() == coords
+        assert element.srid == 4326 and element.extended
+
+    def test_point_layout(self):
+        element = point_wkb_from_geojson({"type": "Point", "coordinates": [-77.05, -12]})
+        assert struct.unpack("<BIIdd", bytes(element.data)) == (1, 0x20000001, 4326, -77.05, -12.0)
+        assert element.desc == ewkb_point(-77.05, -12.0).desc
+
+    def test_linestring_from_strided_array(self):
+        arr = np.array([[1.5, 2.5], [3.5, 4.5]])
+        data = bytes(ewkb_linestring(arr[::-1]).data)
+        assert np.frombuffer(data, dtype="<f8", offset=13).tolist() == [3.5, 4.5, 1.5, 2.5]
+
+
+class TestValidation:
+    """Test GeoJSON write validation keeps the API's error messages."""
+
+    def test_linestring_array(self):
+        arr = linestring_coords_from_geojson({"type": "LineString", "coordinates": [[0, 1], [2.5, 3]]})
+        assert arr.dtype == np.float64 and arr.tolist() == [[0.0, 1.0], [2.5, 3.0]]
+
+    @pytest.mark.parametrize(
+        "geometry, message",
+        [
+            ({"type": "Point", "coordinates": [0, 0]}, "Expected GeoJSON LineString geometry"),
+            ({"type": "LineString"}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0]]}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0], [1]]}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0], [1, 1, 1]]}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0], (1, 1)]}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0], [1, True]]}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0], [1, "1"]]}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0], [1, None]]}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0], [[1], [1]]]}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0], [1, float("nan")]]}, LINE_ERROR),
+            ({"type": "LineString", "coordinates": [[0, 0], [1, 10**400]]}, LINE_ERROR),
+        ],
+    )
+    def test_invalid_linestrings(self, geometry, message):
+        with pytest.raises(ValueError, match=f"^{message}$"):
+            linestring_wkb_from_geojson(geometry)
+
+    @pytest.mark.parametrize(
+        "coords",
+        [None, [0], [0, 0, 0], [0, False], ["0", 0], [float("inf"), 0], [10**400, 0]],
+    )
+    def test_invalid_points(self, coords):
+        with pytest.raises(ValueError, match=f"^{POINT_ERROR}$"):
+            point_wkb_from_geojson({"type": "Point", "coordinates": coords})
+        with pytest.raises(ValueError, match="^Expected GeoJSON Point geometry$"):
+            point_wkb_from_geojson({"type": "LineString", "coordinates": coords})
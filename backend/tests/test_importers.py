@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import io
+import json
+import tracemalloc
+import uuid
+import zipfile
+from functools import partial
+
+import pytest
+
+from app.api.imports import _import_file
+from app.geo.importers import LimitedReader, archive_members, iter_routes
+
+GPX = b"""<?xml version="1.0"?>
+<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">
+  <wpt lat="-12.0" lon="-77.0"><name>Cafe</name><sym>coffee</sym></wpt>
+  <trk><name>Morning ride</name>
+    <trkseg><trkpt lat="-12.0" lon="-77.0"><ele>10</ele></trkpt><trkpt lat="-12.1" lon="-77.1"/></trkseg>
+    <trkseg><trkpt lat="-12.2" lon="-77.2"/></trkseg>
+  </trk>
+  <rte><name>Planned</name><rtept lat="0" lon="0"/><rtept lat="0" lon="1"/></rte>
+  <wpt lat="0" lon="1"><name>End</name></wpt>
+</gpx>"""
+
+KML = b"""<kml xmlns="http://www.opengis.net/kml/2.2"><Document>
+  <Placemark><name>Start</name><Point><coordinates>-77.0,-12.0,0</coordinates></Point></Placemark>
+  <Folder><Placemark><name>Coast</name><description>Flat</description>
+    <LineString><coordinates>-77.0,-12.0,0 -77.1,-12.1,0
+      -77.2,-12.2</coordinates></LineString></Placemark></Folder>
+</Document></kml>"""
+
+
+def _feature_collection(features: list[dict]) -> bytes:
+    # Members before "features" include a nested "features" key to skip.
+    return json.dumps(
+        {"type": "FeatureCollection", "crs": {"properties": {"features": 1}}, "features": features}
+    ).encode()
+
+
+class _Trickle(io.BytesIO):
+    """Returns a few bytes per read, like a slow upload."""
+
+    def read(self, size: int = -1) -> bytes:
+        return super().read(5)
+
+
+class TestReaders:
+    def test_gpx(self):
+        routes = list(iter_routes("rides.gpx", io.BytesIO(GPX), 1000))
+        assert [r.title for r in routes] == ["Morning ride", "Planned"]
+        assert routes[0].coordinates.tolist() == [[-77.0, -12.0], [-77.1, -12.1], [-77.2, -12.2]]
+        assert [(m.label, m.icon_type) for m in routes[0].markers] == [("Cafe", "coffee")]
+        # Waypoints after the last route belong to it.
+        assert [m.label for m in routes[1].markers] == ["End"]
+
+    def test_kml(self):
+        (route,) = iter_routes("coast.kml", io.BytesIO(KML), 1000)
+        assert (route.title, route.description) == ("Coast", "Flat")
+        assert len(route.coordinates) == 3
+        assert [m.label for m in route.markers] == ["Start"]
+
+    def test_geojson_incremental(self):
+        data = _feature_collection(
+            [
+                {"type": "Feature", "geometry": {"type": "Point", "coordinates": [1, 2]}, "properties": {"name": 'say "hi" ñ'}},
+                {"type": "Feature", "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}, "properties": {}},
+                {"type": "Feature", "geometry": {"type": "MultiLineString", "coordinates": [[[0, 0], [1, 1]], [[2, 2]]]}, "properties": {"title": "Multi"}},
+            ]
+        )
+        routes = list(iter_routes("export.geojson", _Trickle(data), 1000))
+        assert [r.title for r in routes] == ["export", "Multi"]
+        assert routes[0].markers[0].label == 'say "hi" ñ'
+        assert len(routes[1].coordinates) == 3
+
+    def test_geojson_requires_feature_collection(self):
+        with pytest.raises(ValueError):
+            list(iter_routes("a.geojson", io.BytesIO(b'{"type": "Feature", "geometry": null}'), 10))
+
+    @pytest.mark.parametrize(
+        "name,data",
+        [
+            ("bad.gpx", b'<gpx><trk><trkseg><trkpt lat="95" lon="0"/></trkseg></trk></gpx>'),
+            ("bad.gpx", b'<gpx><trk><trkseg><trkpt lon="0"/></trkseg></trk></gpx>'),
+            ("bad.txt", b""),
+        ],
+    )
+    def test_invalid(self, name, data):
+        with pytest.raises(ValueError):
+            list(iter_routes(name, io.BytesIO(data), 10))
+
+    def test_point_limit(self):
+        with pytest.raises(ValueError):
+            list(iter_routes("rides.gpx", io.BytesIO(GPX), 2))
+
+    def test_limited_reader(self):
+        with pytest.raises(ValueError):
+            list(iter_routes("rides.gpx", LimitedReader(io.BytesIO(GPX), 100), 1000))
+
+    def test_archive_members(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("rides/a.gpx", GPX)
+            zf.writestr("__MACOSX/rides/._a.gpx", b"")
+            zf.writestr("notes.txt", b"")
+            zf.writestr("b.KML", KML)
+        with zipfile.ZipFile(buf) as zf:
+            assert [i.filename for i in archive_members(zf)] == ["rides/a.gpx", "b.KML"]
+
+
+    async def test_unreadable_archive_member_is_a_file_error(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("locked.gpx", GPX)
+        data = bytearray(buf.getvalue())
+        data[data.find(b"PK\x01\x02") + 8] |= 0x1  # central directory flag: encrypted
+        with zipfile.ZipFile(io.BytesIO(bytes(data))) as zf:
+            # Fails before any database work, so no session is needed.
+            result = await _import_file(None, uuid.uuid4(), "a.zip/locked.gpx", partial(zf.open, "locked.gpx"), False, [])
+        assert "encrypted" in result.error and not result.route_ids
+
+
+class TestMemory:
+    @staticmethod
+    def _gpx(tracks: int, points: int = 1000) -> bytes:
+        trkpts = b"".join(b'<trkpt lat="%f" lon="%f"><ele>1</ele></trkpt>' % (i * 1e-5, i * 1e-5) for i in range(points))
+        track = b"<trk><name>t</name><trkseg>" + trkpts + b"</trkseg></trk>"
+        return b'<gpx xmlns="http://www.topografix.com/GPX/1/1">' + track * tracks + b"</gpx>"
+
+    def _peak(self, data: bytes) -> int:
+        tracemalloc.start()
+        try:
+            for _ in iter_routes("big.gpx", io.BytesIO(data), 10**6):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_peak_does_not_grow_with_file(self):
+        small, large = self._peak(self._gpx(5)), self._peak(self._gpx(50))
+        assert large < 2 * small
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import uuid
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.models.marker import Marker
 
 
 class TestMarkerCRUD:
@@ -179,3 +184,150 @@ class TestMarkerGeometry:
         assert len(data["geometry"]["coordinates"]) == 2
         assert abs(data["geometry"]["coordinates"][0] - coordinates[0]) < 0.0001
         assert abs(data["geometry"]["coordinates"][1] - coordinates[1]) < 0.0001
+
+
+class TestMarkerBatch:
+    """Test PATCH /routes/{id}/markers batch operations."""
+
+    async def test_create_update_delete_in_one_call(self, auth_client, make_route):
+        client, headers = auth_client
+        route = await make_route(markers=3)
+        route_id = route["id"]
+        m0, m1, m2 = [m["id"] for m in route["markers"]]
+        new_id = str(uuid.uuid4())
+
+        response = await client.patch(
+            f"/api/routes/{route_id}/markers",
+            json={
+                "create": [
+                    {"id": new_id, "geometry": {"type": "Point", "coordinates": [-77.05, -12.05]}, "label": "New", "position": 1},
+                    {"geometry": {"type": "Point", "coordinates": [-77.09, -12.09]}, "label": "Last"},
+                ],
+                "update": [{"id": m2, "label": "Renamed", "position": 0}],
+                "delete": [m1],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        markers = response.json()
+        assert [m["label"] for m in markers] == ["Renamed", "New", "M0", "Last"]
+        keys = [m["order_index"] for m in markers]
+        assert keys == sorted(set(keys))
+        assert markers[2]["order_index"] == 1024  # M0 kept its key
+        assert markers[1]["id"] == new_id
+        assert m1 not in {m["id"] for m in markers}
+
+    async def test_reorder(self, auth_client, make_route):
+        client, headers = auth_client
+        route = await make_route(markers=4)
+        route_id = route["id"]
+        markers = [m["id"] for m in route["markers"]]
+
+        response = await client.patch(
+            f"/api/routes/{route_id}/markers",
+            json={"order": list(reversed(markers))},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert [m["id"] for m in response.json()] == list(reversed(markers))
+
+        incomplete = await client.patch(
+            f"/api/routes/{route_id}/markers", json={"order": markers[:2]}, headers=headers
+        )
+        assert incomplete.status_code == 422
+
+    async def test_reorder_legacy_negative_keys(self, auth_client, make_route, db_session):
+        """Test keys written before order_index was validated (here 0 and -1) can be rewritten."""
+        client, headers = auth_client
+        route = await make_route(markers=3)
+        m0, m1, m2 = [uuid.UUID(m["id"]) for m in route["markers"]]
+        for marker_id, key in ((m0, -1), (m1, 0), (m2, 5)):
+            await db_session.execute(update(Marker).where(Marker.id == marker_id).values(order_index=key))
+        await db_session.commit()
+
+        order = [str(m) for m in (m2, m1, m0)]
+        response = await client.patch(f"/api/routes/{route['id']}/markers", json={"order": order}, headers=headers)
+        assert response.status_code == 200
+        assert [m["id"] for m in response.json()] == order
+
+    async def test_batch_is_atomic(self, auth_client, make_route):
+        client, headers = auth_client
+        route = await make_route(markers=2)
+        route_id = route["id"]
+        markers = [m["id"] for m in route["markers"]]
+
+        response = await client.patch(
+            f"/api/routes/{route_id}/markers",
+            json={
+                "update": [{"id": markers[0], "label": "Changed"}],
+                "create": [{"geometry": {"type": "Polygon", "coordinates": []}}],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 422
+        route = (await client.get(f"/api/routes/{route_id}", headers=headers)).json()
+        assert [m["label"] for m in route["markers"]] == ["M0", "M1"]
+
+    async def test_unknown_marker(self, auth_client, make_route):
+        client, headers = auth_client
+        route_id = (await make_route(markers=1))["id"]
+        response = await client.patch(
+            f"/api/routes/{route_id}/markers", json={"delete": [str(uuid.uuid4())]}, headers=headers
+        )
+        assert response.status_code == 404
+
+
+class TestMarkerMove:
+    """Test POST /routes/{id}/markers/{marker_id}/move."""
+
+    async def _keys(self, client, headers, route_id):
+        route = (await client.get(f"/api/routes/{route_id}", headers=headers)).json()
+        return {m["id"]: m["order_index"] for m in route["markers"]}, [m["id"] for m in route["markers"]]
+
+    async def test_move_touches_one_marker(self, auth_client, make_route):
+        client, headers = auth_client
+        route = await make_route(markers=3)
+        route_id = route["id"]
+        m0, m1, m2 = [m["id"] for m in route["markers"]]
+        before, _ = await self._keys(client, headers, route_id)
+
+        response = await client.post(
+            f"/api/routes/{route_id}/markers/{m2}/move", json={"before": m0}, headers=headers
+        )
+        assert response.status_code == 200
+        after, order = await self._keys(client, headers, route_id)
+        assert order == [m2, m0, m1]
+        assert {m for m in after if after[m] != before[m]} == {m2}
+
+        response = await client.post(
+            f"/api/routes/{route_id}/markers/{m2}/move", json={"after": m1}, headers=headers
+        )
+        assert response.status_code == 200
+        assert (await self._keys(client, headers, route_id))[1] == [m0, m1, m2]
+
+    async def test_move_renumbers_when_out_of_room(self, auth_client, make_route):
+        client, headers = auth_client
+        route = await make_route(markers=3)
+        route_id = route["id"]
+        m0, m1, m2 = [m["id"] for m in route["markers"]]
+        # Each move halves the gap after m0, which runs out after ~10 moves.
+        for i in range(12):
+            mover, anchor = (m2, m1) if i % 2 == 0 else (m1, m2)
+            response = await client.post(
+                f"/api/routes/{route_id}/markers/{mover}/move", json={"before": anchor}, headers=headers
+            )
+            assert response.status_code == 200
+        keys, order = await self._keys(client, headers, route_id)
+        assert order == [m0, m1, m2]
+        assert len(set(keys.values())) == 3
+
+    async def test_move_validation(self, auth_client, make_route):
+        client, headers = auth_client
+        route = await make_route(markers=2)
+        route_id = route["id"]
+        m0, m1 = [m["id"] for m in route["markers"]]
+        url = f"/api/routes/{route_id}/markers/{m0}/move"
+        assert (await client.post(url, json={}, headers=headers)).status_code == 422
+        assert (await client.post(url, json={"before": m1, "after": m1}, headers=headers)).status_code == 422
+        assert (await client.post(url, json={"before": m0}, headers=headers)).status_code == 422
+        assert (await client.post(url, json={"before": str(uuid.uuid4())}, headers=headers)).status_code == 404
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import metrics
+from app.core.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    count_queries,
+    instrument_engine,
+    repeated_statements,
+    statement_shape,
+)
+
+
+def _lines(metric) -> list[str]:
+    out: list[str] = []
+    metric.render(out)
+    return out
+
+
+class TestExposition:
+    """Test the Prometheus text format."""
+
+    def test_counter_and_gauge(self):
+        counter = Counter("requests_total", "Requests.", ("path",))
+        counter.inc(("/a",))
+        counter.inc(("/a",), 2)
+        gauge = Gauge("in_flight", "In flight.")
+        gauge.inc()
+        gauge.dec()
+        assert _lines(counter) == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{path="/a"} 3',
+        ]
+        assert _lines(gauge)[-1] == "in_flight 0"
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            hist.observe(value, ("/r",))
+        assert _lines(hist)[2:] == [
+            'latency_seconds_bucket{route="/r",le="0.1"} 2',
+            'latency_seconds_bucket{route="/r",le="1"} 3',
+            'latency_seconds_bucket{route="/r",le="+Inf"} 4',
+            'latency_seconds_sum{route="/r"} 3.65',
+            'latency_seconds_count{route="/r"} 4',
+        ]
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("c", "C.", ("v",))
+        counter.inc(('a"b\\c\nd',))
+        assert _lines(counter)[-1] == 'c{v="a\\"b\\\\c\\nd"} 1'
+
+    def test_registry_runs_collectors(self):
+        registry = Registry()
+        registry.register(Counter("a_total", "A."))
+        registry.collector(lambda: [metrics.snapshot(Gauge, "b", "B.", 7)])
+        body = registry.render()
+        assert "# TYPE a_total counter" in body and "\nb 7\n" in body
+
+
+class TestQueryCounting:
+    """Test statement counting via engine events."""
+
+    async def test_counts_nest(self):
+        pytest.importorskip("aiosqlite")
+        engine = create_async_engine("sqlite+aiosqlite://")
+        instrument_engine(engine)
+        try:
+            async with engine.connect() as conn:
+                with count_queries() as outer:
+                    await conn.execute(text("SELECT 1"))
+                    with count_queries() as inner:
+                        await conn.execute(text("SELECT 2"))
+                        with pytest.raises(Exception):
+                            await conn.execute(text("SELECT * FROM missing"))
+                    await conn.execute(text("SELECT 3"))
+                assert conn.sync_connection.info["query_started"] == []
+        finally:
+            await engine.dispose()
+        assert (outer.count, inner.count) == (3, 1)
+        assert outer.seconds >= inner.seconds > 0
+
+
+class TestMiddleware:
+    """Test per-route request metrics."""
+
+    async def test_records_route_template(self, monkeypatch):
+        for name in ("http_requests", "http_duration", "http_response_size", "http_db_queries"):
+            metric = getattr(metrics, name)
+            fresh = (
+                Histogram(metric.name, metric.help, metric.labelnames, metric.buckets)
+                if isinstance(metric, Histogram)
+                else Counter(metric.name, metric.help, metric.labelnames)
+            )
+            monkeypatch.setattr(metrics, name, fresh)
+
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: int):
+            if item_id == 0:
+                raise HTTPException(status_code=404, detail="item_not_found")
+            return {"id": item_id}
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/items/1")).status_code == 200
+            assert (await client.get("/items/2")).status_code == 200
+            assert (await client.get("/items/0")).status_code == 404
+            assert (await client.get("/nowhere")).status_code == 404
+
+        assert metrics.http_requests.value(("GET", "/items/{item_id}", "200")) == 2
+        assert metrics.http_requests.value(("GET", "/items/{item_id}", "404")) == 1
+        assert metrics.http_requests.value(("GET", "<unmatched>", "404")) == 1
+        assert metrics.http_duration.count(("GET", "/items/{item_id}")) == 3
+        assert metrics.http_db_queries.count(("GET", "/items/{item_id}")) == 3
+        assert metrics.http_in_flight.value() == 0
+
+
+class TestScrape:
+    """Test GET /metrics against metrics recorded concurrently."""
+
+    async def test_scrape_while_recording_new_labels(self, monkeypatch):
+        from app.api import metrics as metrics_api
+
+        requests = Counter("http_requests_total", "Requests.", ("method", "route", "status"))
+        render_threads: set[int] = set()
+
+        class Probe(Counter):
+            def samples(self):
+                render_threads.add(threading.get_ident())
+                return super().samples()
+
+        registry = Registry()
+        registry.register(requests)
+        registry.register(Probe("probe_total", "Probe."))
+        monkeypatch.setattr(metrics_api, "registry", registry)
+        app = FastAPI()
+        app.include_router(metrics_api.router)
+
+        async def record():
+            for i in range(2000):
+                requests.inc(("GET", f"/r{i}", "200"))
+                if i % 100 == 0:
+                    await asyncio.sleep(0)
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            recorder = asyncio.create_task(record())
+            statuses = []
+            while not recorder.done():
+                statuses.append((await client.get("/metrics")).status_code)
+                await asyncio.sleep(0)  # an in-process request may never yield to the recorder
+            await recorder
+            body = (await client.get("/metrics")).text
+        assert statuses and set(statuses) == {200}
+        assert 'http_requests_total{method="GET",route="/r1999",status="200"} 1' in body
+        assert render_threads == {threading.get_ident()}
+
+
+class TestStatementShapes:
+    """Test N+1 detection by statement shape."""
+
+    def test_parameters_are_normalized(self):
+        assert statement_shape("SELECT *\n  FROM markers WHERE id = $1") == "SELECT * FROM markers WHERE id = ?"
+        assert statement_shape("SELECT x::text FROM t WHERE id IN (%(id_1)s, %(id_2)s)") == (
+            "SELECT x::text FROM t WHERE id IN (?)"
+        )
+        assert statement_shape("INSERT INTO t (a) VALUES (?), (?), (?)") == "INSERT INTO t (a) VALUES (?)"
+
+    def test_repeated_statements(self):
+        statements = ["SELECT * FROM routes WHERE user_id = $1"] + ["SELECT * FROM markers WHERE route_id = $1"] * 3
+        assert repeated_statements(statements, 1) == {"SELECT * FROM markers WHERE route_id = ?": 3}
+        assert repeated_statements(statements, 3) == {}
+
+    async def test_records_statements(self):
+        pytest.importorskip("aiosqlite")
+        engine = create_async_engine("sqlite+aiosqlite://")
+        instrument_engine(engine)
+        try:
+            async with engine.connect() as conn:
+                with count_queries() as outer, count_queries(record=True) as inner:
+                    await conn.execute(text("SELECT :x"), {"x": 1})
+        finally:
+            await engine.dispose()
+        assert outer.statements is None
+        assert inner.statements == ["SELECT ?"]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+VERSIONS = Path(__file__).resolve().parents[1] / "alembic" / "versions"
+
+
+def _migration(name: str):
+    spec = importlib.util.spec_from_file_location(name, VERSIONS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def markers_db():
+    # The data migrations are plain SQL; SQLite checks the unique constraint
+    # row by row like Postgres does.
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE markers (id TEXT PRIMARY KEY, route_id TEXT NOT NULL, order_index INTEGER NOT NULL,"
+                " CONSTRAINT uq_markers_route_order_index UNIQUE (route_id, order_index))"
+            )
+        )
+        yield conn
+    engine.dispose()
+
+
+def _run(conn, step) -> None:
+    with Operations.context(MigrationContext.configure(conn)):
+        step()
+
+
+def _keys(conn) -> dict[str, list[tuple[str, int]]]:
+    rows = conn.execute(text("SELECT route_id, id, order_index FROM markers ORDER BY route_id, order_index"))
+    keys: dict[str, list[tuple[str, int]]] = {}
+    for route_id, marker_id, key in rows:
+        keys.setdefault(route_id, []).append((marker_id, key))
+    return keys
+
+
+class TestMarkerOrderGaps:
+    """Test the markers.order_index renumbering migration."""
+
+    ROWS = [
+        ("a0", "a", -1), ("a1", "a", 0), ("a2", "a", 5),
+        ("b0", "b", -3000), ("b1", "b", 1024), ("b2", "b", 2048),
+        ("c0", "c", 0), ("c1", "c", 1),
+    ]
+
+    def test_renumbers_negative_keys(self, markers_db):
+        migration = _migration("e5c1a7d94b3f_markers_order_gaps")
+        markers_db.execute(
+            text("INSERT INTO markers (id, route_id, order_index) VALUES (:id, :route_id, :key)"),
+            [{"id": i, "route_id": r, "key": k} for i, r, k in self.ROWS],
+        )
+
+        _run(markers_db, migration.upgrade)
+        gap = migration.ORDER_GAP
+        assert _keys(markers_db) == {
+            "a": [("a0", gap), ("a1", 2 * gap), ("a2", 3 * gap)],
+            "b": [("b0", gap), ("b1", 2 * gap), ("b2", 3 * gap)],
+            "c": [("c0", gap), ("c1", 2 * gap)],
+        }
+
+        _run(markers_db, migration.downgrade)
+        assert _keys(markers_db)["a"] == [("a0", 0), ("a1", 1), ("a2", 2)]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from app.api.ordering import ORDER_GAP, assign_keys, key_between, min_gap, next_key, spaced_keys
+
+
+class TestKeys:
+    def test_spaced_and_next(self):
+        assert spaced_keys(3) == [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP]
+        assert next_key(None) == ORDER_GAP
+        assert next_key(ORDER_GAP + 5) == 2 * ORDER_GAP
+
+    def test_key_between(self):
+        assert key_between(None, ORDER_GAP) == ORDER_GAP // 2 - 1
+        assert key_between(10, 20) == 15
+        assert key_between(10, 11) is None
+        assert key_between(None, 0) is None
+        assert key_between(ORDER_GAP, None) == 2 * ORDER_GAP
+
+    def test_min_gap(self):
+        assert min_gap([5]) is None
+        assert min_gap([30, 10, 12]) == 2
+
+
+class TestAssignKeys:
+    def test_empty_route(self):
+        assert assign_keys(["a", "b"], {}) == {"a": ORDER_GAP, "b": 2 * ORDER_GAP}
+
+    def test_only_moved_item_changes(self):
+        keys = dict(zip("abcd", spaced_keys(4)))
+        result = assign_keys(list("adbc"), keys)
+        assert [k for k in "abcd" if result[k] != keys[k]] == ["d"]
+        assert result["a"] < result["d"] < result["b"]
+
+    def test_insertions_spread_over_gap(self):
+        keys = {"a": 0, "b": 100}
+        result = assign_keys(["a", "x", "y", "b", "z"], keys)
+        assert result["a"] < result["x"] < result["y"] < result["b"] < result["z"]
+        assert result["b"] == 100
+
+    def test_no_room(self):
+        assert assign_keys(["a", "x", "b"], {"a": 5, "b": 6}) is None
+
+    def test_keys_are_distinct_and_ordered(self):
+        keys = dict(zip("abcdef", spaced_keys(6)))
+        seq = list("fedcba")
+        result = assign_keys(seq, keys)
+        ordered = [result[k] for k in seq]
+        assert ordered == sorted(set(ordered))
+        assert min(ordered) >= 0
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from app.auth.passwords import (
+    PasswordHasher,
+    PasswordHasherBusy,
+    calibrate_iterations,
+    hash_password,
+    needs_rehash,
+    verify_password,
+)
+from app.core.settings import settings
+
+
+class TestPasswordHashing:
+    """Test PBKDF2 hashing helpers."""
+
+    def test_hash_and_verify(self):
+        stored = hash_password("secret-password", iterations=1_000)
+        assert verify_password("secret-password", stored)
+        assert not verify_password("wrong-password", stored)
+        assert not verify_password("secret-password", "bcrypt$garbage")
+
+    def test_needs_rehash(self):
+        assert needs_rehash(hash_password("pw", iterations=1_000))
+        assert not needs_rehash(f"pbkdf2_sha256${settings.password_hash_iterations}$00$00")
+        assert needs_rehash("not-a-hash")
+
+    def test_calibration_scales_with_target(self):
+        low = calibrate_iterations(50)
+        high = calibrate_iterations(500)
+        assert low >= 100_000
+        assert high > low
+
+
+class TestPasswordHasher:
+    """Test the bounded hashing pool."""
+
+    async def test_runs_off_the_event_loop(self):
+        hasher = PasswordHasher(workers=2, max_queue=0)
+        loop_thread = threading.get_ident()
+        seen = []
+
+        def job():
+            seen.append(threading.get_ident())
+            return hash_password("pw", iterations=1_000)
+
+        try:
+            stored = await hasher._run(job)
+        finally:
+            hasher.shutdown()
+        assert verify_password("pw", stored)
+        assert seen and seen[0] != loop_thread
+
+    async def test_rejects_when_saturated(self):
+        hasher = PasswordHasher(workers=1, max_queue=1)
+        release = threading.Event()
+        try:
+            jobs = [asyncio.ensure_future(hasher._run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0)
+            assert hasher.pending == 2
+            with pytest.raises(PasswordHasherBusy):
+                await hasher.verify("pw", "x")
+            assert hasher.rejected == 1
+            release.set()
+            await asyncio.gather(*jobs)
+            assert hasher.pending == 0
+        finally:
+            hasher.shutdown()
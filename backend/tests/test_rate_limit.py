@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import uuid
+
+import pytest
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from app.core.rate_limit import Limiter, RateLimitExceeded, RateLimits, client_key, parse_rate
+from app.core.rate_limit_storage import MemoryStorage, SharedMemoryStorage
+
+
+def _hammer(path: str, hits: int, results) -> None:
+    storage = SharedMemoryStorage(path, slots=64)
+
+    async def run():
+        return sum([(await storage.hit("shared", 60.0, 600.0))[0] for _ in range(hits)])
+
+    results.put(asyncio.run(run()))
+
+
+class TestStorage:
+    """Test token-bucket storage backends."""
+
+    @pytest.mark.parametrize("kind", ["memory", "shm"])
+    async def test_bucket_allows_burst_then_rejects(self, kind, tmp_path):
+        storage = MemoryStorage() if kind == "memory" else SharedMemoryStorage(str(tmp_path / "rl"), slots=64)
+        # 3 tokens per minute.
+        results = [await storage.hit("k", 20.0, 60.0) for _ in range(4)]
+        assert [allowed for allowed, _ in results] == [True, True, True, False]
+        assert 19 < results[-1][1] <= 20
+        assert (await storage.hit("other", 20.0, 60.0))[0]
+
+    async def test_refills_over_time(self, monkeypatch, tmp_path):
+        now = [1000.0]
+        monkeypatch.setattr("app.core.rate_limit_storage.time.time", lambda: now[0])
+        storage = SharedMemoryStorage(str(tmp_path / "rl"), slots=64)
+        assert (await storage.hit("k", 10.0, 20.0))[0]
+        assert (await storage.hit("k", 10.0, 20.0))[0]
+        assert not (await storage.hit("k", 10.0, 20.0))[0]
+        now[0] += 10
+        assert (await storage.hit("k", 10.0, 20.0))[0]
+
+    async def test_colliding_keys_keep_separate_buckets(self, tmp_path):
+        storage = SharedMemoryStorage(str(tmp_path / "rl"), slots=1)
+        for key in ("a", "b", "c"):
+            assert (await storage.hit(key, 60.0, 60.0))[0]
+        for key in ("a", "b", "c"):
+            assert not (await storage.hit(key, 60.0, 60.0))[0]
+
+    def test_shared_across_processes(self, tmp_path):
+        path = str(tmp_path / "rl")
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        procs = [ctx.Process(target=_hammer, args=(path, 10, results)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(10)
+        # 10 tokens in total, whichever worker takes them.
+        assert sum(results.get(timeout=1) for _ in procs) == 10
+
+
+class TestLimiter:
+    """Test the endpoint decorator."""
+
+    def test_parse_rate(self):
+        assert parse_rate("5/minute") == (5, 60.0)
+        assert parse_rate("100/hours") == (100, 3600.0)
+        with pytest.raises(ValueError):
+            parse_rate("5 per minute")
+
+    def _app(self, limiter: Limiter) -> FastAPI:
+        app = FastAPI()
+
+        @app.exception_handler(RateLimitExceeded)
+        async def handler(request: Request, exc: RateLimitExceeded):
+            from fastapi.responses import JSONResponse
+
+            return JSONResponse({"retry_after": exc.retry_after}, status_code=429)
+
+        @app.get("/ping")
+        @limiter.limit("2/minute")
+        async def ping(request: Request):
+            return {"ok": True}
+
+        return app
+
+    async def test_limits_per_client(self):
+        limiter = Limiter(storage=MemoryStorage())
+        async with AsyncClient(app=self._app(limiter), base_url="http://test") as client:
+            codes = [(await client.get("/ping")).status_code for _ in range(3)]
+        assert codes == [200, 200, 429]
+        assert (limiter.checks, limiter.rejections) == (3, 1)
+
+    async def test_disabled(self):
+        limiter = Limiter(storage=MemoryStorage(), enabled=False)
+        async with AsyncClient(app=self._app(limiter), base_url="http://test") as client:
+            codes = [(await client.get("/ping")).status_code for _ in range(3)]
+        assert codes == [200, 200, 200]
+
+    def test_key_prefers_user_id(self):
+        user_id = uuid.uuid4()
+        scope = {"type": "http", "headers": [], "client": ("10.0.0.1", 1234), "state": {}}
+        request = Request(scope)
+        assert client_key(request) == "ip:10.0.0.1"
+        request.state.user_id = user_id
+        assert client_key(request) == f"user:{user_id}"
+
+
+class TestRateLimitsEndpoint:
+    """Test GET /api/rate-limits."""
+
+    async def test_lists_every_preset(self):
+        from app.main import app
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/rate-limits")
+        assert response.status_code == 200
+        assert response.json() == {name.lower(): value for name, value in vars(RateLimits).items() if name.isupper()}
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from app.api.cache import CachedResponse, MemoryResponseCache, cache_stats, route_tag, user_tag
+
+
+def _entry(size: int = 10) -> CachedResponse:
+    return CachedResponse("application/json", b"x" * size, {})
+
+
+class TestMemoryResponseCache:
+    """Test the in-process response cache."""
+
+    async def test_hit_ratio(self):
+        cache = MemoryResponseCache(max_bytes=1000, ttl_seconds=60)
+        assert await cache.get("a") is None
+        await cache.set("a", _entry(), [route_tag(1)])
+        assert await cache.get("a") == _entry()
+        assert cache_stats(cache)["hit_ratio"] == 0.5
+
+    async def test_invalidate_by_tag(self):
+        cache = MemoryResponseCache(max_bytes=1000, ttl_seconds=60)
+        await cache.set("r1", _entry(), [route_tag(1), user_tag("u")])
+        await cache.set("r2", _entry(), [route_tag(2), user_tag("u")])
+        await cache.set("other", _entry(), [route_tag(3), user_tag("v")])
+
+        await cache.invalidate(route_tag(1))
+        assert await cache.get("r1") is None
+        assert await cache.get("r2") is not None
+
+        await cache.invalidate(user_tag("u"))
+        assert await cache.get("r2") is None
+        assert await cache.get("other") is not None
+        assert cache.size_bytes == 10
+
+    async def test_evicts_to_stay_under_size(self):
+        cache = MemoryResponseCache(max_bytes=25, ttl_seconds=60)
+        for key in ("a", "b", "c"):
+            await cache.set(key, _entry(), [])
+        assert await cache.get("a") is None
+        assert len(cache) == 2
+        assert cache.evictions == 1
+        await cache.set("huge", _entry(100), [])
+        assert await cache.get("huge") is None
+
+    async def test_ttl(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("app.api.cache.time.monotonic", lambda: now[0])
+        cache = MemoryResponseCache(max_bytes=1000, ttl_seconds=5)
+        await cache.set("a", _entry(), [])
+        now[0] += 6
+        assert await cache.get("a") is None
+        assert cache.size_bytes == 0
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import io
+import json
 import uuid
+import zipfile
 import pytest
 from httpx import AsyncClient
 
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.serializers import BINARY_MEDIA_TYPE, POLYLINE_MEDIA_TYPE
+from app.geo.encoding import decode_binary, decode_polyline
+
 
 class TestRouteCRUD:
     """Test route CRUD operations with PostGIS geometry."""
@@ -58,7 +65,37 @@ class TestRouteCRUD:
         assert isinstance(data, list)
         assert len(data) >= 1
         assert data[0]["title"] == "My Route"
-    
+
+    async def test_list_routes_groups_markers_per_route(self, auth_client):
+        """Test batched listing attaches each route's own markers in order."""
+        client, headers = auth_client
+
+        route_ids = []
+        for i in range(3):
+            resp = await client.post(
+                "/api/routes",
+                json={
+                    "title": f"Batch {i}",
+                    "geometry": {"type": "LineString", "coordinates": [[-77.0, -12.0], [-77.1, -12.1]]},
+                },
+                headers=headers,
+            )
+            route_id = resp.json()["id"]
+            route_ids.append(route_id)
+            for label in ("A", "B"):
+                await client.post(
+                    f"/api/routes/{route_id}/markers",
+                    json={"label": f"{i}{label}", "geometry": {"type": "Point", "coordinates": [-77.05, -12.05]}},
+                    headers=headers,
+                )
+
+        response = await client.get("/api/routes", headers=headers)
+        assert response.status_code == 200
+
+        by_id = {r["id"]: r for r in response.json()}
+        for i, route_id in enumerate(route_ids):
+            assert [m["label"] for m in by_id[route_id]["markers"]] == [f"{i}A", f"{i}B"]
+
     async def test_get_route_detail(self, auth_client):
         """Test getting route details with markers."""
         client, headers = auth_client
@@ -195,6 +232,54 @@ class TestRouteSharing:
         response = await client.get(f"/api/routes/{uuid.uuid4()}")
         assert response.status_code == 401
 
+    async def test_share_link_serves_snapshot(self, auth_client, client):
+        owner_client, headers = auth_client
+        create_resp = await owner_client.post(
+            "/api/routes",
+            json={"title": "Shared", "geometry": {"type": "LineString", "coordinates": [[-77.0, -12.0], [-77.1, -12.1]]}},
+            headers=headers,
+        )
+        route_id = create_resp.json()["id"]
+
+        share = await owner_client.post(f"/api/routes/{route_id}/share", headers=headers)
+        assert share.status_code == 201
+        path = share.json()["path"]
+
+        response = await client.get(path)
+        assert response.status_code == 200
+        assert response.json()["title"] == "Shared"
+        assert "public" in response.headers["cache-control"]
+        assert response.headers["content-encoding"] == "gzip"
+
+        etag = response.headers["etag"]
+        assert (await client.get(path, headers={"If-None-Match": etag})).status_code == 304
+
+        # The snapshot is immutable: edits show up only after sharing again.
+        await owner_client.put(f"/api/routes/{route_id}", json={"title": "Edited"}, headers=headers)
+        assert (await client.get(path)).json()["title"] == "Shared"
+        new_path = (await owner_client.post(f"/api/routes/{route_id}/share", headers=headers)).json()["path"]
+        assert (await client.get(new_path)).json()["title"] == "Edited"
+        assert (await client.get(path)).status_code == 404
+
+        assert (await owner_client.delete(f"/api/routes/{route_id}/share", headers=headers)).status_code == 204
+        assert (await client.get(new_path)).status_code == 404
+
+    async def test_only_owner_can_share(self, auth_client, client):
+        owner_client, headers = auth_client
+        create_resp = await owner_client.post(
+            "/api/routes",
+            json={"title": "Mine", "geometry": {"type": "LineString", "coordinates": [[-77.0, -12.0], [-77.1, -12.1]]}},
+            headers=headers,
+        )
+        route_id = create_resp.json()["id"]
+        other = await client.post(
+            "/api/auth/register",
+            json={"email": f"other_{uuid.uuid4()}@example.com", "password": "TestPassword123!"},
+        )
+        other_headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+        assert (await client.post(f"/api/routes/{route_id}/share", headers=other_headers)).status_code == 404
+        assert (await client.get("/api/routes/share/not-a-token")).status_code == 404
+
 
 class TestRouteGeoJSON:
     """Test GeoJSON serialization and spatial data handling."""
@@ -250,3 +335,465 @@ class TestRouteGeoJSON:
         # Distance should be positive and reasonable (around 0.1 km)
         assert data["distance_km"] > 0
         assert data["distance_km"] < 1.0
+
+
+class TestRouteListing:
+    """Test keyset pagination and NDJSON streaming of the route list."""
+
+    async def test_keyset_pagination_walks_all_routes(self, auth_client, make_route):
+        """Test following X-Next-Cursor visits every route exactly once."""
+        client, headers = auth_client
+        for i in range(5):
+            await make_route(title=f"Page {i}")
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/api/routes", params=params, headers=headers)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 2
+            seen.extend(r["id"] for r in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        full = await client.get("/api/routes", headers=headers)
+        assert seen == [r["id"] for r in full.json()]
+        assert len(seen) == 5
+
+    async def test_invalid_cursor_rejected(self, auth_client):
+        """Test malformed cursors return 422."""
+        client, headers = auth_client
+        response = await client.get("/api/routes", params={"cursor": "not-a-cursor"}, headers=headers)
+        assert response.status_code == 422
+
+    async def test_ndjson_stream(self, auth_client, make_route):
+        """Test Accept: application/x-ndjson streams one route per line."""
+        client, headers = auth_client
+        for i in range(3):
+            await make_route(title=f"Page {i}")
+
+        response = await client.get(
+            "/api/routes", headers={**headers, "Accept": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+        assert len(lines) == 3
+        assert all(r["geometry"]["type"] == "LineString" for r in lines)
+
+    async def test_ndjson_pagination(self, auth_client, make_route):
+        """Test NDJSON pages carry X-Next-Cursor like JSON ones."""
+        client, headers = auth_client
+        for i in range(3):
+            await make_route(title=f"Page {i}")
+        ndjson = {**headers, "Accept": "application/x-ndjson"}
+
+        seen = []
+        params = {"limit": 2}
+        while True:
+            response = await client.get("/api/routes", params=params, headers=ndjson)
+            page = [json.loads(line)["id"] for line in response.text.splitlines() if line]
+            json_page = await client.get("/api/routes", params=params, headers=headers)
+            assert page == [r["id"] for r in json_page.json()]
+            assert response.headers.get("X-Next-Cursor") == json_page.headers.get("X-Next-Cursor")
+            seen.extend(page)
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+        assert len(seen) == 3 and len(set(seen)) == 3
+
+
+class TestRouteSearch:
+    """Test bounding-box search over public routes."""
+
+    async def test_bbox_returns_intersecting_public_routes(self, auth_client):
+        """Test only public routes inside the viewport are returned."""
+        client, headers = auth_client
+
+        async def create(title, coords, is_public):
+            resp = await client.post(
+                "/api/routes",
+                json={"title": title, "is_public": is_public,
+                      "geometry": {"type": "LineString", "coordinates": coords}},
+                headers=headers,
+            )
+            return resp.json()["id"]
+
+        inside = await create("Lima loop", [[-77.05, -12.05], [-77.04, -12.04]], True)
+        private = await create("Lima private", [[-77.05, -12.05], [-77.04, -12.04]], False)
+        outside = await create("Cusco climb", [[-71.97, -13.53], [-71.96, -13.52]], True)
+
+        response = await client.get("/api/routes/search", params={"bbox": "-77.1,-12.1,-77.0,-12.0"})
+        assert response.status_code == 200
+        ids = [r["id"] for r in response.json()]
+        assert inside in ids
+        assert private not in ids
+        assert outside not in ids
+
+        summary = next(r for r in response.json() if r["id"] == inside)
+        assert "geometry" not in summary
+        assert summary["bbox"][0] == pytest.approx(-77.05)
+
+    async def test_distance_range_filter(self, auth_client):
+        """Test min/max distance narrows the result set."""
+        client, headers = auth_client
+        resp = await client.post(
+            "/api/routes",
+            json={"title": "Short hop", "is_public": True,
+                  "geometry": {"type": "LineString", "coordinates": [[-77.05, -12.05], [-77.049, -12.049]]}},
+            headers=headers,
+        )
+        route_id = resp.json()["id"]
+
+        params = {"bbox": "-77.1,-12.1,-77.0,-12.0", "min_distance_km": 50}
+        response = await client.get("/api/routes/search", params=params)
+        assert route_id not in [r["id"] for r in response.json()]
+
+    async def test_invalid_bbox(self, client):
+        """Test malformed bounding boxes return 422."""
+        response = await client.get("/api/routes/search", params={"bbox": "1,2,3"})
+        assert response.status_code == 422
+
+
+class TestRouteLevelOfDetail:
+    """Test zoom/simplify geometry simplification."""
+
+    # A gently wiggling 500-vertex line ~5km long.
+    DENSE = [[-77.05 + i * 0.0001, -12.05 + (0.00001 if i % 2 else 0.0)] for i in range(500)]
+
+    async def test_zoom_returns_fewer_vertices(self, auth_client, make_route):
+        client, headers = auth_client
+        coords = self.DENSE
+        route_id = (await make_route(coords, title="Dense"))["id"]
+
+        full = await client.get(f"/api/routes/{route_id}", headers=headers)
+        overview = await client.get(f"/api/routes/{route_id}", params={"zoom": 8}, headers=headers)
+        assert overview.status_code == 200
+
+        full_coords = full.json()["geometry"]["coordinates"]
+        lod_coords = overview.json()["geometry"]["coordinates"]
+        assert len(full_coords) == len(coords)
+        assert 2 <= len(lod_coords) < len(full_coords) / 10
+        assert overview.json()["distance_km"] == full.json()["distance_km"]
+        assert len(overview.content) < len(full.content) / 10
+
+    async def test_simplify_on_list(self, auth_client, make_route):
+        client, headers = auth_client
+        coords = self.DENSE
+        route_id = (await make_route(coords, title="Dense"))["id"]
+
+        response = await client.get("/api/routes", params={"simplify": 0.001}, headers=headers)
+        route = next(r for r in response.json() if r["id"] == route_id)
+        assert len(route["geometry"]["coordinates"]) < len(coords)
+
+    async def test_zoom_and_simplify_are_exclusive(self, auth_client):
+        client, headers = auth_client
+        response = await client.get("/api/routes", params={"simplify": 0.001, "zoom": 5}, headers=headers)
+        assert response.status_code == 422
+
+
+class TestRouteEncodings:
+    """Test polyline and binary geometry encodings negotiated via Accept."""
+
+    LINE = [[-77.05 + i * 0.001, -12.05 + i * 0.0005] for i in range(20)]
+
+    async def test_polyline_route(self, auth_client, make_route):
+        client, headers = auth_client
+        coords = self.LINE
+        route_id = (await make_route(coords, markers=1, title="Encoded"))["id"]
+
+        response = await client.get(
+            f"/api/routes/{route_id}",
+            headers={**headers, "Accept": POLYLINE_MEDIA_TYPE},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith(POLYLINE_MEDIA_TYPE)
+        assert "Accept" in response.headers["vary"]
+        geometry = response.json()["geometry"]
+        assert geometry["encoding"] == "polyline"
+        assert geometry["precision"] == 5
+        decoded = decode_polyline(geometry["polyline"], 5)
+        assert len(decoded) == len(coords)
+        assert decoded[0] == pytest.approx(coords[0], abs=1e-5)
+        marker = response.json()["markers"][0]["geometry"]
+        assert decode_polyline(marker["polyline"], 5)[0] == pytest.approx(coords[0], abs=1e-5)
+
+    async def test_binary_list_keeps_cursor(self, auth_client, make_route):
+        client, headers = auth_client
+        await make_route(self.LINE, markers=1)
+        await make_route(self.LINE, markers=1)
+
+        response = await client.get(
+            "/api/routes",
+            params={"limit": 1},
+            headers={**headers, "Accept": BINARY_MEDIA_TYPE},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == BINARY_MEDIA_TYPE
+        assert response.headers.get(NEXT_CURSOR_HEADER)
+        precision, routes = decode_binary(response.content)
+        assert precision == 6
+        assert len(routes) == 1
+        assert len(routes[0].markers) == 1
+
+    async def test_json_preferred_over_encodings(self, auth_client, make_route):
+        client, headers = auth_client
+        route_id = (await make_route(self.LINE, markers=1))["id"]
+
+        response = await client.get(
+            f"/api/routes/{route_id}",
+            headers={**headers, "Accept": f"application/json, {BINARY_MEDIA_TYPE};q=0.5"},
+        )
+        assert response.json()["geometry"]["type"] == "LineString"
+        assert "coordinates" in response.json()["geometry"]
+
+    async def test_unsupported_precision(self, auth_client, make_route):
+        client, headers = auth_client
+        route_id = (await make_route(self.LINE, markers=1))["id"]
+
+        response = await client.get(
+            f"/api/routes/{route_id}",
+            params={"precision": 7},
+            headers={**headers, "Accept": POLYLINE_MEDIA_TYPE},
+        )
+        assert response.status_code == 422
+
+
+class TestConditionalGet:
+    """Test ETag / Last-Modified revalidation of route reads."""
+
+    async def test_route_not_modified(self, auth_client, make_route):
+        client, headers = auth_client
+        route_id = (await make_route(title="Cached"))["id"]
+
+        first = await client.get(f"/api/routes/{route_id}", headers=headers)
+        etag = first.headers["etag"]
+        assert first.headers["last-modified"]
+        assert "Authorization" in first.headers["vary"]
+
+        again = await client.get(f"/api/routes/{route_id}", headers={**headers, "If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+
+        since = await client.get(
+            f"/api/routes/{route_id}",
+            headers={**headers, "If-Modified-Since": first.headers["last-modified"]},
+        )
+        assert since.status_code == 304
+
+    async def test_marker_change_invalidates_etag(self, auth_client, make_route):
+        client, headers = auth_client
+        route_id = (await make_route(title="Cached"))["id"]
+        etag = (await client.get(f"/api/routes/{route_id}", headers=headers)).headers["etag"]
+
+        created = await client.post(
+            f"/api/routes/{route_id}/markers",
+            json={"geometry": {"type": "Point", "coordinates": [-77.0, -12.0]}},
+            headers=headers,
+        )
+        after_create = await client.get(f"/api/routes/{route_id}", headers={**headers, "If-None-Match": etag})
+        assert after_create.status_code == 200
+        assert len(after_create.json()["markers"]) == 1
+
+        etag = after_create.headers["etag"]
+        await client.delete(f"/api/routes/{route_id}/markers/{created.json()['id']}", headers=headers)
+        after_delete = await client.get(f"/api/routes/{route_id}", headers={**headers, "If-None-Match": etag})
+        assert after_delete.status_code == 200
+        assert after_delete.json()["markers"] == []
+
+    async def test_etag_differs_per_representation(self, auth_client, make_route):
+        client, headers = auth_client
+        route_id = (await make_route(title="Cached"))["id"]
+        full = await client.get(f"/api/routes/{route_id}", headers=headers)
+        overview = await client.get(f"/api/routes/{route_id}", params={"zoom": 5}, headers=headers)
+        assert full.headers["etag"] != overview.headers["etag"]
+
+        response = await client.get(
+            f"/api/routes/{route_id}", params={"zoom": 5}, headers={**headers, "If-None-Match": full.headers["etag"]}
+        )
+        assert response.status_code == 200
+
+    async def test_list_not_modified_until_a_route_changes(self, auth_client, make_route):
+        client, headers = auth_client
+        route_id = (await make_route(title="Cached"))["id"]
+
+        first = await client.get("/api/routes", headers=headers)
+        etag = first.headers["etag"]
+        again = await client.get("/api/routes", headers={**headers, "If-None-Match": etag})
+        assert again.status_code == 304
+
+        await client.put(f"/api/routes/{route_id}", json={"title": "Renamed"}, headers=headers)
+        changed = await client.get("/api/routes", headers={**headers, "If-None-Match": etag})
+        assert changed.status_code == 200
+
+        etag = changed.headers["etag"]
+        await client.delete(f"/api/routes/{route_id}", headers=headers)
+        deleted = await client.get("/api/routes", headers={**headers, "If-None-Match": etag})
+        assert deleted.status_code == 200
+
+
+class TestRouteResponseCache:
+    """Test the rendered-response cache on route reads."""
+
+    async def test_second_read_is_served_from_cache(self, auth_client):
+        from app.api.cache import response_cache
+
+        client, headers = auth_client
+        resp = await client.post(
+            "/api/routes",
+            json={"title": "Hot", "geometry": {"type": "LineString", "coordinates": [[-77.0, -12.0], [-77.1, -12.1]]}},
+            headers=headers,
+        )
+        route_id = resp.json()["id"]
+
+        first = await client.get(f"/api/routes/{route_id}", headers=headers)
+        hits = response_cache.hits
+        second = await client.get(f"/api/routes/{route_id}", headers=headers)
+        assert response_cache.hits == hits + 1
+        assert second.json() == first.json()
+
+        await client.put(f"/api/routes/{route_id}", json={"title": "Renamed"}, headers=headers)
+        third = await client.get(f"/api/routes/{route_id}", headers=headers)
+        assert third.json()["title"] == "Renamed"
+
+    async def test_private_route_not_served_to_other_users(self, auth_client, client):
+        owner_client, owner_headers = auth_client
+        resp = await owner_client.post(
+            "/api/routes",
+            json={"title": "Mine", "geometry": {"type": "LineString", "coordinates": [[-77.0, -12.0], [-77.1, -12.1]]}},
+            headers=owner_headers,
+        )
+        route_id = resp.json()["id"]
+        assert (await owner_client.get(f"/api/routes/{route_id}", headers=owner_headers)).status_code == 200
+
+        other = await client.post(
+            "/api/auth/register",
+            json={"email": f"other_{uuid.uuid4()}@example.com", "password": "TestPassword123!"},
+        )
+        other_headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+        assert (await client.get(f"/api/routes/{route_id}", headers=other_headers)).status_code == 404
+        assert (await client.get(f"/api/routes/{route_id}")).status_code == 401
+
+
+class TestRouteImport:
+    """Test POST /routes/import."""
+
+    GPX = b"""<?xml version="1.0"?>
+<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">
+  <wpt lat="-12.0" lon="-77.0"><name>Cafe</name></wpt>
+  <trk><name>Imported ride</name><trkseg>
+    <trkpt lat="-12.0" lon="-77.0"/><trkpt lat="-12.1" lon="-77.1"/>
+  </trkseg></trk>
+</gpx>"""
+
+    async def test_import_files_and_archive(self, auth_client):
+        client, headers = auth_client
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("a.gpx", self.GPX)
+            zf.writestr("broken.gpx", b"<gpx><trk>")
+        response = await client.post(
+            "/api/routes/import",
+            files=[
+                ("files", ("ride.gpx", self.GPX, "application/gpx+xml")),
+                ("files", ("export.zip", archive.getvalue(), "application/zip")),
+            ],
+            headers=headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["routes_created"] == 2
+        results = {f["filename"]: f for f in data["files"]}
+        assert results["ride.gpx"]["markers"] == 1
+        assert results["export.zip/a.gpx"]["error"] is None
+        assert results["export.zip/broken.gpx"]["error"]
+
+        route = (await client.get(f"/api/routes/{results['ride.gpx']['route_ids'][0]}", headers=headers)).json()
+        assert route["title"] == "Imported ride"
+        assert route["distance_km"] > 0
+        assert [m["label"] for m in route["markers"]] == ["Cafe"]
+
+    async def test_import_requires_auth(self, client):
+        response = await client.post(
+            "/api/routes/import", files=[("files", ("ride.gpx", self.GPX, "application/gpx+xml"))]
+        )
+        assert response.status_code == 401
+
+
+class TestRouteExport:
+    """Test GET /routes/export."""
+
+    async def test_export_formats(self, auth_client):
+        client, headers = auth_client
+        resp = await client.post(
+            "/api/routes",
+            json={"title": "Export me", "geometry": {"type": "LineString", "coordinates": [[-77.0, -12.0], [-77.1, -12.1]]}},
+            headers=headers,
+        )
+        route_id = resp.json()["id"]
+        await client.post(
+            f"/api/routes/{route_id}/markers",
+            json={"geometry": {"type": "Point", "coordinates": [-77.05, -12.05]}, "label": "Stop"},
+            headers=headers,
+        )
+
+        gpx = await client.get("/api/routes/export", headers=headers)
+        assert gpx.status_code == 200
+        assert gpx.headers["content-type"].startswith("application/gpx+xml")
+        assert b"<name>Export me</name>" in gpx.content and b"<name>Stop</name>" in gpx.content
+
+        geojson = await client.get("/api/routes/export?format=geojson", headers=headers)
+        features = geojson.json()["features"]
+        assert [f["geometry"]["type"] for f in features] == ["Point", "LineString"]
+        assert features[1]["id"] == route_id
+
+        archive = await client.get("/api/routes/export?format=zip", headers=headers)
+        with zipfile.ZipFile(io.BytesIO(archive.content)) as zf:
+            assert len(zf.namelist()) == 1
+
+        assert (await client.get("/api/routes/export?format=kml", headers=headers)).status_code == 422
+
+    async def test_export_requires_auth(self, client):
+        assert (await client.get("/api/routes/export")).status_code == 401
+
+
+class TestQueryBudgets:
+    """Test route reads issue a fixed number of queries, whatever the data size."""
+
+    async def test_list_routes_query_count_is_constant(self, auth_client, make_route, query_budget):
+        """Test listing runs the validator, route and marker queries only."""
+        client, headers = auth_client
+        await make_route(markers=2)
+        with query_budget(3, "list_routes, 1 route") as few:
+            assert (await client.get("/api/routes", headers=headers)).status_code == 200
+
+        for _ in range(5):
+            await make_route(markers=2)
+        with query_budget(3, "list_routes, 6 routes") as many:
+            response = await client.get("/api/routes", headers=headers)
+        assert len(response.json()) == 6
+        assert many.count == few.count
+
+    async def test_ndjson_query_count(self, auth_client, make_route, query_budget):
+        """Test streaming batches markers per chunk of routes."""
+        client, headers = auth_client
+        for _ in range(4):
+            await make_route(markers=2)
+        with query_budget(2, "list_routes ndjson"):
+            response = await client.get("/api/routes", headers={**headers, "Accept": "application/x-ndjson"})
+        assert len(response.text.splitlines()) == 4
+
+    async def test_route_detail_query_count(self, auth_client, make_route, query_budget):
+        """Test a detail read runs the metadata, route and marker queries only."""
+        client, headers = auth_client
+        route_id = (await make_route(markers=5))["id"]
+        with query_budget(3, "get_route"):
+            response = await client.get(f"/api/routes/{route_id}", headers=headers)
+        assert len(response.json()["markers"]) == 5
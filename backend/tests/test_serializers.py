@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.api.serializers import RawJSONResponse, RouteRecord, route_json, route_out, routes_json
+
+LINE = '{"type":"LineString","coordinates":[[-77.0428,-12.0464],[-77.043,-12.047]]}'
+POINT = '{"type":"Point","coordinates":[-77.043,-12.047]}'
+
+
+def _record(**route_fields) -> RouteRecord:
+    created = datetime(2025, 3, 1, 8, 30, tzinfo=timezone.utc)
+    route = SimpleNamespace(
+        id=uuid.uuid4(),
+        title="Costa Verde",
+        description=None,
+        distance_km=12.5,
+        is_public=True,
+        created_at=created,
+        updated_at=created,
+    )
+    vars(route).update(route_fields)
+    markers = [
+        (
+            SimpleNamespace(
+                id=uuid.uuid4(), label=f"Stop {i}", description="Água \"fria\"\n", icon_type="water", order_index=i * 1024
+            ),
+            gj,
+        )
+        for i, gj in enumerate((POINT, None))
+    ]
+    return RouteRecord(route, LINE, markers)
+
+
+class TestRouteJSON:
+    """Test spliced route JSON against the pydantic rendering."""
+
+    def test_matches_model_dump_json(self):
+        record = _record()
+        assert route_json(record) == route_out(record).model_dump_json().encode()
+
+    def test_escapes_text_fields(self):
+        record = _record(title='Ruta "nocturna" \\ ñandú 🚲\t', description="</script>", distance_km=0)
+        assert route_json(record) == route_out(record).model_dump_json().encode()
+
+    def test_empty_geometry_and_timestamps(self):
+        record = RouteRecord(_record(created_at=None, updated_at=None).route, None, [])
+        assert route_json(record) == route_out(record).model_dump_json().encode()
+        assert json.loads(route_json(record))["geometry"] == {"type": "LineString", "coordinates": []}
+
+    def test_list(self):
+        records = [_record(), _record(is_public=False)]
+        assert json.loads(routes_json(records)) == [r.model_dump(mode="json") for r in map(route_out, records)]
+        assert routes_json([]) == b"[]"
+
+    def test_raw_response_passes_bytes_through(self):
+        body = route_json(_record())
+        assert RawJSONResponse(body, status_code=201).body == body
+        assert RawJSONResponse({"a": 1}).body == b'{"a":1}'
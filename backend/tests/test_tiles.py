@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import pytest
+
+from app.geo.tiles import TileCache, TileGenerations, tile_bounds, tile_cache
+
+
+class TestTileCache:
+    """Test the bounded LRU tile cache."""
+
+    @pytest.fixture
+    def generations(self, tmp_path):
+        return TileGenerations(str(tmp_path / "generations"), slots=1024)
+
+    @pytest.fixture(params=["memory", "disk"])
+    def cache(self, request, tmp_path, generations):
+        directory = str(tmp_path / "tiles") if request.param == "disk" else None
+        return TileCache(max_bytes=100, directory=directory, generations=generations)
+
+    def _put(self, cache, key, data):
+        cache.put(key, data, cache.version(key))
+
+    def _get(self, cache, key):
+        return cache.get(key, cache.version(key))
+
+    def test_lru_eviction_respects_byte_budget(self, cache):
+        self._put(cache, ("routes", 10, 300, 540), b"a" * 40)
+        self._put(cache, ("routes", 10, 301, 540), b"b" * 40)
+        assert self._get(cache, ("routes", 10, 300, 540)) == b"a" * 40  # now most recent
+
+        self._put(cache, ("routes", 10, 302, 540), b"c" * 40)
+        assert self._get(cache, ("routes", 10, 301, 540)) is None
+        assert self._get(cache, ("routes", 10, 300, 540)) == b"a" * 40
+        assert len(cache) == 2
+
+    def test_invalidate_by_bbox(self, cache):
+        inside = ("routes", 12, 1170, 2170)
+        far = ("routes", 12, 100, 100)
+        low = ("routes", 3, 2, 4)
+        self._put(cache, inside, b"x")
+        self._put(cache, far, b"y")
+        self._put(cache, low, b"w")
+        self._put(cache, ("markers", *inside[1:]), b"z")
+
+        minx, miny, maxx, maxy = tile_bounds(*inside[1:])
+        removed = cache.invalidate_bbox((minx, miny, minx + 1e-4, miny + 1e-4), layers=("routes",))
+
+        assert removed == 2
+        assert self._get(cache, inside) is None
+        assert self._get(cache, low) is None
+        assert self._get(cache, far) == b"y"
+        assert self._get(cache, ("markers", *inside[1:])) == b"z"
+
+    def test_invalidation_reaches_other_workers(self, tmp_path, generations):
+        # Two caches over one counters file stand in for two worker processes.
+        other = TileCache(
+            max_bytes=100,
+            directory=str(tmp_path / "tiles"),
+            generations=TileGenerations(str(tmp_path / "generations"), slots=1024),
+        )
+        mine = TileCache(max_bytes=100, generations=generations)
+        key = ("routes", 12, 1170, 2170)
+        self._put(other, key, b"old")
+        mine.invalidate_bbox(tile_bounds(12, 100, 100), layers=("routes",))
+        assert self._get(other, key) == b"old"
+        mine.invalidate_bbox(tile_bounds(*key[1:]), layers=("routes",))
+        assert self._get(other, key) is None
+
+    def test_render_racing_a_write_is_not_served(self, cache):
+        key = ("routes", 14, 4680, 8680)
+        version = cache.version(key)  # read before rendering
+        cache.invalidate_bbox(tile_bounds(*key[1:]))  # write commits meanwhile
+        cache.put(key, b"rendered before the write", version)
+        assert self._get(cache, key) is None
+
+    def test_ttl(self, generations):
+        cache = TileCache(max_bytes=100, ttl_seconds=0, generations=generations)
+        self._put(cache, ("routes", 1, 0, 0), b"x")
+        assert len(cache) == 0
+
+
+class TestTileEndpoints:
+    """Test MVT endpoints and cache invalidation on route writes."""
+
+    async def test_route_tile_served_and_invalidated(self, auth_client):
+        client, headers = auth_client
+        tile_cache.clear()
+
+        # z=12 tile covering central Lima.
+        z, x, y = 12, 1171, 2185
+        minx, miny, maxx, maxy = tile_bounds(z, x, y)
+        cx, cy = (minx + maxx) / 2, (miny + maxy) / 2
+
+        first = await client.get(f"/api/tiles/routes/{z}/{x}/{y}.pbf")
+        assert first.status_code == 200
+        assert first.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+        assert len(tile_cache) == 1
+
+        await client.post(
+            "/api/routes",
+            json={"title": "Tile route", "is_public": True,
+                  "geometry": {"type": "LineString", "coordinates": [[cx, cy], [cx + 0.001, cy + 0.001]]}},
+            headers=headers,
+        )
+        assert len(tile_cache) == 0
+
+        second = await client.get(f"/api/tiles/routes/{z}/{x}/{y}.pbf")
+        assert second.status_code == 200
+        assert len(second.content) > len(first.content)
+
+    async def test_out_of_range_tile(self, client):
+        response = await client.get("/api/tiles/markers/2/9/0.pbf")
+        assert response.status_code == 404
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import uuid
+
+from app.auth.cache import CurrentUser, UserCache
+
+
+def _user(**overrides):
+    return CurrentUser(**{"id": uuid.uuid4(), "email": "a@example.com", "is_active": True, **overrides})
+
+
+class TestUserCache:
+    """Test the authenticated-user TTL/LRU cache."""
+
+    def test_hit_and_miss_counters(self):
+        cache = UserCache(max_entries=10, ttl_seconds=60)
+        user = _user()
+        assert cache.get(user.id) is None
+        cache.put(user)
+        assert cache.get(user.id) == user
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_expires_after_ttl(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("app.auth.cache.time.monotonic", lambda: now[0])
+        cache = UserCache(max_entries=10, ttl_seconds=30)
+        user = _user()
+        cache.put(user)
+        now[0] += 29
+        assert cache.get(user.id) == user
+        now[0] += 2
+        assert cache.get(user.id) is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = UserCache(max_entries=2, ttl_seconds=60)
+        a, b, c = _user(), _user(), _user()
+        cache.put(a)
+        cache.put(b)
+        cache.get(a.id)
+        cache.put(c)
+        assert cache.get(b.id) is None
+        assert cache.get(a.id) == a
+        assert cache.get(c.id) == c
+
+    def test_invalidate(self):
+        cache = UserCache(max_entries=10, ttl_seconds=60)
+        user = _user()
+        cache.put(user)
+        cache.invalidate(user.id)
+        assert cache.get(user.id) is None
+
+    def test_disabled_with_zero_ttl(self):
+        cache = UserCache(max_entries=10, ttl_seconds=0)
+        user = _user()
+        cache.put(user)
+        assert cache.get(user.id) is None